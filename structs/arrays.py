@@ -1,14 +1,36 @@
 # -*- coding: utf-8 -*-
 """An assorted collection of array and list data structures"""
+import os
+import sys
+import json
+import pickle
+import operator
+import shutil
+import struct
 import inspect
+import weakref
+import tempfile
 
+from array import array, typecodes as array_typecodes
 from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import accumulate, chain, groupby, islice, repeat
+from keyword import iskeyword
+from mmap import mmap as MemoryMap, ACCESS_READ
 from textwrap import dedent
-from collections import deque, Iterable, Sized
+from collections import deque, OrderedDict
+from collections.abc import Iterable, MutableSequence, Sequence, Sized
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Shared memory was added in Python 3.8
+    shared_memory = None
 
 __author__ = 'Jon Nappi'
 __all__ = ['prev', 'BaseList', 'BitArray', 'SortedList', 'CircularArray',
-           'ParallelArray', 'OrganizedList']
+           'DictEncodedColumn', 'RunLengthColumn', 'ParallelArray',
+           'SharedParallelArray', 'ChunkedParallelArray', 'OrganizedList']
 
 
 def prev(iterable):
@@ -291,6 +313,365 @@ class CircularArray(BaseList):
         return result
 
 
+#: Leading bytes of every file written by :meth:`ParallelArray.save`
+_FILE_MAGIC = b'STRUCTPA'
+
+#: The version of the :meth:`ParallelArray.save` file format
+_FILE_VERSION = 1
+
+
+def _aligned(size, alignment=8):
+    """Round *size* up to the next multiple of *alignment*"""
+    return -(-size // alignment) * alignment
+
+
+def _column_source(spec):
+    """Return the source code which creates an empty column for *spec*"""
+    if spec is None:
+        return '[]'
+    elif spec in _ENCODINGS:
+        return '{}()'.format(_ENCODINGS[spec].__name__)
+    return 'array({!r})'.format(spec)
+
+
+def _encode_column(column):
+    """Convert *column* into the buffers that :meth:`ParallelArray.save`
+    writes for it
+
+    :return: A 3-tuple of the column's kind, it's typecode and a list of it's
+        buffers
+    """
+    if isinstance(column, _VarColumn):
+        return column.kind, None, [column.offsets, column.data]
+    elif isinstance(column, memoryview):
+        return 'array', column.format, [column]
+    elif isinstance(column, array):
+        if column.typecode not in _BUFFER_TYPECODES:
+            raise TypeError('Can not save {!r} arrays'.format(column.typecode))
+        return 'array', column.typecode, [column]
+
+    types = set(map(type, column))
+    if types <= {int}:
+        return 'array', 'q', [array('q', column)]
+    elif types <= {int, float}:
+        return 'array', 'd', [array('d', column)]
+    elif types == {str}:
+        values = [value.encode('utf-8') for value in column]
+    elif types == {bytes}:
+        values = column
+    else:
+        raise TypeError('Can not save a column of {}'.format(types))
+    offsets = array('q', [0])
+    offsets.extend(accumulate(map(len, values)))
+    return types.pop().__name__, None, [offsets, b''.join(values)]
+
+
+#: The :mod:`array` typecodes whose buffers can be cast by a memoryview
+_BUFFER_TYPECODES = 'bBhHiIlLqQfd'
+
+
+class _VarColumn(Sequence):
+    """A read-only column of variable length :const:`str` or :const:`bytes`
+    values which are only decoded as they are accessed. Each value is stored
+    in *data* between two consecutive positions in *offsets*
+    """
+    __slots__ = ('kind', 'offsets', 'data')
+
+    def __init__(self, kind, offsets, data):
+        self.kind, self.offsets, self.data = kind, offsets, data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('column index out of range')
+        value = bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+        return value.decode('utf-8') if self.kind == 'str' else value
+
+
+class DictEncodedColumn(MutableSequence):
+    """A :class:`ParallelArray` column which stores each distinct value once,
+    in a table of `values`, and each row as an integer code into that table.
+    This suits columns which repeat a small number of distinct values many
+    times, since each row costs a single 4 byte code rather than a pointer.
+    Values no longer referenced by any row remain in the value table
+    """
+    __slots__ = ('codes', 'values', '_index')
+
+    def __init__(self, iterable=()):
+        """Create a new :class:`DictEncodedColumn` instance
+
+        :param iterable: An iterable of values to encode
+        """
+        self.codes, self.values, self._index = array('I'), [], {}
+        self.extend(iterable)
+
+    def encode(self, value):
+        """Return the code for *value*, adding it to our value table if it
+        isn't already present
+        """
+        try:
+            return self._index[value]
+        except KeyError:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+            return code
+
+    def matching_codes(self, predicate):
+        """Return the set of codes whose values satisfy *predicate*, calling
+        *predicate* once per distinct value rather than once per row
+        """
+        return {code for code, value in enumerate(self.values)
+                if predicate(value)}
+
+    def indices(self, predicate):
+        """Return the indices of the rows whose values satisfy *predicate*"""
+        matches = self.matching_codes(predicate)
+        return [index for index, code in enumerate(self.codes)
+                if code in matches]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(self.values.__getitem__, self.codes[index]))
+        return self.values[self.codes[index]]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.codes[index] = array('I', map(self.encode, value))
+        else:
+            self.codes[index] = self.encode(value)
+
+    def __delitem__(self, index):
+        del self.codes[index]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+    def __contains__(self, value):
+        return value in self._index and self._index[value] in self.codes
+
+    def insert(self, index, value):
+        self.codes.insert(index, self.encode(value))
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def extend(self, iterable):
+        if isinstance(iterable, DictEncodedColumn):
+            recode = array('I', map(self.encode, iterable.values))
+            self.codes.extend(map(recode.__getitem__, iterable.codes))
+        else:
+            self.codes.extend(map(self.encode, iterable))
+
+    def count(self, value):
+        if value not in self._index:
+            return 0
+        return self.codes.count(self._index[value])
+
+    def reverse(self):
+        self.codes.reverse()
+
+    def clear(self):
+        self.codes, self.values, self._index = array('I'), [], {}
+
+    def copy(self):
+        """Return a shallow copy of this column"""
+        new = DictEncodedColumn()
+        new.codes, new.values = array('I', self.codes), list(self.values)
+        new._index = dict(self._index)
+        return new
+
+    def take(self, indices):
+        """Return a new column of the rows at *indices*, sharing the same
+        codes
+        """
+        new = self.copy()
+        new.codes = array('I', map(self.codes.__getitem__, indices))
+        return new
+
+    def __eq__(self, other):
+        if not isinstance(other, Iterable):
+            return False
+        return list(self) == list(other)
+
+    def __str__(self):
+        return str(list(self))
+
+    __repr__ = __str__
+
+
+class RunLengthColumn(MutableSequence):
+    """A :class:`ParallelArray` column which stores runs of equal, adjacent
+    values once each, as a list of run `values` and a list of the (exclusive)
+    index at which each run `ends`. This suits sorted or highly repetitive
+    columns. Appending is O(1), while lookups are O(log runs) and changes to
+    the middle of the column are O(runs)
+    """
+    __slots__ = ('values', 'ends')
+
+    def __init__(self, iterable=()):
+        """Create a new :class:`RunLengthColumn` instance
+
+        :param iterable: An iterable of values to encode
+        """
+        self.values, self.ends = [], []
+        self.extend(iterable)
+
+    @property
+    def lengths(self):
+        """A list of the length of each run"""
+        return [end - start for start, end in zip([0] + self.ends, self.ends)]
+
+    def runs(self):
+        """Iterate over (value, start, end) tuples for each run"""
+        return zip(self.values, [0] + self.ends, self.ends)
+
+    def indices(self, predicate):
+        """Return the indices of the rows whose values satisfy *predicate*,
+        calling *predicate* once per run rather than once per row
+        """
+        indices = []
+        for value, start, end in self.runs():
+            if predicate(value):
+                indices.extend(range(start, end))
+        return indices
+
+    def _run(self, index):
+        """Return the index of the run containing the row at *index*"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('column index out of range')
+        return bisect(self.ends, index)
+
+    def _split(self, index):
+        """Ensure a run starts at row *index*, splitting the run containing it
+        if need be, and return the index of that run
+        """
+        run = bisect(self.ends, index)
+        start = self.ends[run - 1] if run else 0
+        if start != index and run < len(self.values):
+            self.values.insert(run, self.values[run])
+            self.ends.insert(run, index)
+            run += 1
+        return run
+
+    def _merge(self, run):
+        """Merge the run at index *run* with either of it's neighbours if they
+        hold the same value
+        """
+        values, ends = self.values, self.ends
+        if run + 1 < len(values) and values[run] == values[run + 1]:
+            del values[run], ends[run]
+        if 0 < run < len(values) and values[run - 1] == values[run]:
+            del values[run - 1], ends[run - 1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.values[self._run(index)]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            raise TypeError('RunLengthColumn does not support slice '
+                            'assignment')
+        if index < 0:
+            index += len(self)
+        if self[index] != value:
+            del self[index]
+            self.insert(index, value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            raise TypeError('RunLengthColumn does not support slice deletion')
+        run = self._run(index)
+        for i in range(run, len(self.ends)):
+            self.ends[i] -= 1
+        if self.ends[run] == (self.ends[run - 1] if run else 0):
+            del self.values[run], self.ends[run]
+            self._merge(run - 1 if run else 0)
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __iter__(self):
+        return chain.from_iterable(map(repeat, self.values, self.lengths))
+
+    def __contains__(self, value):
+        return value in self.values
+
+    def insert(self, index, value):
+        if index < 0:
+            index = max(index + len(self), 0)
+        index = min(index, len(self))
+        run = self._split(index)
+        self.values.insert(run, value)
+        self.ends.insert(run, index)
+        for i in range(run, len(self.ends)):
+            self.ends[i] += 1
+        self._merge(run)
+
+    def append(self, value):
+        if self.values and self.values[-1] == value:
+            self.ends[-1] += 1
+        else:
+            self.values.append(value)
+            self.ends.append(len(self) + 1)
+
+    def extend(self, iterable):
+        for value, run in groupby(iterable):
+            size = sum(1 for _ in run)
+            if self.values and self.values[-1] == value:
+                self.ends[-1] += size
+            else:
+                self.values.append(value)
+                self.ends.append(len(self) + size)
+
+    def count(self, value):
+        return sum(length for run, length in zip(self.values, self.lengths)
+                   if run == value)
+
+    def reverse(self):
+        lengths = self.lengths
+        self.values.reverse()
+        self.ends = list(accumulate(reversed(lengths)))
+
+    def clear(self):
+        self.values, self.ends = [], []
+
+    def copy(self):
+        """Return a shallow copy of this column"""
+        new = RunLengthColumn()
+        new.values, new.ends = list(self.values), list(self.ends)
+        return new
+
+    def take(self, indices):
+        """Return a new column of the rows at *indices*"""
+        return RunLengthColumn(map(self.__getitem__, indices))
+
+    def __eq__(self, other):
+        if not isinstance(other, Iterable):
+            return False
+        return list(self) == list(other)
+
+    def __str__(self):
+        return str(list(self))
+
+    __repr__ = __str__
+
+
+#: The column encodings supported by :class:`ParallelArray`
+_ENCODINGS = {'dict': DictEncodedColumn, 'rle': RunLengthColumn}
+
+
 class ParallelArray(Iterable, Sized):
     """A parallel array is a list-like data structure used for representing
     arrays of records. It keeps a separate array for each field of the record,
@@ -298,38 +679,314 @@ class ParallelArray(Iterable, Sized):
     index in each array are implicitly linked together to form a single record
     """
 
-    def __init__(self, *args, keys=()):
+    __slots__ = ()
+
+    #: Cache of the generated schema classes, keyed on (class, key names,
+    #: column specs)
+    _schemas = {}
+
+    #: The class a generated schema class was specialized from
+    _schema_of = None
+
+    #: The key names of this :class:`ParallelArray`
+    _keys = ()
+
+    #: A mapping of key names to the :mod:`array` typecode of their column
+    typecodes = {}
+
+    #: A mapping of key names to the encoding of their column
+    encodings = {}
+
+    def __new__(cls, *args, keys=(), typecodes=None, encodings=None):
+        """Look up (or generate) the schema class specialized for this set of
+        key names and create the new instance from it
+        """
+        return super().__new__(cls._schema(tuple(keys) + args, typecodes,
+                                           encodings))
+
+    def __init__(self, *args, keys=(), typecodes=None, encodings=None):
         """Create a new :class:`ParallelArray` instance
 
         :param args: Arbitrary key names
-        :param keys: Explicitly declared key names. Can be mixed with args
+        :param keys: Explicitly declared key names. Can be mixed with args.
+            Key names must be identifiers, and may not start with two
+            underscores, be `_self` or be the name of one of our private
+            attributes, such as `_keys`
+        :param typecodes: An optional mapping of key names to :mod:`array`
+            typecodes. Keys given a typecode are stored in a compact, typed
+            :class:`array.array` rather than a :const:`list`
+        :param encodings: An optional mapping of key names to column
+            encodings. 'dict' stores a :class:`DictEncodedColumn`, which suits
+            columns with few distinct values, and 'rle' stores a
+            :class:`RunLengthColumn`, which suits sorted or repetitive columns
         """
-        self._keys = tuple(keys) + args
-        for key in self._keys:
-            setattr(self, key, [])
-        self.__generate_append()
-
-    def __generate_append(self):
-        """Handle the dynamic generation of this ParallelArray instance's
-        append method, which will be exec'd into the instances __dict__, thus
-        allowing for a per-basis append signature to be used.
+        pass  # Our schema class handles initializing our internal arrays
+
+    @classmethod
+    def _schema(cls, keys, typecodes=None, encodings=None):
+        """Return the schema class for *keys*, generating and caching it the
+        first time a particular set of key names is seen. A schema class is a
+        subclass of *cls* which stores each key in a slot and has `__init__`,
+        `append` and `__getitem__` compiled for its exact set of keys, so the
+        cost of exec'ing them is paid once per set of key names rather than
+        once per instance.
+
+        :param keys: The tuple of key names to look up a schema for
+        :param typecodes: A mapping of key names to :mod:`array` typecodes
+        :param encodings: A mapping of key names to column encodings
+        :return: The schema class for *keys*
         """
-        append = dedent(r"""
-        def append(self, {args}):
+        if cls._schema_of is not None:
+            if not keys and typecodes is None and encodings is None:
+                return cls
+            cls = cls._schema_of
+        typecodes, encodings = dict(typecodes or {}), dict(encodings or {})
+        specs = []
+        for key in keys:
+            typecode, encoding = typecodes.pop(key, None), encodings.pop(key,
+                                                                         None)
+            if typecode is not None and typecode not in tuple(array_typecodes):
+                raise ValueError('Invalid array typecode: {}'.format(typecode))
+            if encoding is not None and encoding not in _ENCODINGS:
+                raise ValueError('Invalid encoding: {}'.format(encoding))
+            if typecode is not None and encoding is not None:
+                raise ValueError('{} can not have both a typecode and an '
+                                 'encoding'.format(key))
+            specs.append(typecode or encoding)
+        if typecodes or encodings:
+            raise KeyError('Typecodes or encodings given for unknown keys: '
+                           '{}'.format(tuple(typecodes) + tuple(encodings)))
+        specs = tuple(specs)
+        try:
+            return cls._schemas[cls, keys, specs]
+        except KeyError:
+            pass
+
+        for key in keys:
+            # Keys become slots, and arguments of the generated append, so a
+            # leading underscore is fine unless the key would shadow one of
+            # our private attributes, be mangled like a private name or clash
+            # with append's own `_self` argument
+            if not key.isidentifier() or iskeyword(key) or \
+                    key.startswith('_') and (key.startswith('__') or
+                                             key == '_self' or
+                                             hasattr(cls, key)):
+                raise ValueError('Invalid ParallelArray key: {}'.format(key))
+        if len(set(keys)) != len(keys):
+            raise ValueError('Duplicate ParallelArray keys: {}'.format(keys))
+
+        source = dedent(r"""
+        def __init__(_self, *args, **kwargs):
+            {init}
+
+        def append(_self, {args}):
             '''Add the specified arguments to the underlying parallel lists.
             Actual signature will vary depending on usage
             '''
-            arg_list = [{args}]
-            for key, arg in zip(self._keys, arg_list):
-                getattr(self, key).append(arg)
-                    """).strip().format(args=', '.join(self._keys))
-        exec(append, self.__dict__)
-
-        # exec dumps a function into our dict which means it will expect `self`
-        # to be passed as an explicit arg. Since functions are "technically"
-        # descriptors, use the function's `__get__` method to bind it to our
-        # instance
-        self.append = self.append.__get__(self, self.__class__)
+            {append}
+
+        def __getitem__(_self, index):
+            '''Return the tuple of concurrent items stored at *index* across
+            each of our lists
+            '''
+            return ({getitem})
+        """).format(
+            args=', '.join(keys),
+            init='; '.join('_self.{} = {}'.format(k, _column_source(spec))
+                           for k, spec in zip(keys, specs)) or 'pass',
+            append='; '.join('_self.{0}.append({0})'.format(k)
+                             for k in keys) or 'pass',
+            getitem=''.join('_self.{}[index], '.format(k) for k in keys)
+        )
+        namespace = {cls.__name__: cls for cls in _ENCODINGS.values()}
+        namespace['array'] = array
+        exec(source, namespace)
+
+        attrs = {name: namespace[name]
+                 for name in ('__init__', 'append', '__getitem__')}
+        attrs.update(__slots__=keys, __module__=cls.__module__,
+                     __qualname__=cls.__qualname__, __doc__=cls.__doc__,
+                     _keys=keys, _schema_of=cls,
+                     typecodes={k: spec for k, spec in zip(keys, specs)
+                                if spec is not None and
+                                spec not in _ENCODINGS},
+                     encodings={k: spec for k, spec in zip(keys, specs)
+                                if spec in _ENCODINGS})
+        schema = type(cls.__name__, (cls,), attrs)
+        return cls._schemas.setdefault((cls, keys, specs), schema)
+
+    def __reduce__(self):
+        """Pickle this :class:`ParallelArray` by it's key names and columns,
+        since our generated schema class can't be pickled by reference
+        """
+        columns = [getattr(self, key) for key in self._keys]
+        return _rebuild_parallel_array, (self._schema_of, self._keys, columns,
+                                         self.typecodes, self.encodings)
+
+    @classmethod
+    def from_columns(cls, keys=(), typecodes=None, encodings=None, **columns):
+        """Create a new :class:`ParallelArray` from whole columns of data,
+        rather than from individual records. ie::
+
+        >>> arr = ParallelArray.from_columns(names=['John', 'Jane'],
+        ...                                  ages=[25, 23])
+        >>> arr[1]
+        ... ('Jane', 23)
+
+        :param keys: Explicitly declared key order. Defaults to the order in
+            which *columns* were provided
+        :param typecodes: An optional mapping of key names to :mod:`array`
+            typecodes
+        :param encodings: An optional mapping of key names to column encodings
+        :param columns: A mapping of key names to iterables of values
+        :return: A new :class:`ParallelArray` containing *columns*
+        """
+        new = cls(keys=tuple(keys) or tuple(columns), typecodes=typecodes,
+                  encodings=encodings)
+        new.extend_columns(**columns)
+        return new
+
+    @classmethod
+    def from_records(cls, records, *args, keys=(), typecodes=None,
+                     encodings=None):
+        """Create a new :class:`ParallelArray` from an iterable of record
+        :const:`tuple`s
+
+        :param records: An iterable of tuples, one per record
+        :param args: Arbitrary key names
+        :param keys: Explicitly declared key names. Can be mixed with args
+        :param typecodes: An optional mapping of key names to :mod:`array`
+            typecodes
+        :param encodings: An optional mapping of key names to column encodings
+        :return: A new :class:`ParallelArray` containing *records*
+        """
+        new = cls(*args, keys=keys, typecodes=typecodes, encodings=encodings)
+        new.extend(records)
+        return new
+
+    def group_by(self, *keys, presorted=False):
+        """Group the rows of this :class:`ParallelArray` by the values of
+        *keys*, to be aggregated with :meth:`agg`. ie::
+
+        >>> arr.group_by('host').agg(bytes='sum', latency='mean')
+
+        Groups are built column by column, hashing each row's key once. If
+        this :class:`ParallelArray` is already sorted on *keys* then pass
+        *presorted* to find groups as runs of equal keys instead, which avoids
+        hashing every row and aggregates each group from a slice of it's
+        columns.
+
+        :param keys: The key names to group by
+        :param presorted: :const:`True` if this :class:`ParallelArray` is
+            already sorted on *keys*
+        :return: A grouping with an `agg` method for aggregating each group
+        """
+        return _GroupBy(self, keys, presorted=presorted)
+
+    def filter(self, key, predicate):
+        """Return a new :class:`ParallelArray` of only the records whose value
+        for *key* satisfies *predicate*. Encoded columns are filtered without
+        decoding them: *predicate* is called once per distinct value of a
+        :class:`DictEncodedColumn` and once per run of a
+        :class:`RunLengthColumn`, rather than once per record
+
+        :param key: The key name whose values are tested
+        :param predicate: A function of one argument, which returns
+            :const:`True` for values whose records should be kept
+        :return: A new :class:`ParallelArray` with the same keys, typecodes
+            and encodings as this one
+        """
+        if key not in self._keys:
+            raise KeyError(key)
+        column = getattr(self, key)
+        if isinstance(column, (DictEncodedColumn, RunLengthColumn)):
+            indices = column.indices(predicate)
+        else:
+            indices = [index for index, value in enumerate(column)
+                       if predicate(value)]
+        return self.take(indices)
+
+    def take(self, indices):
+        """Return a new :class:`ParallelArray` of the records at each of
+        *indices*, gathered one column at a time
+
+        :param indices: An iterable of record indices
+        :return: A new :class:`ParallelArray` with the same keys, typecodes
+            and encodings as this one
+        """
+        indices = list(indices)
+        new = type(self)()
+        for key in self._keys:
+            setattr(new, key, _take_column(getattr(self, key),
+                                           self.typecodes.get(key), indices))
+        return new
+
+    def join(self, other, on, how='inner', presorted=False):
+        """Join this :class:`ParallelArray` with *other*, matching up rows
+        whose values for *on* are equal. By default this is a hash join,
+        which builds a hash table of the keys of the smaller side and probes
+        it with the keys of the other. If both sides are already sorted on
+        *on*, pass *presorted* to perform a merge join instead
+
+        :param other: The :class:`ParallelArray` to join with
+        :param on: The key name, or a tuple of key names, to join on. Must be
+            keys of both this :class:`ParallelArray` and *other*
+        :param how: 'inner' to only keep rows with a match in both sides, or
+            'left' to keep every row of this :class:`ParallelArray`, with
+            :const:`None` for the values of *other* when there's no match
+        :param presorted: :const:`True` if both sides are already sorted on
+            *on*
+        :return: A new :class:`ParallelArray` with all of our keys followed by
+            the keys of *other* that aren't in *on*. Rows are in the order of
+            this :class:`ParallelArray`. Each column keeps the typecode or
+            encoding it had in it's source, except that a typed column of
+            *other* falls back to a :const:`list` when a left join leaves it
+            with :const:`None` values
+        :raises: ValueError if *presorted* is given and either side isn't
+            sorted on *on*
+        """
+        on = (on,) if isinstance(on, str) else tuple(on)
+        if how not in ('inner', 'left'):
+            raise ValueError('Unsupported join type: {}'.format(how))
+        for key in on:
+            if key not in self._keys or key not in other._keys:
+                raise KeyError(key)
+        other_keys = tuple(key for key in other._keys if key not in on)
+        duplicates = set(self._keys).intersection(other_keys)
+        if duplicates:
+            raise ValueError('Both sides of the join have the keys '
+                             '{}'.format(tuple(duplicates)))
+
+        join = _merge_join if presorted else _hash_join
+        left_index, right_index = join(list(_key_rows(self, on)),
+                                       list(_key_rows(other, on)), how)
+
+        # Unmatched rows of a left join have no index into *other*, and None
+        # can't be stored in a typed array
+        unmatched = how == 'left' and None in right_index
+        typecodes, encodings = dict(self.typecodes), dict(self.encodings)
+        for key in other_keys:
+            if key in other.encodings:
+                encodings[key] = other.encodings[key]
+            elif key in other.typecodes and not unmatched:
+                typecodes[key] = other.typecodes[key]
+        new = ParallelArray(keys=self._keys + other_keys, typecodes=typecodes,
+                            encodings=encodings)
+        for key in self._keys:
+            setattr(new, key, _take_column(getattr(self, key),
+                                           self.typecodes.get(key), left_index))
+        for key in other_keys:
+            column = getattr(other, key)
+            if not unmatched:
+                column = _take_column(column, other.typecodes.get(key),
+                                      right_index)
+            else:
+                column = [None if index is None else column[index]
+                          for index in right_index]
+                if key in other.encodings:
+                    column = _ENCODINGS[other.encodings[key]](column)
+            setattr(new, key, column)
+        return new
 
     def __iter__(self):
         """Return a tuple generator, which concurrently iterates over all of
@@ -341,7 +998,7 @@ class ParallelArray(Iterable, Sized):
         """Generate a reversed tuple generator which will concurrently iterate
         over our internal lists backwards
         """
-        return zip(*[getattr(self, key).__reversed__() for key in self._keys])
+        return zip(*[reversed(getattr(self, key)) for key in self._keys])
 
     def __getitem__(self, index):
         """Return the tuple of concurrent items stored at *index* across each
@@ -386,8 +1043,43 @@ class ParallelArray(Iterable, Sized):
             :class:`ParallelArray`) that can be merged with this
             :class:`ParallelArray`
         """
-        for args in iterable:
-            self.append(*args)
+        if isinstance(iterable, ParallelArray):
+            if iterable._keys != self._keys:
+                raise ValueError('Can not extend ParallelArray with keys '
+                                 '{} with keys {}'.format(self._keys,
+                                                          iterable._keys))
+            columns = [getattr(iterable, key) for key in self._keys]
+        else:
+            records = list(iterable)
+            if not records:
+                return
+            if set(map(len, records)) != {len(self._keys)}:
+                raise TypeError('Every record must contain exactly {} '
+                                'values'.format(len(self._keys)))
+            columns = zip(*records)
+        self.extend_columns(**dict(zip(self._keys, columns)))
+
+    def extend_columns(self, **columns):
+        """Extend each of our internal arrays with a whole column of data at
+        once. This avoids any per-record overhead, each column is extended in
+        a single call
+
+        :param columns: A mapping of every one of our key names to an iterable
+            of values to add to that key's array. All columns must be the same
+            length
+        :raises: KeyError if *columns* doesn't provide exactly our keys
+        :raises: ValueError if the provided columns differ in length
+        """
+        if set(columns) != set(self._keys):
+            msg = 'Expected columns {}, got {}'.format(self._keys,
+                                                       tuple(columns))
+            raise KeyError(msg)
+        columns = {key: col if isinstance(col, Sized) else list(col)
+                   for key, col in columns.items()}
+        if len(set(map(len, columns.values()))) > 1:
+            raise ValueError('All columns must be the same length')
+        for key in self._keys:
+            getattr(self, key).extend(columns[key])
 
     def insert(self, index, p_object):
         """Insert *p_object* at *index* across each of our internal arrays
@@ -423,7 +1115,7 @@ class ParallelArray(Iterable, Sized):
 
         :return: A new :class:`ParallelArray` with all of the same data
         """
-        new = ParallelArray(*self._keys)
+        new = type(self)()
         for key in self._keys:
             setattr(new, key, getattr(self, key).copy())
         return new
@@ -507,6 +1199,779 @@ class ParallelArray(Iterable, Sized):
         """Return this :class:`ParallelArray` as a :const:`dict`"""
         return {k: getattr(self, k) for k in self._keys}
 
+    def _layout(self, keys):
+        """Lay out the columns for *keys* in the format written by
+        :meth:`ParallelArray.save`
+
+        :param keys: The key names of the columns to lay out
+        :return: A list of the buffers making up the format, in order
+        :raises: TypeError if a column holds values that can't be stored in a
+            typed buffer
+        """
+        entries, buffers, offset = [], [], 0
+        for key in keys:
+            kind, typecode, column_buffers = _encode_column(getattr(self, key))
+            entry = {'key': key, 'kind': kind, 'typecode': typecode,
+                     'buffers': []}
+            for buf in column_buffers:
+                nbytes = memoryview(buf).nbytes
+                entry['buffers'].append([offset, nbytes])
+                buffers.extend([buf, bytes(_aligned(nbytes) - nbytes)])
+                offset += _aligned(nbytes)
+            entries.append(entry)
+
+        header = json.dumps({'version': _FILE_VERSION,
+                             'byteorder': sys.byteorder,
+                             'length': len(self),
+                             'columns': entries}).encode('utf-8')
+        prefix = _FILE_MAGIC + struct.pack('<I', len(header)) + header
+        prefix += bytes(_aligned(len(prefix)) - len(prefix))
+        return [prefix] + buffers
+
+    @classmethod
+    def _from_buffer(cls, buf, copy=False, source='buffer'):
+        """Load a :class:`ParallelArray` from *buf*, which holds data in the
+        format written by :meth:`ParallelArray.save`
+
+        :param buf: A :const:`memoryview` to load from
+        :param copy: If :const:`True`, copy each column out of *buf* rather
+            than referencing it
+        :param source: A description of *buf* for error messages
+        :return: The loaded :class:`ParallelArray`
+        """
+        magic_size = len(_FILE_MAGIC)
+        if bytes(buf[:magic_size]) != _FILE_MAGIC:
+            raise ValueError('{} is not a ParallelArray file'.format(source))
+        size, = struct.unpack_from('<I', buf, magic_size)
+        start = magic_size + struct.calcsize('<I')
+        header = json.loads(bytes(buf[start:start + size]).decode('utf-8'))
+        if header['version'] != _FILE_VERSION:
+            raise ValueError('Unsupported ParallelArray file version: '
+                             '{}'.format(header['version']))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError('{} was written with {} endian byte order'.format(
+                source, header['byteorder']))
+        start = _aligned(start + size)
+
+        entries = header['columns']
+        new = cls(keys=[entry['key'] for entry in entries],
+                  typecodes={entry['key']: entry['typecode']
+                             for entry in entries if entry['typecode']})
+        for entry in entries:
+            views = [buf[start + offset:start + offset + nbytes]
+                     for offset, nbytes in entry['buffers']]
+            if entry['kind'] == 'array':
+                column = views[0].cast(entry['typecode'])
+                if copy:
+                    column = array(entry['typecode'], column.tobytes())
+            else:
+                column = _VarColumn(entry['kind'], views[0].cast('q'),
+                                    views[1])
+                if copy:
+                    column = list(column)
+            setattr(new, entry['key'], column)
+        return new
+
+    def save(self, path):
+        """Write this :class:`ParallelArray` to *path* in a columnar file
+        format which can later be loaded with :meth:`ParallelArray.open`. Each
+        column is written as one contiguous buffer after a small header, so a
+        saved file can be memory-mapped without decoding it. Typed columns
+        are written as-is, :const:`list` columns of :const:`int`s or
+        :const:`float`s are written as 64 bit typed buffers, and columns of
+        :const:`str` or :const:`bytes` are written as an offsets buffer plus a
+        data buffer.
+
+        :param path: The path of the file to write
+        :raises: TypeError if a column holds values that can't be stored in a
+            typed buffer
+        """
+        with open(path, 'wb') as f:
+            for buf in self._layout(self._keys):
+                f.write(buf)
+
+    @classmethod
+    def open(cls, path, mmap=True):
+        """Load a :class:`ParallelArray` previously written by
+        :meth:`ParallelArray.save`
+
+        :param path: The path of the file to load
+        :param mmap: If :const:`True` (the default), map the file into memory
+            rather than reading it. Typed columns become read-only
+            :const:`memoryview`s over the mapped file and :const:`str` or
+            :const:`bytes` columns are decoded lazily as they're read, so
+            nothing is copied and processes mapping the same file share it
+            through the page cache. The returned :class:`ParallelArray` can't
+            be modified. If :const:`False`, the file is read into ordinary
+            typed arrays and lists
+        :return: The loaded :class:`ParallelArray`
+        :raises: ValueError if *path* isn't a :class:`ParallelArray` file, or
+            was written on a platform with a different byte order
+        """
+        with open(path, 'rb') as f:
+            if mmap:
+                buf = memoryview(MemoryMap(f.fileno(), 0, access=ACCESS_READ))
+            else:
+                buf = memoryview(f.read())
+        return cls._from_buffer(buf, copy=not mmap, source=path)
+
+    def share(self, *keys):
+        """Copy this :class:`ParallelArray` into a new block of
+        :mod:`multiprocessing.shared_memory`, in the same format written by
+        :meth:`ParallelArray.save`. Other processes can attach to the block by
+        name with :meth:`SharedParallelArray.attach`, without the column data
+        being pickled or copied again
+
+        :param keys: The key names to share. Defaults to all of our keys
+        :return: A read-only :class:`SharedParallelArray` backed by the new
+            block, which must be closed and unlinked once no longer needed
+        :raises: RuntimeError if :mod:`multiprocessing.shared_memory` is not
+            available on this version of Python
+        """
+        _require_shared_memory()
+        for key in keys:
+            if key not in self._keys:
+                raise KeyError(key)
+        buffers = self._layout(keys or self._keys)
+        size = sum(memoryview(buf).nbytes for buf in buffers)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            offset = 0
+            for buf in buffers:
+                buf = memoryview(buf).cast('B')
+                memory.buf[offset:offset + buf.nbytes] = buf
+                offset += buf.nbytes
+            shared = SharedParallelArray._from_buffer(memory.buf,
+                                                      source=memory.name)
+        except BaseException:
+            memory.close()
+            memory.unlink()
+            raise
+        shared._memory, shared._owner = memory, True
+        return shared
+
+    def parallel_map(self, func, columns, workers=None):
+        """Call *func* with the values of *columns* for every record, spread
+        across a pool of *workers* processes. The records are split into one
+        contiguous range per worker, and each worker reads it's range straight
+        out of shared memory, so the column data is never pickled. If this
+        isn't already a :class:`SharedParallelArray`, *columns* are copied
+        into shared memory once for the duration of the call. ie::
+
+        >>> arr.parallel_map(score, ('latency', 'bytes'), workers=8)
+
+        :param func: A picklable function, called with one positional argument
+            per column
+        :param columns: The key name, or tuple of key names, whose values are
+            passed to *func*
+        :param workers: The number of worker processes. Defaults to the number
+            of CPUs
+        :return: A :const:`list` of the results of *func*, in record order
+        """
+        results = self._parallel(_map_range, (func,), columns, workers)
+        return list(chain.from_iterable(results))
+
+    def parallel_reduce(self, func, columns, initial, combine=operator.add,
+                        workers=None):
+        """Reduce the values of *columns* across a pool of *workers*
+        processes. Each worker reduces it's own contiguous range of records
+        with `func(result, *values)`, starting from *initial*, and the results
+        of each worker are then combined with *combine*. See
+        :meth:`parallel_map` for how records are shared with the workers
+
+        :param func: A picklable function of a running result and one
+            positional argument per column, returning the new result
+        :param columns: The key name, or tuple of key names, whose values are
+            passed to *func*
+        :param initial: The starting result for each worker's range. This
+            should be an identity value for *combine*
+        :param combine: A function of two results returning their combination.
+            Defaults to adding them
+        :param workers: The number of worker processes. Defaults to the number
+            of CPUs
+        :return: The combined result
+        """
+        results = self._parallel(_reduce_range, (func, initial), columns,
+                                 workers)
+        return reduce(combine, results, initial)
+
+    def _parallel(self, task, args, columns, workers):
+        """Run *task* over contiguous ranges of our records in a pool of
+        *workers* processes
+
+        :return: A list of the result of *task* for each range, in order
+        """
+        columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        workers = workers or os.cpu_count() or 1
+        bounds = sorted({len(self) * i // workers for i in range(workers + 1)})
+        if isinstance(self, SharedParallelArray):
+            shared = self
+        else:
+            shared = self.share(*columns)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(task, shared.name, columns, start,
+                                           stop, *args)
+                           for start, stop in zip(bounds, bounds[1:])]
+                return [future.result() for future in futures]
+        finally:
+            if shared is not self:
+                shared.close()
+                shared.unlink()
+
+
+class SharedParallelArray(ParallelArray):
+    """A read-only :class:`ParallelArray` whose columns live in a block of
+    :mod:`multiprocessing.shared_memory`, as created by
+    :meth:`ParallelArray.share`. Any process can attach to the same block by
+    it's :attr:`name`, and pickling a :class:`SharedParallelArray` only
+    pickles that name. ie::
+
+    >>> with arr.share() as shared:
+    ...     pool.submit(work, shared)  # work() sees the same columns
+    """
+    __slots__ = ('_memory', '_owner')
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing block of shared memory created by
+        :meth:`ParallelArray.share`
+
+        :param name: The :attr:`name` of the shared memory block
+        :return: A :class:`SharedParallelArray` backed by the block
+        :raises: RuntimeError if :mod:`multiprocessing.shared_memory` is not
+            available on this version of Python
+        """
+        _require_shared_memory()
+        memory = _attach_shared_memory(name)
+        try:
+            shared = cls._from_buffer(memory.buf, source=name)
+        except BaseException:
+            memory.close()
+            raise
+        shared._memory, shared._owner = memory, False
+        return shared
+
+    @property
+    def name(self):
+        """The name of our shared memory block"""
+        return self._memory.name
+
+    def close(self):
+        """Release our columns and detach from our shared memory block. This
+        :class:`SharedParallelArray` can't be used after it's been closed
+        """
+        for key in self._keys:
+            column = getattr(self, key)
+            if isinstance(column, _VarColumn):
+                column.offsets.release()
+                column.data.release()
+            elif isinstance(column, memoryview):
+                column.release()
+        self._memory.close()
+
+    def unlink(self):
+        """Free our shared memory block once every process has closed it"""
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close this :class:`SharedParallelArray`, and unlink it's shared
+        memory block if it was created by this process
+        """
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def __reduce__(self):
+        """Pickle this :class:`SharedParallelArray` by the name of it's shared
+        memory block rather than by it's columns
+        """
+        return SharedParallelArray.attach, (self.name,)
+
+
+class ChunkedParallelArray(Iterable, Sized):
+    """A :class:`ParallelArray` which stores it's records in fixed size
+    chunks, each of which is itself a :class:`ParallelArray`. Only a limited
+    number of chunks are kept in memory at once; the least recently used
+    chunks are spilled to temporary files and paged back in when they are
+    next read, which allows for tables larger than the available memory. ie::
+
+    >>> with ChunkedParallelArray('names', 'ages', chunk_size=1000) as arr:
+    ...     arr.extend(read_records())
+    ...     for chunk in arr.iter_chunks():
+    ...         process(chunk)
+    """
+
+    def __init__(self, *args, keys=(), typecodes=None, encodings=None,
+                 chunk_size=65536, max_chunks_in_memory=16, spill_dir=None):
+        """Create a new :class:`ChunkedParallelArray` instance
+
+        :param args: Arbitrary key names
+        :param keys: Explicitly declared key names. Can be mixed with args
+        :param typecodes: An optional mapping of key names to :mod:`array`
+            typecodes, see :class:`ParallelArray`
+        :param encodings: An optional mapping of key names to column
+            encodings, see :class:`ParallelArray`
+        :param chunk_size: The number of records stored in each chunk
+        :param max_chunks_in_memory: The memory budget, as the number of
+            chunks which may be held in memory at once
+        :param spill_dir: The directory to create temporary spill files in.
+            Defaults to the system's temporary directory
+        """
+        if chunk_size < 1 or max_chunks_in_memory < 1:
+            raise ValueError('chunk_size and max_chunks_in_memory must be at '
+                             'least 1')
+        self._keys = tuple(keys) + args
+        self._schema = type(ParallelArray(*self._keys, typecodes=typecodes,
+                                          encodings=encodings))
+        self.chunk_size = chunk_size
+        self.max_chunks_in_memory = max_chunks_in_memory
+        self.spill_dir = spill_dir
+        self._size = 0
+        self._chunks = []  # Resident chunks, or None for spilled chunks
+        self._files = {}   # Chunk index -> spill file path
+        self._dirty = set()
+        self._resident = OrderedDict()
+        self._tempdir = None
+        self._finalizer = None
+
+    def _new_chunk(self):
+        """Start a new, empty chunk at the end of this array"""
+        self._chunks.append(self._schema())
+        self._touch(len(self._chunks) - 1)
+
+    def _touch(self, index):
+        """Mark the chunk at *index* as the most recently used, and spill the
+        least recently used chunks until we're back within our memory budget
+        """
+        self._resident[index] = None
+        self._resident.move_to_end(index)
+        while len(self._resident) > self.max_chunks_in_memory:
+            self._spill(next(iter(self._resident)))
+
+    def _spill(self, index):
+        """Write the chunk at *index* to it's spill file, if it has changed
+        since it was last written, and drop it from memory
+        """
+        if index in self._dirty or index not in self._files:
+            if self._tempdir is None:
+                self._tempdir = tempfile.mkdtemp(prefix='structs-',
+                                                 dir=self.spill_dir)
+                self._finalizer = weakref.finalize(
+                    self, shutil.rmtree, self._tempdir, ignore_errors=True)
+            path = os.path.join(self._tempdir, '{}.chunk'.format(index))
+            with open(path, 'wb') as f:
+                pickle.dump(self._chunks[index], f, pickle.HIGHEST_PROTOCOL)
+            self._files[index] = path
+            self._dirty.discard(index)
+        self._chunks[index] = None
+        del self._resident[index]
+
+    def _chunk(self, index):
+        """Return the chunk at *index*, paging it in from disk if it was
+        spilled
+        """
+        chunk = self._chunks[index]
+        if chunk is None:
+            with open(self._files[index], 'rb') as f:
+                chunk = self._chunks[index] = pickle.load(f)
+        self._touch(index)
+        return chunk
+
+    def _tail(self):
+        """Return the chunk that new records should be written to, starting a
+        new chunk if the last one is full. Only call this when there's a
+        record to write, or we'll be left with an empty trailing chunk
+        """
+        index = len(self._chunks) - 1
+        if index < 0 or len(self._chunk(index)) >= self.chunk_size:
+            self._new_chunk()
+            index += 1
+        self._dirty.add(index)
+        return self._chunk(index)
+
+    def append(self, *args):
+        """Add a single record to the end of this array
+
+        :param args: One value per key
+        """
+        self._tail().append(*args)
+        self._size += 1
+
+    def extend(self, iterable):
+        """Extend this array with an *iterable* of :const:`tuple` records. The
+        records are consumed one chunk at a time, so *iterable* may be a
+        stream that's larger than memory
+
+        :param iterable: Any iterable of tuples
+        """
+        iterator = iter(iterable)
+        while True:
+            # Every chunk but the last is full, so this is the room left in
+            # the tail. Only ask for a tail once there are records for it, so
+            # that filling a chunk exactly doesn't start an empty one
+            space = self.chunk_size - self._size % self.chunk_size
+            records = list(islice(iterator, space))
+            if not records:
+                return
+            self._tail().extend(records)
+            self._size += len(records)
+
+    def iter_chunks(self):
+        """Iterate over each chunk of this array in order, paging them in from
+        disk as needed
+
+        :return: A generator of :class:`ParallelArray` chunks
+        """
+        for index in range(len(self._chunks)):
+            yield self._chunk(index)
+
+    def __iter__(self):
+        """Return a generator of record tuples, one chunk at a time"""
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def _locate(self, index):
+        """Convert a record *index* into a chunk index and an offset into that
+        chunk
+        """
+        if not isinstance(index, int):
+            raise TypeError('ChunkedParallelArray indices must be integers')
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('ChunkedParallelArray index out of range')
+        return divmod(index, self.chunk_size)
+
+    def __getitem__(self, index):
+        """Return the record stored at *index*"""
+        chunk, offset = self._locate(index)
+        return self._chunk(chunk)[offset]
+
+    def __setitem__(self, index, value):
+        """Overwrite the record stored at *index* with the :const:`tuple`
+        *value*
+        """
+        chunk, offset = self._locate(index)
+        self._chunk(chunk)[offset] = value
+        self._dirty.add(chunk)
+
+    def __len__(self):
+        """Return the number of records in this array"""
+        return self._size
+
+    @property
+    def spilled(self):
+        """The number of chunks which are currently spilled to disk"""
+        return len(self._chunks) - len(self._resident)
+
+    def close(self):
+        """Remove all of our records along with any spill files"""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._tempdir = self._finalizer = None
+        self._chunks, self._files, self._size = [], {}, 0
+        self._dirty.clear()
+        self._resident.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _take_column(column, typecode, indices):
+    """Gather the values of *column* at each of *indices* into a new column of
+    the same kind; an encoded column, a typed :class:`array.array` when
+    *typecode* is given, or otherwise a :const:`list`
+    """
+    if isinstance(column, (DictEncodedColumn, RunLengthColumn)):
+        return column.take(indices)
+    if typecode is not None:
+        return array(typecode, map(column.__getitem__, indices))
+    return list(map(column.__getitem__, indices))
+
+
+def _key_rows(parallel_array, keys):
+    """Return the key of each row in *parallel_array*, either the values from
+    it's only key column or a tuple of values from each of *keys*' columns
+    """
+    columns = [getattr(parallel_array, key) for key in keys]
+    if len(columns) == 1:
+        return columns[0]
+    return zip(*columns)
+
+
+def _hash_join(left, right, how):
+    """Pair up the indices of rows in *left* and *right* whose keys are equal,
+    by building a hash table of the smaller side and probing it with the
+    other. Left joins always build from *right*, so that unmatched rows in
+    *left* can be emitted as they're probed
+
+    :return: A list of left indices and a matching list of right indices
+    """
+    left_index, right_index = [], []
+    if how == 'inner' and len(left) < len(right):
+        table = {}
+        for index, key in enumerate(left):
+            table.setdefault(key, []).append(index)
+        for r, key in enumerate(right):
+            for l in table.get(key, ()):
+                left_index.append(l)
+                right_index.append(r)
+        # Restore the order of the rows in left, without disturbing the order
+        # of rows in right for each left row
+        order = sorted(range(len(left_index)), key=left_index.__getitem__)
+        return ([left_index[i] for i in order],
+                [right_index[i] for i in order])
+
+    table = {}
+    for index, key in enumerate(right):
+        table.setdefault(key, []).append(index)
+    for l, key in enumerate(left):
+        matches = table.get(key)
+        if matches:
+            left_index.extend([l] * len(matches))
+            right_index.extend(matches)
+        elif how == 'left':
+            left_index.append(l)
+            right_index.append(None)
+    return left_index, right_index
+
+
+def _merge_join(left, right, how):
+    """Pair up the indices of rows in *left* and *right* whose keys are equal
+    by walking both in step. Both *left* and *right* must be sorted
+
+    :return: A list of left indices and a matching list of right indices
+    :raises: ValueError if either *left* or *right* isn't sorted
+    """
+    for keys in (left, right):
+        if any(key < previous for previous, key in zip(keys, islice(keys, 1,
+                                                                    None))):
+            raise ValueError('Both sides of a presorted join must be sorted '
+                             'on the join keys')
+    left_index, right_index = [], []
+    l, r, left_size, right_size = 0, 0, len(left), len(right)
+    while l < left_size and r < right_size:
+        key = left[l]
+        if key < right[r]:
+            if how == 'left':
+                left_index.append(l)
+                right_index.append(None)
+            l += 1
+        elif right[r] < key:
+            r += 1
+        else:
+            end = r + 1
+            while end < right_size and right[end] == key:
+                end += 1
+            while l < left_size and left[l] == key:
+                left_index.extend([l] * (end - r))
+                right_index.extend(range(r, end))
+                l += 1
+            r = end
+    if how == 'left':
+        left_index.extend(range(l, left_size))
+        right_index.extend([None] * (left_size - l))
+    return left_index, right_index
+
+
+class _GroupBy:
+    """The rows of a :class:`ParallelArray` grouped by one or more of it's
+    keys, as returned by :meth:`ParallelArray.group_by`. Call :meth:`agg` to
+    aggregate each group into a new :class:`ParallelArray`
+    """
+
+    #: The aggregations supported by :meth:`agg`, applied to a group's values
+    aggregations = {
+        'sum': sum,
+        'min': min,
+        'max': max,
+        'count': len,
+        'mean': lambda values: sum(values) / len(values),
+    }
+
+    def __init__(self, parallel_array, keys, presorted=False):
+        """Create a new :class:`_GroupBy` instance
+
+        :param parallel_array: The :class:`ParallelArray` to group
+        :param keys: The key names to group *parallel_array* by
+        :param presorted: If :const:`True`, *parallel_array* is already
+            sorted on *keys*
+        """
+        if not keys:
+            raise ValueError('At least one key is required to group by')
+        for key in keys:
+            if key not in parallel_array._keys:
+                raise KeyError(key)
+        self.array, self.keys, self.presorted = parallel_array, keys, presorted
+
+    def _hash_groups(self):
+        """Group our rows with a single hash table lookup per row. Rows are
+        grouped by the codes of dictionary encoded key columns, and by run
+        when grouping on a single run-length encoded column
+
+        :return: A list of group keys and a function which gathers a column
+            into each group's values
+        """
+        columns = [getattr(self.array, key) for key in self.keys]
+        encoded = [isinstance(c, DictEncodedColumn) for c in columns]
+        groups = {}
+        if len(columns) == 1 and isinstance(columns[0], RunLengthColumn):
+            for value, start, end in columns[0].runs():
+                groups.setdefault(value, []).extend(range(start, end))
+        else:
+            raw = [c.codes if e else c for c, e in zip(columns, encoded)]
+            for index, key in enumerate(raw[0] if len(raw) == 1 else
+                                        zip(*raw)):
+                try:
+                    groups[key].append(index)
+                except KeyError:
+                    groups[key] = [index]
+        group_keys, rows = list(groups), list(groups.values())
+        if len(columns) == 1 and encoded[0]:
+            group_keys = list(map(columns[0].values.__getitem__, group_keys))
+        elif any(encoded):
+            group_keys = [tuple(c.values[k] if e else k
+                                for c, e, k in zip(columns, encoded, key))
+                          for key in group_keys]
+        return group_keys, lambda column: [list(map(column.__getitem__, row))
+                                           for row in rows]
+
+    def _sorted_groups(self):
+        """Group our rows by finding the boundaries between runs of equal keys,
+        without hashing every row
+
+        :return: A list of group keys and a function which slices a column
+            into each group's values
+        :raises: ValueError if our rows aren't sorted on our keys
+        """
+        group_keys, bounds = [], [0]
+        for key, run in groupby(_key_rows(self.array, self.keys)):
+            # Runs of equal keys are merged, so each key must be greater than
+            # the last; this also rules out repeated keys
+            if group_keys and not group_keys[-1] <= key:
+                raise ValueError('ParallelArray is not sorted on '
+                                 '{}'.format(self.keys))
+            group_keys.append(key)
+            bounds.append(bounds[-1] + sum(1 for _ in run))
+        spans = list(zip(bounds, bounds[1:]))
+        return group_keys, lambda column: [column[start:stop]
+                                           for start, stop in spans]
+
+    def agg(self, **aggregations):
+        """Aggregate each group into a single row of a new
+        :class:`ParallelArray`, ie::
+
+        >>> sales.group_by('region').agg(amount='sum',
+        ...                              orders=('amount', 'count'))
+
+        :param aggregations: A mapping of output key names to either the name
+            of an aggregation, which is applied to the column with the same
+            name, or a (column, aggregation) tuple. Supported aggregations are
+            'sum', 'min', 'max', 'count' and 'mean'
+        :return: A new :class:`ParallelArray` with our group keys followed by
+            each of *aggregations*
+        """
+        specs = {}
+        for name, spec in aggregations.items():
+            column, func = (name, spec) if isinstance(spec, str) else spec
+            if column not in self.array._keys:
+                raise KeyError(column)
+            if func not in self.aggregations:
+                raise ValueError('Unknown aggregation: {}'.format(func))
+            specs[name] = (column, self.aggregations[func])
+
+        if self.presorted:
+            group_keys, split = self._sorted_groups()
+        else:
+            group_keys, split = self._hash_groups()
+
+        columns = {}
+        if len(self.keys) == 1:
+            columns[self.keys[0]] = group_keys
+        else:
+            key_columns = list(zip(*group_keys)) or [()] * len(self.keys)
+            columns.update(zip(self.keys, map(list, key_columns)))
+
+        groups = {}
+        for name, (column, func) in specs.items():
+            if column not in groups:
+                groups[column] = split(getattr(self.array, column))
+            columns[name] = list(map(func, groups[column]))
+        return ParallelArray.from_columns(
+            keys=self.keys + tuple(aggregations), **columns)
+
+
+def _require_shared_memory():
+    """Raise a RuntimeError if :mod:`multiprocessing.shared_memory` isn't
+    available on this version of Python
+    """
+    if shared_memory is None:
+        raise RuntimeError('Shared memory requires Python 3.8 or newer')
+
+
+def _attach_shared_memory(name):
+    """Attach to the shared memory block *name* without taking ownership of
+    it, where supported
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block with our
+        # resource tracker. Worker processes share their parent's tracker, so
+        # that registration is a no-op for them
+        return shared_memory.SharedMemory(name=name)
+
+
+def _map_range(name, columns, start, stop, func):
+    """Worker task for :meth:`ParallelArray.parallel_map`, mapping *func*
+    over the records from *start* to *stop* of a :class:`SharedParallelArray`
+    """
+    shared = SharedParallelArray.attach(name)
+    try:
+        values = [getattr(shared, key)[start:stop] for key in columns]
+        results = list(map(func, *values))
+        for value in values:
+            if isinstance(value, memoryview):
+                value.release()
+        return results
+    finally:
+        shared.close()
+
+
+def _reduce_range(name, columns, start, stop, func, initial):
+    """Worker task for :meth:`ParallelArray.parallel_reduce`, reducing the
+    records from *start* to *stop* of a :class:`SharedParallelArray` with
+    *func*
+    """
+    shared = SharedParallelArray.attach(name)
+    try:
+        values = [getattr(shared, key)[start:stop] for key in columns]
+        result = initial
+        for record in zip(*values):
+            result = func(result, *record)
+        for value in values:
+            if isinstance(value, memoryview):
+                value.release()
+        return result
+    finally:
+        shared.close()
+
+
+def _rebuild_parallel_array(cls, keys, columns, typecodes=None,
+                            encodings=None):
+    """Unpickle a :class:`ParallelArray` created by *cls* with *keys*"""
+    new = cls(*keys, typecodes=typecodes, encodings=encodings)
+    for key, column in zip(keys, columns):
+        setattr(new, key, column)
+    return new
+
 
 class OrganizedList(SortedList):
     """https://en.wikipedia.org/wiki/Self-organizing_list"""
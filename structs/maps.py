@@ -2,7 +2,80 @@
 """An assorted collection of dict and map type data structures"""
 
 __author__ = 'Jon Nappi'
-__all__ = ['Dict', 'BiDirectionalMap', 'MultiMap']
+__all__ = ['Dict', 'BiDirectionalMap', 'MultiMap', 'FrozenMultiMap',
+           'ConcurrentDict', 'CacheDict', 'CacheStats', 'PersistentMap',
+           'TransientMap', 'MappedDict', 'FrozenDict', 'DictSnapshot',
+           'BiDirectionalSnapshot']
+
+import os
+import copy
+import time
+import zlib
+import struct
+import hashlib
+import weakref
+import operator
+import tempfile
+
+from array import array
+from collections import Counter, namedtuple, OrderedDict
+from collections.abc import Mapping, MutableMapping, Sequence, Set
+from functools import partial
+from heapq import heapify, heappop, heappush
+from itertools import accumulate, chain, count
+from mmap import mmap as MemoryMap, ACCESS_READ, ACCESS_WRITE
+from threading import Event, RLock, Thread
+
+#: Sentinel for missing keys, distinct from any stored value
+_MISSING = object()
+
+#: Guards every snapshot registry, and switching a :class:`Dict` in and out
+#: of its snapshot tracking subclass
+_SNAPSHOT_LOCK = RLock()
+
+
+def _count(counter, value):
+    """Adder for :class:`collections.Counter` containers"""
+    counter[value] += 1
+
+
+def _container_adder(container):
+    """Return the unbound method used to add a single value to an instance of
+    the *container* type
+
+    :param container: A container type, such as :const:`list` or :const:`set`
+    :raises: TypeError if *container* has no way of adding values
+    """
+    if issubclass(container, Counter):
+        return _count
+    for name in ('append', 'add'):
+        adder = getattr(container, name, None)
+        if adder is not None:
+            return adder
+    msg = '{} has no append or add method'.format(container.__name__)
+    raise TypeError(msg)
+
+
+def _pack_values(values):
+    """Pack *values* into the most compact flat sequence that holds them: a
+    read-only typed :const:`memoryview` if they're all :const:`int`s or all
+    :const:`float`s, otherwise a :const:`tuple`
+    """
+    types = set(map(type, values))
+    typecode = None
+    if types == {int}:
+        typecode = 'q'
+    elif types == {float}:
+        typecode = 'd'
+    if typecode is not None:
+        try:
+            packed = array(typecode, values).tobytes()
+        except OverflowError:
+            pass
+        else:
+            # Viewing immutable bytes keeps the slices read-only
+            return memoryview(packed).cast(typecode)
+    return tuple(values)
 
 
 class Dict(dict):
@@ -13,15 +86,379 @@ class Dict(dict):
     >>> d += {'c': 3, 'd': 4}
     >>> d
     ... {'a': 1, 'b': 2, 'c': 3, 'd': 4}
+
+    Keys which are already present are resolved with the :attr:`on_conflict`
+    strategy, see :meth:`merge`. It may be set per instance::
+
+    >>> d.on_conflict = 'sum'
+    >>> d += {'a': 10}
+    >>> d['a']
+    ... 11
+
+    :meth:`snapshot` returns a read-only, point in time view of the
+    :class:`Dict` in O(1); while any snapshots are alive, writes first save
+    the previous values of the keys they change into them
     """
+    #: The default conflict strategy used by :meth:`merge` and ``+=``
+    on_conflict = 'last'
+    _snapshots = None
+
+    def snapshot(self):
+        """Return a read-only :class:`DictSnapshot` of this :class:`Dict`'s
+        current contents, without copying them. Later writes to this
+        :class:`Dict` save the old value of each key they change into every
+        live snapshot before changing it, so readers of a snapshot never see
+        a partially applied update.
+
+        Writes are only intercepted while a snapshot is alive: taking the
+        first one switches this :class:`Dict` to a subclass of its type
+        which wraps the :const:`dict` write methods, and it switches back
+        once the last one is garbage collected. Snapshots may be taken and
+        released from any thread. See :meth:`ConcurrentDict.to_dict` for an
+        eager, mutable copy instead
+        """
+        snapshot = DictSnapshot(self)
+        ref = weakref.ref(snapshot,
+                          partial(_release_snapshot, weakref.ref(self)))
+        with _SNAPSHOT_LOCK:
+            # Replaced rather than changed in place, so that writers can
+            # iterate over whichever tuple they read without locking
+            if self._snapshots is None:
+                self._snapshots = (ref,)
+                self.__class__ = _snapshot_class(type(self))
+            else:
+                self._snapshots += (ref,)
+        return snapshot
+
+    def _release(self, ref):
+        """Stop tracking the collected snapshot behind the weak reference
+        *ref*, and stop intercepting writes if it was the last one
+        """
+        with _SNAPSHOT_LOCK:
+            if self._snapshots is None:
+                return
+            snapshots = tuple(live for live in self._snapshots
+                              if live is not ref)
+            if snapshots:
+                self._snapshots = snapshots
+            else:
+                del self._snapshots
+                self.__class__ = self._unhooked
+
+    def _preserve(self, key):
+        """Save the current value of *key* into every live snapshot which
+        hasn't already saved it, before it's changed
+
+        :return: Whether any snapshot saved it, meaning that the current
+            value was still shared with a snapshot
+        """
+        return _save(self._snapshots or (), self, key)
+
+    def _preserve_all(self, keys):
+        for key in keys:
+            self._preserve(key)
+
     def __iadd__(self, other):
         if not isinstance(other, dict):
             msg = 'Can not concatenate Dict and {}'.format(type(other))
             raise TypeError(msg)
-        for key, val in other.items():
-            self[key] = val
+        return self.merge(other)
+
+    def merge(self, *others, on_conflict=None):
+        """Merge every :const:`dict` in *others* into this :class:`Dict`, in
+        order. When a key is already present the values are resolved by
+        *on_conflict*, which is one of
+
+        * ``'last'``: the value merged in last wins
+        * ``'first'``: the value already present wins
+        * ``'sum'``: the values are added together with ``+``
+        * ``'list'``: the values are collected into a :const:`list`, which
+          values from later merges are appended to
+        * a callable taking the existing and new values and returning the
+          value to keep
+
+        ``'last'`` is carried out entirely with :meth:`dict.update`, and
+        ``'first'`` only inserts the keys which are missing, so folding many
+        :const:`dict` instances in with either stays linear.
+
+        :param others: The :const:`dict` instances to merge in
+        :param on_conflict: The conflict strategy, defaulting to
+            :attr:`on_conflict`
+        :return: This :class:`Dict`
+        :raises: ValueError if *on_conflict* is not a known strategy
+        """
+        strategy = self.on_conflict if on_conflict is None else on_conflict
+        if self._snapshots:
+            self._preserve_all(chain.from_iterable(others))
+        if strategy == 'last':
+            for other in others:
+                dict.update(self, other)
+        elif strategy == 'first':
+            setdefault = dict.setdefault
+            for other in others:
+                for key, value in other.items():
+                    setdefault(self, key, value)
+        elif strategy == 'list':
+            self._merge_lists(others)
+        else:
+            if strategy == 'sum':
+                strategy = operator.add
+            elif not callable(strategy):
+                msg = 'Unknown conflict strategy {!r}'.format(strategy)
+                raise ValueError(msg)
+            get, setitem = self.get, dict.__setitem__
+            for other in others:
+                for key, value in other.items():
+                    current = get(key, _MISSING)
+                    if current is not _MISSING:
+                        value = strategy(current, value)
+                    setitem(self, key, value)
         return self
 
+    def _merge_lists(self, others):
+        """Merge *others* in, collecting conflicting values into lists. Lists
+        already in this :class:`Dict` are copied before being appended to, so
+        that lists from *others* are never mutated
+        """
+        get, setitem = self.get, dict.__setitem__
+        owned = set()
+        for other in others:
+            for key, value in other.items():
+                current = get(key, _MISSING)
+                if current is _MISSING:
+                    setitem(self, key, value)
+                elif key in owned:
+                    current.append(value)
+                else:
+                    if isinstance(current, list):
+                        current = current + [value]
+                    else:
+                        current = [current, value]
+                    setitem(self, key, current)
+                    owned.add(key)
+
+
+def _save(snapshots, source, key):
+    """Save the current value of *key* in *source* into every live snapshot
+    of *source* referenced by the weak references in *snapshots* which
+    hasn't already saved it
+
+    :return: Whether any snapshot saved it
+    """
+    shared = False
+    for ref in snapshots:
+        snapshot = ref()
+        if snapshot is not None and snapshot._source is source and \
+                key not in snapshot._saved:
+            snapshot._saved[key] = dict.get(source, key, _MISSING)
+            shared = True
+    return shared
+
+
+def _forget_snapshot(snapshots, key, ref):
+    """Weak reference callback removing a collected snapshot from the
+    *snapshots* it was tracked in
+    """
+    with _SNAPSHOT_LOCK:
+        snapshots.pop(key, None)
+
+
+def _release_snapshot(owner, ref):
+    """Weak reference callback telling the owner of a collected snapshot to
+    stop tracking it
+    """
+    owner = owner()
+    if owner is not None:
+        owner._release(ref)
+
+
+class _SnapshotWrites(object):
+    """The :const:`dict` write methods of a :class:`Dict` with live
+    snapshots, which save the values they're about to change first. See
+    :func:`_snapshot_class`
+    """
+    __slots__ = ()
+
+    # Each write holds the snapshot lock, so that no snapshot can be taken
+    # between saving a key's value and changing it
+
+    def __setitem__(self, key, value):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve(key)
+            dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve(key)
+            dict.__delitem__(self, key)
+
+    def pop(self, k, *d):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve(k)
+            return dict.pop(self, k, *d)
+
+    def popitem(self):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots and self:
+                # Peek at the last key by popping and restoring it, since
+                # dicts only support reversed() from Python 3.8
+                key, value = dict.popitem(self)
+                dict.__setitem__(self, key, value)
+                self._preserve(key)
+            return dict.popitem(self)
+
+    def setdefault(self, k, d=None):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve(k)
+            return dict.setdefault(self, k, d)
+
+    def update(self, *args, **kwargs):
+        other = dict(*args, **kwargs)
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve_all(other)
+            dict.update(self, other)
+
+    def __ior__(self, other):
+        other = dict(other)
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve_all(other)
+            return dict.__ior__(self, other)
+
+    def clear(self):
+        with _SNAPSHOT_LOCK:
+            if self._snapshots:
+                self._preserve_all(list(self))
+            dict.clear(self)
+
+    def __reduce_ex__(self, protocol):
+        """Copy and pickle as the original type, without our snapshots"""
+        state = {name: value for name, value in self.__dict__.items()
+                 if name != '_snapshots'}
+        return _restore, (self._unhooked, dict(self), state)
+
+
+def _restore(cls, items, state):
+    """Rebuild an instance of the :class:`Dict` type *cls* holding *items*,
+    with the attributes in *state*, without calling its initializer
+    """
+    new = cls.__new__(cls)
+    dict.update(new, items)
+    new.__dict__.update(state)
+    return new
+
+
+#: The snapshot tracking subclass generated for each :class:`Dict` type
+_SNAPSHOT_CLASSES = {}
+
+
+def _snapshot_class(cls):
+    """Return the subclass of *cls* used while an instance has snapshots. It
+    wraps each write method which *cls* still inherits from :const:`dict`,
+    leaving those *cls* overrides to track snapshots themselves
+
+    :param cls: A :class:`Dict` subclass
+    """
+    hooked = _SNAPSHOT_CLASSES.get(cls)
+    if hooked is None:
+        namespace = {'__slots__': (), '__module__': cls.__module__,
+                     '__qualname__': cls.__qualname__, '_unhooked': cls,
+                     '__reduce_ex__': _SnapshotWrites.__reduce_ex__}
+        for name in ('__setitem__', '__delitem__', 'pop', 'popitem',
+                     'setdefault', 'update', 'clear', '__ior__'):
+            inherited = getattr(dict, name, None)
+            if inherited is not None and getattr(cls, name) is inherited:
+                namespace[name] = getattr(_SnapshotWrites, name)
+        hooked = _SNAPSHOT_CLASSES[cls] = type(cls.__name__, (cls,),
+                                                namespace)
+    return hooked
+
+
+class DictSnapshot(Mapping):
+    """A read-only, point in time view of a :class:`Dict`, returned by
+    :meth:`Dict.snapshot`. Keys which haven't changed since the snapshot was
+    taken are read straight from the :class:`Dict`, and the rest from the
+    old values it saved into the snapshot before changing them
+    """
+    __slots__ = ('_source', '_saved', '__weakref__')
+
+    def __init__(self, source):
+        self._source = source
+        self._saved = {}
+
+    def __getitem__(self, key):
+        # Reading the live value before checking for a saved one is safe
+        # against a concurrent writer, which always saves before writing
+        value = dict.get(self._source, key, _MISSING)
+        value = self._saved.get(key, value)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        keys = list(dict.keys(self._source))
+        saved = self._saved.copy()
+        for key in keys:
+            if saved.get(key) is not _MISSING:
+                yield key
+        live = set(keys)
+        for key, value in saved.items():
+            if value is not _MISSING and key not in live:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        items = ', '.join('{!r}: {!r}'.format(key, value)
+                          for key, value in self.items())
+        return '{}({{{}}})'.format(type(self).__name__, items)
+
+
+class BiDirectionalSnapshot(Mapping):
+    """A read-only, point in time view of a :class:`BiDirectionalMap`,
+    returned by :meth:`BiDirectionalMap.snapshot`. Like the map, items may be
+    looked up by either their key or their value
+    """
+    __slots__ = ('_forward', '_inverse')
+
+    def __init__(self, forward, inverse):
+        self._forward = DictSnapshot(forward)
+        self._inverse = DictSnapshot(inverse)
+
+    @property
+    def inverse(self):
+        """A :class:`BiDirectionalSnapshot` of the value to key direction"""
+        view = self.__class__.__new__(self.__class__)
+        view._forward, view._inverse = self._inverse, self._forward
+        return view
+
+    def __getitem__(self, key):
+        try:
+            return self._forward[key]
+        except KeyError:
+            pass
+        try:
+            return self._inverse[key]
+        except KeyError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._forward)
+
+    def __len__(self):
+        return len(self._forward)
+
+    def __repr__(self):
+        items = ', '.join('{!r}: {!r}'.format(key, self._forward[key])
+                          for key in self._forward)
+        return '{}({{{}}})'.format(type(self).__name__, items)
+
 
 class BiDirectionalMap(Dict):
     """a bidirectional map, or hash bag, is an associative data structure in
@@ -30,23 +467,208 @@ class BiDirectionalMap(Dict):
     key to key. A pair (a, b) thus provides a unique coupling between a and b
     so that b can be found when a is used as a key and a can be found when b is
     used as a key.
+
+    Pairs are stored in a forward :const:`dict` of keys to values and an
+    inverse :const:`dict` of values to keys, so lookups in either direction
+    are O(1).
     """
-    def __init__(self, iterable=None, **kwargs):
+    def __init__(self, iterable=None, *, overwrite=False, **kwargs):
         """Create a new instance of a :class:`bidirectionaldict`
 
         :param iterable: An iterable of 2-tuples
+        :param overwrite: How to handle assigning a value which is already
+            mapped to a different key. If :const:`False` (the default) a
+            :const:`ValueError` is raised, otherwise the existing pair is
+            replaced
         :param kwargs: Explitily specified key value pairs for this
             :class:`bidirectionaldict`
         """
         super(BiDirectionalMap, self).__init__()
-        self.__keys = []
-        self.__vals = []
-        if iterable:
-            self.__keys = [k for (k, v) in iterable]
-            self.__vals = [v for (k, v) in iterable]
-        for key, val in kwargs.items():
-            self.__keys.append(key)
-            self.__vals.append(val)
+        self._forward, self._inverse = {}, {}
+        # Shared with our inverse views, which write to the same dicts
+        self._snapshots = {}
+        self.overwrite = overwrite
+        self.update(iterable, **kwargs)
+
+    @classmethod
+    def from_pairs(cls, iterable, overwrite=False):
+        """Create a new :class:`bidirectionaldict` from an iterable of
+        (key, value) 2-tuples, which is only iterated over once. See
+        :meth:`update`
+
+        :param iterable: An iterable of 2-tuples, such as a generator
+        :param overwrite: Whether conflicting pairs replace earlier ones, see
+            :class:`BiDirectionalMap`
+        :return: The new :class:`bidirectionaldict`
+        """
+        new = cls(overwrite=overwrite)
+        new.update(iterable)
+        return new
+
+    def update(self, other=None, **kwargs):
+        """Add every (key, value) pair from *other* and *kwargs* to this
+        :class:`bidirectionaldict`, in the key to value direction. Unless we're
+        set to overwrite, the pairs are checked for one-to-one violations all
+        at once, against each other and against our existing pairs, before
+        any of them are added; if there are any, a single ValueError
+        describing every conflict is raised and nothing is changed.
+        Otherwise both directions are built with one :const:`dict` update
+        each. As with :meth:`__setitem__`, a key which is currently one of
+        our values is re-keyed to the new value instead
+
+        :param other: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param kwargs: Arbitrary key value pairs to add
+        :raises: ValueError if any pairs conflict
+        """
+        if other is None:
+            pairs = []
+        elif hasattr(other, 'keys'):
+            pairs = list(other.items())
+        else:
+            pairs = list(other)
+        pairs.extend(kwargs.items())
+
+        if self.overwrite:
+            for key, value in pairs:
+                self[key] = value
+            return
+
+        rekeyed = set()
+        if self._inverse:
+            for i, (key, value) in enumerate(pairs):
+                if key not in self._forward and key in self._inverse:
+                    pairs[i] = (value, key)
+                    rekeyed.add(key)
+
+        forward = dict(pairs)
+        inverse = {value: key for key, value in forward.items()}
+        conflicts = []
+        if len(forward) != len(pairs):
+            seen = {}
+            for key, value in pairs:
+                if seen.setdefault(key, value) != value:
+                    conflicts.append('{!r} is mapped to both {!r} and '
+                                     '{!r}'.format(key, seen[key], value))
+        if len(inverse) != len(forward):
+            for key, value in forward.items():
+                if inverse[value] != key:
+                    conflicts.append('{!r} is mapped to both {!r} and '
+                                     '{!r}'.format(value, inverse[value], key))
+        for value, key in inverse.items():
+            if value in rekeyed:
+                # The value keeps its place and is given a new key, which
+                # mustn't already be mapped elsewhere
+                current = self._forward.get(key, _MISSING)
+                if current is not _MISSING and current != value:
+                    conflicts.append('{!r} is already mapped to '
+                                     '{!r}'.format(key, current))
+                continue
+            owner = self._inverse.get(value, _MISSING)
+            if owner is not _MISSING and owner != key and \
+                    owner not in forward:
+                conflicts.append('{!r} is already mapped to '
+                                 '{!r}'.format(value, owner))
+        if conflicts:
+            raise ValueError('Conflicting pairs: ' + '; '.join(conflicts))
+
+        if self._snapshots:
+            self._preserve_in(self._forward, chain(
+                forward, (self._inverse.get(value, _MISSING)
+                          for value in rekeyed)))
+            self._preserve_in(self._inverse, chain(
+                inverse, (self._forward.get(key, _MISSING)
+                          for key in forward)))
+        for key in forward:
+            old_value = self._forward.get(key, _MISSING)
+            if old_value is not _MISSING:
+                del self._inverse[old_value]
+        for value in rekeyed:
+            owner = self._inverse.pop(value, _MISSING)
+            if owner is not _MISSING and owner != inverse[value]:
+                del self._forward[owner]
+        self._forward.update(forward)
+        self._inverse.update(inverse)
+
+    def snapshot(self):
+        """Return a read-only :class:`BiDirectionalSnapshot` of this
+        :class:`bidirectionaldict`'s current pairs, made up of a
+        :class:`DictSnapshot` of each direction, without copying them. Later
+        writes save the old pairs they change into every live snapshot first
+        """
+        snapshot = BiDirectionalSnapshot(self._forward, self._inverse)
+        with _SNAPSHOT_LOCK:
+            for view in (snapshot._forward, snapshot._inverse):
+                key = id(view)
+                self._snapshots[key] = weakref.ref(
+                    view, partial(_forget_snapshot, self._snapshots, key))
+        return snapshot
+
+    def _preserve_in(self, source, keys):
+        """Save the current values of *keys* in *source*, which is one of our
+        two directions, into every live snapshot of it
+        """
+        with _SNAPSHOT_LOCK:
+            snapshots = tuple(self._snapshots.values())
+        for key in keys:
+            if key is not _MISSING:
+                _save(snapshots, source, key)
+
+    def merge(self, *others, on_conflict=None):
+        """Merge every :const:`dict` in *others* into this
+        :class:`bidirectionaldict`. The values of the keys they touch are
+        resolved as in :meth:`Dict.merge`, and the results are then added
+        with :meth:`update`, so nothing is merged if that would break the
+        one-to-one correspondence
+
+        :param others: The :const:`dict` instances to merge in
+        :param on_conflict: The conflict strategy, see :meth:`Dict.merge`
+        :return: This :class:`bidirectionaldict`
+        :raises: ValueError if any resolved pairs conflict
+        """
+        forward = self._forward
+        touched = Dict((key, forward[key]) for other in others
+                       for key in other if key in forward)
+        touched.merge(*others, on_conflict=(self.on_conflict
+                                            if on_conflict is None
+                                            else on_conflict))
+        self.update(touched)
+        return self
+
+    @property
+    def inverse(self):
+        """A :class:`BiDirectionalMap` view of the value to key direction of
+        this :class:`BiDirectionalMap`. The view shares our underlying
+        storage, so changes made through either are reflected in both
+        """
+        view = self.__class__.__new__(self.__class__)
+        view._forward, view._inverse = self._inverse, self._forward
+        view._snapshots = self._snapshots
+        view.overwrite = self.overwrite
+        return view
+
+    def _put(self, forward, inverse, key, value):
+        """Map *key* to *value* in *forward*, and *value* to *key* in
+        *inverse*, removing any pairs the new pair replaces
+
+        :raises: ValueError if *value* is already mapped to a different key
+            and we're not set to overwrite it
+        """
+        old_key = inverse.get(value, _MISSING)
+        replaced = old_key is not _MISSING and old_key != key
+        if replaced and not self.overwrite:
+            msg = '{!r} is already mapped to {!r}'.format(value, old_key)
+            raise ValueError(msg)
+        old_value = forward.get(key, _MISSING)
+        if self._snapshots:
+            self._preserve_in(forward, (key, old_key))
+            self._preserve_in(inverse, (value, old_value))
+        if replaced:
+            del forward[old_key]
+        if old_value is not _MISSING:
+            del inverse[old_value]
+        forward[key] = value
+        inverse[value] = key
 
     def __contains__(self, item):
         """Contains method determines if *item* is in this
@@ -56,7 +678,7 @@ class BiDirectionalMap(Dict):
         :return: :const:`True` if *item* is in this :class:`bidirectionaldict`,
             :const:`False` otherwise
         """
-        return item in self.__keys or item in self.__vals
+        return item in self._forward or item in self._inverse
 
     def get(self, k, d=None):
         """Return self[k] if k is in this :class:`bidirectionaldict`, otherwise
@@ -74,70 +696,196 @@ class BiDirectionalMap(Dict):
             return d
 
     def __setitem__(self, key, value):
-        """Set self[key] to value."""
-        try:
-            index = self.__keys.index(key)
-            self.__vals[index] = value
-        except ValueError:
-            try:
-                index = self.__vals.index(key)
-                self.__keys[index] = value
-            except ValueError:
-                self.__keys.append(key)
-                self.__vals.append(value)
+        """Set self[key] to value. If *key* is already a value in this
+        :class:`bidirectionaldict` then it's key is replaced by *value*
+        instead
+        """
+        if key not in self._forward and key in self._inverse:
+            self._put(self._inverse, self._forward, key, value)
+        else:
+            self._put(self._forward, self._inverse, key, value)
 
     def __getitem__(self, y):
         """x.__getitem__(y) <==> x[y]"""
         try:
-            index = self.__keys.index(y)
-            return self.__vals[index]
-        except ValueError:
-            try:
-                index = self.__vals.index(y)
-                return self.__keys[index]
-            except ValueError:
-                raise KeyError(y)
+            return self._forward[y]
+        except KeyError:
+            pass
+        try:
+            return self._inverse[y]
+        except KeyError:
+            raise KeyError(y)
+
+    def __delitem__(self, key):
+        """Remove the pair containing *key*, as either a key or a value"""
+        if key in self._forward:
+            forward, inverse = self._forward, self._inverse
+        elif key in self._inverse:
+            forward, inverse = self._inverse, self._forward
+        else:
+            raise KeyError(key)
+        if self._snapshots:
+            self._preserve_in(forward, (key,))
+            self._preserve_in(inverse, (forward[key],))
+        del inverse[forward.pop(key)]
+
+    def pop(self, k, *d):
+        """Remove the pair containing *k* and return the other half of it. If
+        *k* isn't found, return *d* if given, otherwise raise KeyError
+        """
+        try:
+            value = self[k]
+        except KeyError:
+            if d:
+                return d[0]
+            raise
+        del self[k]
+        return value
+
+    def setdefault(self, k, d=None):
+        """Return self[k] if *k* is in this :class:`bidirectionaldict`,
+        otherwise map *k* to *d* and return *d*
+        """
+        try:
+            return self[k]
+        except KeyError:
+            self[k] = d
+            return d
+
+    def popitem(self):
+        """Remove and return the most recently added (key, value) pair"""
+        key, value = self._forward.popitem()
+        if self._snapshots:
+            # Restore the pair while saving it, since dicts only support
+            # reversed() to peek at the last key from Python 3.8
+            self._forward[key] = value
+            self._preserve_in(self._forward, (key,))
+            self._preserve_in(self._inverse, (value,))
+            del self._forward[key]
+        del self._inverse[value]
+        return key, value
+
+    def clear(self):
+        """Remove all pairs from this :class:`bidirectionaldict`"""
+        if self._snapshots:
+            self._preserve_in(self._forward, list(self._forward))
+            self._preserve_in(self._inverse, list(self._inverse))
+        self._forward.clear()
+        self._inverse.clear()
+
+    def __getstate__(self):
+        """Copy and pickle without our snapshots"""
+        state = self.__dict__.copy()
+        state['_snapshots'] = {}
+        return state
+
+    def copy(self):
+        """Return a shallow copy of this :class:`bidirectionaldict`"""
+        return self.__class__(self._forward.items(), overwrite=self.overwrite)
 
     def __str__(self):
         """Overriden str representation that iterates through all keys and
         values contained in this :class:`bidirectionaldict`
         """
-        if len(self.__keys) == 0:
-            return '{}'
-        output = '{'
-        fmt = '{}: {}, '
-        for key, val in zip(self.__keys, self.__vals):
-            output += fmt.format(repr(key), repr(val))
-        return output[:-2] + '}'
+        return repr(self._forward)
     __repr__ = __str__
 
+    def __eq__(self, other):
+        """Compare our key to value pairs to those of *other*"""
+        if isinstance(other, BiDirectionalMap):
+            return self._forward == other._forward
+        return self._forward == other
+
+    def __ne__(self, other):
+        """Return the opposite of __eq__"""
+        return not self.__eq__(other)
+
+    def __iter__(self):
+        """Iterate over the keys in this :class:`BiDirectionalDict`"""
+        return iter(self._forward)
+
     def __len__(self):
-        """__keys and __values will always be the same length, so return the
-        length of __keys to be somewhat consistent with the default
-        :const:`dict`'s __len__ method
+        """Return the number of (key, value) pairs in this
+        :class:`BiDirectionalDict`
         """
-        return len(self.__keys)
+        return len(self._forward)
 
     def keys(self):
-        """Return a generator of the keys in this :class:`BiDirectionalDict`"""
-        return (key for key in self.__keys)
+        """Return a view of the keys in this :class:`BiDirectionalDict`"""
+        return self._forward.keys()
 
     def values(self):
-        """Return a generator of the values in this :class:`BiDirectionalDict`
-        """
-        return (value for value in self.__vals)
+        """Return a view of the values in this :class:`BiDirectionalDict`"""
+        return self._forward.values()
 
     def items(self):
-        """Return a 2-tuple of the (key, value) pairs in this
+        """Return a view of the (key, value) pairs in this
         :class:`BiDirectionalDict`
         """
-        return ((key, value) for (key, value) in zip(self.__keys, self.__vals))
+        return self._forward.items()
 
 
 class MultiMap(Dict):
     """A :class:`MultiMap` is a generalization of a :const:`dict` type in which
-    more than one value may be associated with and returned for a given key
+    more than one value may be associated with and returned for a given key.
+
+    By default the first value for a key is stored as is, and switches to a
+    :const:`list` once a second value is added. If a *container* type is
+    given, such as :const:`list`, :const:`set`, :class:`collections.deque`,
+    :class:`structs.arrays.SortedList` or :class:`collections.Counter`, then
+    every key's values are always stored in an instance of that type, and
+    values are added with a single hash lookup.
+
+    If *index* is set, a reverse index from each (hashable) value to the set
+    of keys it's stored under is kept up to date, see :meth:`keys_for` and
+    :meth:`remove_value`.
+
+    :meth:`snapshot` views cover each key's values too: while a snapshot
+    still shares a key's container, it is copied before being changed. Its
+    writes aren't atomic, so one which is already running when another
+    thread takes a snapshot may still be seen by that snapshot
     """
+    container = None
+    _reverse = None
+
+    def __init__(self, iterable=None, *, container=None, index=False,
+                 **kwargs):
+        """Create a new :class:`MultiMap`
+
+        :param iterable: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param container: The container type to store each key's values in.
+            Defaults to the scalar-then-list behaviour
+        :param index: Whether to maintain a reverse index of values to keys
+        :param kwargs: Arbitrary key value pairs to add
+        """
+        if container is None and not index:
+            args = () if iterable is None else (iterable,)
+            super(MultiMap, self).__init__(*args, **kwargs)
+        else:
+            super(MultiMap, self).__init__()
+            if container is not None:
+                self.container = container
+                self._add = _container_adder(container)
+            if index:
+                self._reverse = {}
+            self.update(iterable, **kwargs)
+
+    @classmethod
+    def group_by(cls, iterable, key, container=list, index=False):
+        """Build a :class:`MultiMap` in a single pass over *iterable*, which
+        maps ``key(item)`` to the container of the items which produced it
+
+        :param iterable: The items to group
+        :param key: A function computing the group key of an item
+        :param container: The container type to group items in
+        :param index: Whether to maintain a reverse index of items to keys
+        :return: The new :class:`MultiMap`
+        """
+        new = cls(container=container, index=index)
+        new._extend((key(item), item) for item in iterable)
+        return new
+
     def update(self, other=None, **kwargs):
         """Update this :class:`MultiMap` with either the
 
@@ -147,35 +895,158 @@ class MultiMap(Dict):
             :class:`MultiMap`
         """
         if other is not None and hasattr(other, 'keys'):
-            for key in other:
-                self[key] = other[key]
-        elif other is not None and hasattr(other, '__iter__'):
-            for key, val in other:
-                self[key] = val
+            other = other.items()
+        elif other is None:
+            other = ()
+        if self.container is not None:
+            self._extend(other)
+            self._extend(kwargs.items())
+            return
+        for key, val in other:
+            self[key] = val
         for key, val in kwargs.items():
             self[key] = val
 
-    def setdefault(self, k, d=None):
+    def _extend(self, pairs):
+        """Add each (key, value) pair in *pairs* to this container-mode
+        :class:`MultiMap`, with the lookups hoisted out of the loop
+        """
+        add, get, container = self._add, self.get, self.container
+        setitem = dict.__setitem__
+        reverse = self._reverse
+        for key, value in pairs:
+            if reverse is not None:
+                hash(value)  # Fail before anything is written
+            if self._snapshots:
+                self._own_bucket(key)
+            bucket = get(key)
+            if bucket is None:
+                bucket = container()
+                setitem(self, key, bucket)
+            add(bucket, value)
+            if reverse is not None:
+                keys = reverse.get(value)
+                if keys is None:
+                    reverse[value] = keys = set()
+                keys.add(key)
+
+    def keys_for(self, value):
+        """Return a read-only :class:`collections.abc.Set` view of the keys
+        *value* is currently stored under, without copying them. Requires
+        *index* to have been set
+
+        :param value: The value to look up
+        :raises: TypeError if this :class:`MultiMap` isn't indexed
+        """
+        if self._reverse is None:
+            raise TypeError('MultiMap was not created with index=True')
+        return _SetView(self._reverse.get(value, frozenset()))
+
+    def remove_value(self, value):
+        """Remove every occurrence of *value* from every key it's stored
+        under, dropping any keys left without values. Requires *index* to
+        have been set
+
+        :param value: The value to remove
+        :return: The number of keys *value* was removed from
+        :raises: TypeError if this :class:`MultiMap` isn't indexed
+        """
+        if self._reverse is None:
+            raise TypeError('MultiMap was not created with index=True')
+        keys = self._reverse.pop(value, ())
+        for key in keys:
+            if self._snapshots:
+                self._own_bucket(key)
+            bucket = dict.__getitem__(self, key)
+            if isinstance(bucket, set):
+                bucket.discard(value)
+            elif isinstance(bucket, Counter):
+                del bucket[value]
+            elif self.container is None and not isinstance(bucket, list):
+                bucket = ()
+            else:
+                while value in bucket:
+                    bucket.remove(value)
+            if not bucket:
+                dict.__delitem__(self, key)
+        return len(keys)
+
+    def _own_bucket(self, key):
+        """Before the values at *key* are changed in place, replace their
+        container with a copy if it's still shared with a snapshot
+        """
+        if self._preserve(key):
+            bucket = dict.get(self, key, _MISSING)
+            if bucket is not _MISSING and (self.container is not None or
+                                           isinstance(bucket, list)):
+                dict.__setitem__(self, key, copy.copy(bucket))
+
+    def _bucket_values(self, bucket):
+        """Return an iterable of the values stored in *bucket*"""
+        if self.container is None and not isinstance(bucket, list):
+            return (bucket,)
+        return bucket
+
+    def _unindex(self, key, bucket):
+        """Remove *key* from the reverse index entries of *bucket*'s values"""
+        for value in self._bucket_values(bucket):
+            keys = self._reverse.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._reverse[value]
+
+    def freeze(self):
+        """Return an immutable, compacted copy of this :class:`MultiMap`. See
+        :class:`FrozenMultiMap`
+        """
+        return FrozenMultiMap(self)
+
+    def setdefault(self, k, d=_MISSING):
         """If *k* is not contained in this :class:`MultiMap` then store the
-        value *d* in it.
+        value *d* in it. With a *container* type, an empty container is
+        stored, and *d* is only added to it when given
 
         :param k: The key to set the value for
-        :param d: The default value to assign to key *k*
+        :param d: The default value to assign to key *k*. Defaults to
+            :const:`None` when there's no *container* type
         :return: The value stored at key *k*
         """
         if k not in self:
-            self[k] = d
+            if self.container is None:
+                self[k] = None if d is _MISSING else d
+            elif d is _MISSING:
+                if self._snapshots:
+                    self._preserve(k)
+                dict.__setitem__(self, k, self.container())
+            else:
+                self[k] = d
         return self[k]
 
     def _append_key(self, key, value):
         """Handle either adding the *key*, *value* pair to the :const:`dict` or
         appending *value* to the list stored at *key*
         """
-        if isinstance(self[key], list):
+        if self._snapshots:
+            self._own_bucket(key)
+        if self.container is not None:
+            self._add(self[key], value)
+        elif isinstance(self[key], list):
             self[key].append(value)
         else:
             super(MultiMap, self).__setitem__(key, [self.get(key), value])
 
+    def merge(self, *others):
+        """Merge every :const:`dict` in *others* into this :class:`MultiMap`.
+        Every value is kept, so there are no conflicts to resolve
+
+        :param others: The :const:`dict` instances to merge in
+        :return: This :class:`MultiMap`
+        """
+        for other in others:
+            self.update(other)
+        return self
+
     def __iadd__(self, other):
         """Overriden __iadd__ functionality that will append values from
         *other* if any of the keys match
@@ -186,20 +1057,1582 @@ class MultiMap(Dict):
         if not isinstance(other, dict):
             msg = 'Can not concatenate Dict and {}'.format(type(other))
             raise TypeError(msg)
-        for key, val in other.items():
-            if key in self:
-                self._append_key(key, val)
-            else:
-                self[key] = val
-        return self
+        return self.merge(other)
 
     def __setitem__(self, key, value):
         """If *key* is in this :class:`MultiMap` then
 
         :param key: The key to assign *value* to
         :param value: The *value* to assign to *key*
+        :raises: TypeError if this :class:`MultiMap` is indexed and *value*
+            isn't hashable. Nothing is stored
         """
-        if key in self:
-            self._append_key(key, value)
+        if self._reverse is not None:
+            hash(value)  # Fail before anything is written
+        if self._snapshots:
+            self._own_bucket(key)
+        if self.container is not None:
+            bucket = self.get(key)
+            if bucket is None:
+                bucket = self.container()
+                dict.__setitem__(self, key, bucket)
+            self._add(bucket, value)
         else:
-            super(MultiMap, self).__setitem__(key, value)
+            bucket = dict.get(self, key, _MISSING)
+            if bucket is _MISSING:
+                dict.__setitem__(self, key, value)
+            elif isinstance(bucket, list):
+                bucket.append(value)
+            else:
+                dict.__setitem__(self, key, [bucket, value])
+        if self._reverse is not None:
+            self._reverse.setdefault(value, set()).add(key)
+
+    def __delitem__(self, key):
+        if self._snapshots:
+            self._preserve(key)
+        bucket = super(MultiMap, self).pop(key)
+        if self._reverse is not None:
+            self._unindex(key, bucket)
+
+    def pop(self, k, *d):
+        """Remove key *k* and return all of its values. If *k* isn't found, *d*
+        is returned if given, otherwise KeyError is raised
+        """
+        if self._snapshots:
+            self._preserve(k)
+        if self._reverse is None or k not in self:
+            return super(MultiMap, self).pop(k, *d)
+        bucket = super(MultiMap, self).pop(k)
+        self._unindex(k, bucket)
+        return bucket
+
+    def popitem(self):
+        key, bucket = super(MultiMap, self).popitem()
+        if self._snapshots:
+            # Restore the pair while saving it, since dicts only support
+            # reversed() to peek at the last key from Python 3.8
+            dict.__setitem__(self, key, bucket)
+            self._preserve(key)
+            dict.__delitem__(self, key)
+        if self._reverse is not None:
+            self._unindex(key, bucket)
+        return key, bucket
+
+    def clear(self):
+        if self._snapshots:
+            self._preserve_all(list(self))
+        super(MultiMap, self).clear()
+        if self._reverse is not None:
+            self._reverse.clear()
+
+
+class _SetView(Set):
+    """A read-only view of a :const:`set`"""
+    __slots__ = ('_set',)
+
+    def __init__(self, wrapped):
+        self._set = wrapped
+
+    def __contains__(self, item):
+        return item in self._set
+
+    def __iter__(self):
+        return iter(self._set)
+
+    def __len__(self):
+        return len(self._set)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._set)
+
+
+class FrozenMultiMap(Mapping):
+    """An immutable :class:`MultiMap`, stored in a compressed sparse row
+    layout: a single hash from each key to its row, an array of row offsets,
+    and one flat array holding every value. When the values are all
+    :const:`int` or all :const:`float` the flat array is a typed
+    :class:`array.array` and lookups return zero-copy :const:`memoryview`
+    slices of it, otherwise they return :const:`tuple` slices
+    """
+    __slots__ = ('_index', '_offsets', '_values')
+
+    def __init__(self, multimap=None):
+        """Create a new :class:`FrozenMultiMap`
+
+        :param multimap: The :class:`MultiMap`, or any other :const:`dict` of
+            values or containers of values, to freeze
+        """
+        if multimap is None:
+            multimap = {}
+        container = getattr(multimap, 'container', None)
+        rows = []
+        for bucket in multimap.values():
+            if isinstance(bucket, Counter):
+                rows.append(list(bucket.elements()))
+            elif container is not None or isinstance(bucket, list):
+                rows.append(list(bucket))
+            else:
+                rows.append([bucket])
+        self._index = {key: i for i, key in enumerate(multimap)}
+        self._offsets = array('q', [0])
+        self._offsets.extend(accumulate(len(row) for row in rows))
+        self._values = _pack_values(list(chain.from_iterable(rows)))
+
+    @property
+    def typecode(self):
+        """The :mod:`array` typecode the values are stored with, or
+        :const:`None` if they're stored in a :const:`tuple`
+        """
+        if isinstance(self._values, memoryview):
+            return self._values.format
+        return None
+
+    def __getitem__(self, key):
+        row = self._index[key]
+        return self._values[self._offsets[row]:self._offsets[row + 1]]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        items = ', '.join('{!r}: {!r}'.format(key, list(self[key]))
+                          for key in self)
+        return '{}({{{}}})'.format(type(self).__name__, items)
+
+
+class ConcurrentDict(MutableMapping):
+    """A thread-safe :class:`Dict` which spreads its keys across several
+    internal shards, each guarded by its own lock, so that threads working
+    on different keys rarely contend. Each single-key operation, including
+    :meth:`setdefault`, :meth:`pop`, :meth:`update_if` and :meth:`compute`,
+    is atomic. Iteration and :meth:`to_dict` see a consistent copy taken
+    while holding every lock
+    """
+    #: The default conflict strategy used by :meth:`merge` and ``+=``
+    on_conflict = 'last'
+
+    def __init__(self, iterable=None, *, shards=16, **kwargs):
+        """Create a new :class:`ConcurrentDict`
+
+        :param iterable: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param shards: The number of internal shards, and locks, to use
+        :param kwargs: Arbitrary key value pairs to add
+        """
+        if shards < 1:
+            raise ValueError('A ConcurrentDict needs at least one shard')
+        self._shards = tuple(Dict() for _ in range(shards))
+        self._locks = tuple(RLock() for _ in range(shards))
+        if iterable is not None:
+            self.update(iterable)
+        self.update(kwargs)
+
+    def _shard(self, key):
+        """Return the shard *key* belongs in, along with its lock"""
+        index = hash(key) % len(self._shards)
+        return self._shards[index], self._locks[index]
+
+    def _acquire_all(self):
+        """Acquire every shard lock, always in the same order"""
+        for lock in self._locks:
+            lock.acquire()
+
+    def _release_all(self):
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def __getitem__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            return shard[key]
+
+    def get(self, key, default=None):
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.get(key, default)
+
+    def __setitem__(self, key, value):
+        shard, lock = self._shard(key)
+        with lock:
+            shard[key] = value
+
+    def __delitem__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            del shard[key]
+
+    def __contains__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            return key in shard
+
+    def setdefault(self, key, default=None):
+        """Atomically store *default* at *key*, if *key* isn't present
+
+        :return: The value stored at *key*
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.setdefault(key, default)
+
+    def pop(self, key, *default):
+        """Atomically remove *key* and return its value. If *key* isn't found,
+        *default* is returned if given, otherwise KeyError is raised
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.pop(key, *default)
+
+    def update_if(self, key, value, predicate, default=None):
+        """Atomically store *value* at *key* if ``predicate(current)`` is
+        true, where *current* is the value at *key*, or *default* if there
+        isn't one
+
+        :param key: The key to update
+        :param value: The new value
+        :param predicate: A function of the current value
+        :param default: The current value to use when *key* is missing
+        :return: Whether *value* was stored
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            if not predicate(shard.get(key, default)):
+                return False
+            shard[key] = value
+            return True
+
+    def compute(self, key, fn, default=None):
+        """Atomically replace the value at *key* with ``fn(current)``, where
+        *current* is the value at *key*, or *default* if there isn't one.
+        ie::
+
+        >>> counters.compute('hits', lambda n: n + 1, default=0)
+
+        :param key: The key to update
+        :param fn: A function of the current value returning the new value
+        :param default: The current value to use when *key* is missing
+        :return: The new value
+        """
+        shard, lock = self._shard(key)
+        with lock:
+            value = shard[key] = fn(shard.get(key, default))
+            return value
+
+    def merge(self, *others, on_conflict=None):
+        """Merge every :const:`dict` in *others* into this
+        :class:`ConcurrentDict`, resolving conflicts as in
+        :meth:`Dict.merge`. The items are first split by shard, and each
+        shard is then merged under its lock, so the merge is atomic per shard
+        rather than as a whole
+
+        :param others: The :const:`dict` instances to merge in
+        :param on_conflict: The conflict strategy, defaulting to
+            :attr:`on_conflict`
+        :return: This :class:`ConcurrentDict`
+        """
+        strategy = self.on_conflict if on_conflict is None else on_conflict
+        count = len(self._shards)
+        parts = [[{} for _ in others] for _ in range(count)]
+        for position, other in enumerate(others):
+            for key, value in other.items():
+                parts[hash(key) % count][position][key] = value
+        for shard, lock, part in zip(self._shards, self._locks, parts):
+            part = [items for items in part if items]
+            if part:
+                with lock:
+                    shard.merge(*part, on_conflict=strategy)
+        return self
+
+    def __iadd__(self, other):
+        if not isinstance(other, dict):
+            msg = 'Can not concatenate ConcurrentDict and {}'.format(
+                type(other))
+            raise TypeError(msg)
+        return self.merge(other)
+
+    def to_dict(self):
+        """Return a consistent copy of this :class:`ConcurrentDict`'s items as
+        a new, mutable :class:`Dict`, taken while holding every shard lock.
+        Unlike :meth:`Dict.snapshot`, which is copy-on-write, every item is
+        copied up front
+        """
+        copied = Dict()
+        self._acquire_all()
+        try:
+            for shard in self._shards:
+                dict.update(copied, shard)
+        finally:
+            self._release_all()
+        return copied
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        self._acquire_all()
+        try:
+            return sum(len(shard) for shard in self._shards)
+        finally:
+            self._release_all()
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def clear(self):
+        self._acquire_all()
+        try:
+            for shard in self._shards:
+                shard.clear()
+        finally:
+            self._release_all()
+
+    def copy(self):
+        return type(self)(self.to_dict(), shards=len(self._shards))
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self.to_dict()))
+
+
+#: A point in time summary of a :class:`CacheDict`'s activity
+CacheStats = namedtuple('CacheStats', 'hits misses evictions expirations')
+
+
+def _sweep(cache_ref, interval, stopped):
+    """Background thread body, periodically expiring entries from the
+    :class:`CacheDict` referred to by the weakref *cache_ref* until it is
+    closed or garbage collected
+    """
+    while not stopped.wait(interval):
+        cache = cache_ref()
+        if cache is None:
+            return
+        cache.expire()
+        del cache
+
+
+class CacheDict(MutableMapping):
+    """A bounded :class:`Dict` for caching. Entries may expire after a time
+    to live, set for the whole cache or per entry with :meth:`set`, and the
+    cache may be limited to a maximum number of entries, a maximum total
+    weight, or both; once over budget the least recently used entries are
+    evicted.
+
+    Expired entries are removed lazily, when they're looked up, by
+    :meth:`expire` or ``len()``, or by an optional background thread every
+    *sweep_interval* seconds. Until then they still count towards the
+    budgets, but are skipped by iteration and comparisons. Only lookups by
+    key count as uses of an entry; hits, misses, evictions and expirations
+    are counted in :attr:`stats`
+    """
+    def __init__(self, iterable=None, *, maxsize=None, maxweight=None,
+                 weigher=None, ttl=None, clock=time.monotonic,
+                 sweep_interval=None, **kwargs):
+        """Create a new :class:`CacheDict`
+
+        :param iterable: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param maxsize: The maximum number of entries to hold
+        :param maxweight: The maximum total weight of the entries to hold
+        :param weigher: A function returning the weight of a value. Defaults
+            to every value weighing 1
+        :param ttl: The default number of seconds entries live for, or
+            :const:`None` for entries to never expire
+        :param clock: A function returning the current time in seconds
+        :param sweep_interval: If given, the number of seconds between
+            background sweeps of expired entries
+        :param kwargs: Arbitrary key value pairs to add
+        """
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._expiries = []
+        self._sequence = count()
+        self._weight = 0
+        self._lock = RLock()
+        self._hits = self._misses = self._evictions = self._expirations = 0
+        self._stopped = None
+        if iterable is not None:
+            self.update(iterable)
+        self.update(kwargs)
+        if sweep_interval is not None:
+            self._stopped = Event()
+            Thread(target=_sweep, args=(weakref.ref(self), sweep_interval,
+                                        self._stopped),
+                   daemon=True).start()
+
+    @property
+    def stats(self):
+        """A :class:`CacheStats` of this cache's activity so far"""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions,
+                              self._expirations)
+
+    @property
+    def weight(self):
+        """The total weight of the entries in this cache"""
+        return self._weight
+
+    def set(self, key, value, ttl=_MISSING):
+        """Store *value* at *key*, making it the most recently used entry and
+        evicting least recently used entries while over budget
+
+        :param key: The key to store *value* at
+        :param value: The value to store
+        :param ttl: The number of seconds this entry lives for, overriding
+            :attr:`ttl`. :const:`None` means it never expires
+        :raises: ValueError if *value* alone weighs more than *maxweight*
+        """
+        if ttl is _MISSING:
+            ttl = self.ttl
+        weight = 1 if self.weigher is None else self.weigher(value)
+        if self.maxweight is not None and weight > self.maxweight:
+            msg = 'Value weighs {}, more than the maxweight of {}'.format(
+                weight, self.maxweight)
+            raise ValueError(msg)
+        with self._lock:
+            expires = None
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._weight -= old[2]
+            if ttl is not None:
+                expires = self.clock() + ttl
+                if old is None or old[1] != expires:
+                    heappush(self._expiries,
+                             (expires, next(self._sequence), key))
+            self._data[key] = (value, expires, weight)
+            self._weight += weight
+            self._evict()
+            if len(self._expiries) > 2 * len(self._data):
+                self._compact()
+
+    def _compact(self):
+        """Rebuild the expiry heap from the live entries, dropping the stale
+        items left behind by replaced, evicted and deleted entries. Only done
+        once stale items outnumber the entries, so it's amortized O(1)
+        """
+        sequence = self._sequence
+        self._expiries = [(expires, next(sequence), key)
+                          for key, (_, expires, _) in self._data.items()
+                          if expires is not None]
+        heapify(self._expiries)
+
+    def _evict(self):
+        """Evict least recently used entries until within budget"""
+        data = self._data
+        while (self.maxsize is not None and len(data) > self.maxsize) or \
+                (self.maxweight is not None and
+                 self._weight > self.maxweight):
+            _, (_, _, weight) = data.popitem(last=False)
+            self._weight -= weight
+            self._evictions += 1
+
+    def _remove(self, key):
+        """Remove *key*, returning its entry"""
+        entry = self._data.pop(key)
+        self._weight -= entry[2]
+        return entry
+
+    def expire(self):
+        """Remove every expired entry. Only entries which have a time to live
+        are looked at
+
+        :return: The number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            now = self.clock()
+            expiries, data = self._expiries, self._data
+            while expiries and expiries[0][0] <= now:
+                expires, _, key = heappop(expiries)
+                entry = data.get(key)
+                # Entries which were since replaced leave stale heap items
+                if entry is not None and entry[1] == expires:
+                    self._remove(key)
+                    removed += 1
+            self._expirations += removed
+        return removed
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                raise KeyError(key)
+            if entry[1] is not None and entry[1] <= self.clock():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __contains__(self, key):
+        """Whether *key* holds an unexpired value. This does not count as a
+        use of the entry, nor towards :attr:`stats`
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[1] is None or
+                                          entry[1] > self.clock())
+
+    def _live(self):
+        """Return a list of our unexpired (key, value) pairs, from least to
+        most recently used, without counting as a use of any of them
+        """
+        with self._lock:
+            now = self.clock()
+            return [(key, value)
+                    for key, (value, expires, _) in self._data.items()
+                    if expires is None or expires > now]
+
+    def __iter__(self):
+        return iter([key for key, _ in self._live()])
+
+    def __len__(self):
+        """Return the number of unexpired entries, removing any expired ones
+        first so that this agrees with iterating over this cache
+        """
+        with self._lock:
+            self.expire()
+            return len(self._data)
+
+    def keys(self):
+        return OrderedDict(self._live()).keys()
+
+    def values(self):
+        return OrderedDict(self._live()).values()
+
+    def items(self):
+        return OrderedDict(self._live()).items()
+
+    def __eq__(self, other):
+        """Compare our unexpired entries to those of *other*"""
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self._live()) == dict(other.items())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._expiries = []
+            self._weight = 0
+
+    def close(self):
+        """Stop the background sweep thread, if there is one"""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        items = ', '.join('{!r}: {!r}'.format(key, value)
+                          for key, value in self._live())
+        return '{}({{{}}})'.format(type(self).__name__, items)
+
+
+#: Hashes are masked to 64 bits, consumed 5 bits per trie level
+_HASH_MASK = (1 << 64) - 1
+
+
+def _popcount(n):
+    return bin(n).count('1')
+
+
+def _same_key(entry_key, key):
+    return entry_key is key or entry_key == key
+
+
+class _BitmapNode(object):
+    """A HAMT node with up to 32 slots, only the occupied ones of which are
+    stored, in *slots*, as flagged by the bits of *bitmap*. Each slot holds
+    either a (hash, key, value) leaf tuple or a child node. Nodes are only
+    ever modified in place by the :class:`TransientMap` whose *owner* token
+    they carry
+    """
+    __slots__ = ('bitmap', 'slots', 'owner')
+
+    def __init__(self, bitmap, slots, owner):
+        self.bitmap = bitmap
+        self.slots = slots
+        self.owner = owner
+
+    def _editable(self, owner):
+        if owner is not None and self.owner is owner:
+            return self
+        return _BitmapNode(self.bitmap, list(self.slots), owner)
+
+    def assoc(self, shift, h, key, value, owner):
+        """Return this node with *key* set to *value*, along with whether
+        *key* is new
+        """
+        bit = 1 << ((h >> shift) & 31)
+        index = _popcount(self.bitmap & (bit - 1))
+        if not self.bitmap & bit:
+            node = self._editable(owner)
+            node.slots.insert(index, (h, key, value))
+            node.bitmap |= bit
+            return node, True
+        entry = self.slots[index]
+        if type(entry) is tuple:
+            if entry[0] == h and _same_key(entry[1], key):
+                if entry[2] is value:
+                    return self, False
+                new, added = (h, key, value), False
+            elif entry[0] == h:
+                new = _CollisionNode(h, [entry[1:], (key, value)], owner)
+                added = True
+            else:
+                new = _pair_node(shift + 5, entry, (h, key, value), owner)
+                added = True
+        else:
+            new, added = entry.assoc(shift + 5, h, key, value, owner)
+            if new is entry:
+                return self, added
+        node = self._editable(owner)
+        node.slots[index] = new
+        return node, added
+
+    def without(self, shift, h, key, owner):
+        """Return this node without *key*: :const:`None` if it would be left
+        empty, a lone leaf tuple if it can be folded into its parent, or
+        :data:`_MISSING` if *key* isn't here
+        """
+        bit = 1 << ((h >> shift) & 31)
+        if not self.bitmap & bit:
+            return _MISSING
+        index = _popcount(self.bitmap & (bit - 1))
+        entry = self.slots[index]
+        if type(entry) is tuple:
+            if entry[0] != h or not _same_key(entry[1], key):
+                return _MISSING
+            new = None
+        else:
+            new = entry.without(shift + 5, h, key, owner)
+            if new is _MISSING or new is entry:
+                return new if new is _MISSING else self
+        if new is None:
+            if len(self.slots) == 1:
+                return None
+            if len(self.slots) == 2 and shift:
+                other = self.slots[1 - index]
+                if type(other) is tuple:
+                    return other
+            node = self._editable(owner)
+            del node.slots[index]
+            node.bitmap ^= bit
+            return node
+        if type(new) is tuple and len(self.slots) == 1 and shift:
+            return new
+        node = self._editable(owner)
+        node.slots[index] = new
+        return node
+
+
+class _CollisionNode(object):
+    """A HAMT node holding the (key, value) *pairs* of keys whose full hashes
+    are all *hash*
+    """
+    __slots__ = ('hash', 'pairs', 'owner')
+
+    def __init__(self, h, pairs, owner):
+        self.hash = h
+        self.pairs = pairs
+        self.owner = owner
+
+    def _editable(self, owner):
+        if owner is not None and self.owner is owner:
+            return self
+        return _CollisionNode(self.hash, list(self.pairs), owner)
+
+    def assoc(self, shift, h, key, value, owner):
+        if h != self.hash:
+            node = _BitmapNode(1 << ((self.hash >> shift) & 31), [self], owner)
+            return node.assoc(shift, h, key, value, owner)
+        for index, (k, v) in enumerate(self.pairs):
+            if _same_key(k, key):
+                if v is value:
+                    return self, False
+                node = self._editable(owner)
+                node.pairs[index] = (key, value)
+                return node, False
+        node = self._editable(owner)
+        node.pairs.append((key, value))
+        return node, True
+
+    def without(self, shift, h, key, owner):
+        if h != self.hash:
+            return _MISSING
+        for index, (k, _) in enumerate(self.pairs):
+            if _same_key(k, key):
+                break
+        else:
+            return _MISSING
+        if len(self.pairs) == 2:
+            other = self.pairs[1 - index]
+            return (self.hash, other[0], other[1])
+        node = self._editable(owner)
+        del node.pairs[index]
+        return node
+
+
+def _pair_node(shift, leaf, other, owner):
+    """Return a new node holding the two leaves with differing hashes"""
+    index, other_index = (leaf[0] >> shift) & 31, (other[0] >> shift) & 31
+    if index == other_index:
+        return _BitmapNode(1 << index,
+                           [_pair_node(shift + 5, leaf, other, owner)], owner)
+    slots = [leaf, other] if index < other_index else [other, leaf]
+    return _BitmapNode((1 << index) | (1 << other_index), slots, owner)
+
+
+_EMPTY_NODE = _BitmapNode(0, [], None)
+
+
+def _trie_find(root, key, default):
+    """Return the value stored at *key* in the trie at *root*, else
+    *default*
+    """
+    h = hash(key) & _HASH_MASK
+    node, shift = root, 0
+    while True:
+        if type(node) is _CollisionNode:
+            if node.hash == h:
+                for k, v in node.pairs:
+                    if _same_key(k, key):
+                        return v
+            return default
+        bit = 1 << ((h >> shift) & 31)
+        if not node.bitmap & bit:
+            return default
+        entry = node.slots[_popcount(node.bitmap & (bit - 1))]
+        if type(entry) is tuple:
+            if entry[0] == h and _same_key(entry[1], key):
+                return entry[2]
+            return default
+        node, shift = entry, shift + 5
+
+
+def _trie_items(root):
+    """Generate every (key, value) pair in the trie at *root*"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if type(node) is _CollisionNode:
+            for pair in node.pairs:
+                yield pair
+            continue
+        for entry in node.slots:
+            if type(entry) is tuple:
+                yield entry[1], entry[2]
+            else:
+                stack.append(entry)
+
+
+class PersistentMap(Mapping):
+    """An immutable map, stored as a hash array mapped trie. :meth:`set` and
+    :meth:`delete` return a new version of the map in O(log32 n), which
+    shares every unchanged node with the old version, so keeping old
+    versions around as snapshots is cheap. For bulk changes, use a
+    :meth:`transient` copy
+    """
+    __slots__ = ('_root', '_count')
+
+    def __init__(self, iterable=None, **kwargs):
+        """Create a new :class:`PersistentMap`
+
+        :param iterable: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param kwargs: Arbitrary key value pairs to add
+        """
+        transient = TransientMap()
+        transient.update(() if iterable is None else iterable, **kwargs)
+        self._root, self._count = transient._root, transient._count
+
+    @classmethod
+    def _make(cls, root, count):
+        new = object.__new__(cls)
+        new._root, new._count = root, count
+        return new
+
+    def set(self, key, value):
+        """Return a new :class:`PersistentMap` with *value* stored at *key*"""
+        root, added = self._root.assoc(0, hash(key) & _HASH_MASK, key, value,
+                                       None)
+        if root is self._root:
+            return self
+        return self._make(root, self._count + added)
+
+    def delete(self, key):
+        """Return a new :class:`PersistentMap` without *key*
+
+        :raises: KeyError if *key* isn't present
+        """
+        root = self._root.without(0, hash(key) & _HASH_MASK, key, None)
+        if root is _MISSING:
+            raise KeyError(key)
+        return self._make(_EMPTY_NODE if root is None else root,
+                          self._count - 1)
+
+    def update(self, other=None, **kwargs):
+        """Return a new :class:`PersistentMap` with the pairs from *other*
+        and *kwargs* added, built through a :class:`TransientMap`
+        """
+        transient = self.transient()
+        transient.update(() if other is None else other, **kwargs)
+        return transient.persistent()
+
+    def transient(self):
+        """Return a mutable :class:`TransientMap` with the same contents as
+        this map, which it shares structure with
+        """
+        return TransientMap._from_trie(self._root, self._count)
+
+    def get(self, key, default=None):
+        return _trie_find(self._root, key, default)
+
+    def __getitem__(self, key):
+        value = _trie_find(self._root, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return _trie_find(self._root, key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return (key for key, _ in _trie_items(self._root))
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        items = ', '.join('{!r}: {!r}'.format(key, value)
+                          for key, value in _trie_items(self._root))
+        return '{}({{{}}})'.format(type(self).__name__, items)
+
+
+class TransientMap(MutableMapping):
+    """A mutable builder for a :class:`PersistentMap`. Nodes it creates are
+    tagged with its owner token and edited in place, while nodes shared with
+    persistent maps are copied on first write. :meth:`persistent` hands its
+    contents over as a :class:`PersistentMap` in O(1)
+    """
+    __slots__ = ('_root', '_count', '_owner')
+
+    def __init__(self, iterable=None, **kwargs):
+        self._root, self._count, self._owner = _EMPTY_NODE, 0, object()
+        self.update(() if iterable is None else iterable, **kwargs)
+
+    @classmethod
+    def _from_trie(cls, root, count):
+        new = object.__new__(cls)
+        new._root, new._count, new._owner = root, count, object()
+        return new
+
+    def persistent(self):
+        """Return a :class:`PersistentMap` of this map's current contents.
+        This map takes a new owner token, so that further changes to it
+        copy rather than modify the nodes the persistent map now uses
+        """
+        self._owner = object()
+        return PersistentMap._make(self._root, self._count)
+
+    def __getitem__(self, key):
+        value = _trie_find(self._root, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return _trie_find(self._root, key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        self._root, added = self._root.assoc(0, hash(key) & _HASH_MASK, key,
+                                             value, self._owner)
+        self._count += added
+
+    def __delitem__(self, key):
+        root = self._root.without(0, hash(key) & _HASH_MASK, key,
+                                  self._owner)
+        if root is _MISSING:
+            raise KeyError(key)
+        self._root = _EMPTY_NODE if root is None else root
+        self._count -= 1
+
+    def __iter__(self):
+        return (key for key, _ in _trie_items(self._root))
+
+    def __len__(self):
+        return self._count
+
+
+#: Leading bytes of every file written by :class:`MappedDict`
+_MAPPED_MAGIC = b'STRUCTMD'
+
+#: The version of the :class:`MappedDict` file format
+_MAPPED_VERSION = 1
+
+#: File header: magic, version, key kind, value kind, capacity, count and
+#: the end of the overflow area, padded out to :data:`_MAPPED_HEADER_SIZE`
+_MAPPED_HEADER = struct.Struct('<8sIBBxxQQQ')
+_MAPPED_HEADER_SIZE = 64
+
+#: Hash table slot: stable hash (0 when empty), key word, value word, and the
+#: key and value lengths of variable length kinds, whose words hold offsets
+_MAPPED_SLOT = struct.Struct('<Q8s8sII')
+
+#: The types a :class:`MappedDict` can store, in file order
+_MAPPED_KINDS = (int, float, bytes, str)
+
+_MAPPED_LOAD_FACTOR = 0.7
+
+
+def _mix64(x):
+    """The splitmix64 finalizer, scrambling the bits of the 64 bit *x*"""
+    x ^= x >> 30
+    x = (x * 0xbf58476d1ce4e5b9) & _HASH_MASK
+    x ^= x >> 27
+    x = (x * 0x94d049bb133111eb) & _HASH_MASK
+    return x ^ (x >> 31)
+
+
+def _stable_hash(key, data):
+    """Return a hash of *key*, whose encoded bytes are *data* (or
+    :const:`None` for :const:`int` keys), which is the same in every process.
+    The top bit is always set so that 0 can mark empty slots
+    """
+    if data is None:
+        h = _mix64(key & _HASH_MASK)
+    else:
+        h = _mix64(zlib.crc32(data) | len(data) << 32)
+    return h | (1 << 63)
+
+
+class MappedDict(Mapping):
+    """A hash map kept in a memory-mapped file, so that large lookup tables
+    can be opened instantly and shared between processes through the page
+    cache rather than loaded into a :class:`Dict` in each of them.
+
+    The file holds an open-addressing hash table of fixed size slots, with
+    :const:`int` and :const:`float` keys or values stored in the slot
+    itself, and :const:`bytes` or :const:`str` ones in an overflow area at
+    the end of the file. Files are created with :meth:`create` and opened
+    with the constructor, read-only by default, in which case any number of
+    processes may open the same file at once.
+
+    Writers are append-only: keys can be added or have their value replaced
+    but not removed, and replaced variable length values leave their old
+    bytes behind in the overflow area. When the table fills up it is
+    rewritten at double the capacity into a new file which then replaces
+    the old one, so readers which already have the file open keep seeing
+    the old, consistent version. There may only be one writer at a time
+    """
+    def __init__(self, path, writable=False):
+        """Open a :class:`MappedDict` file written by :meth:`create`
+
+        :param path: The path of the file to open
+        :param writable: Whether to open the file for writing
+        :raises: ValueError if *path* isn't a :class:`MappedDict` file
+        """
+        self.path = path
+        self.writable = writable
+        self._file = self._mm = None
+        self._map()
+
+    @classmethod
+    def create(cls, path, key_type=str, value_type=str, capacity=1024):
+        """Create a new, empty :class:`MappedDict` file at *path*, replacing
+        any existing file, and open it for writing
+
+        :param path: The path of the file to create
+        :param key_type: One of :const:`int`, :const:`bytes` or :const:`str`
+        :param value_type: One of :const:`int`, :const:`float`,
+            :const:`bytes` or :const:`str`
+        :param capacity: The initial number of slots, rounded up to a power
+            of two
+        :return: The new, writable :class:`MappedDict`
+        :raises: TypeError if either type can't be stored
+        """
+        if key_type not in _MAPPED_KINDS or key_type is float:
+            raise TypeError('Unsupported key type {!r}'.format(key_type))
+        if value_type not in _MAPPED_KINDS:
+            raise TypeError('Unsupported value type {!r}'.format(value_type))
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        overflow = _MAPPED_HEADER_SIZE + capacity * _MAPPED_SLOT.size
+        with open(path, 'wb') as f:
+            f.write(_MAPPED_HEADER.pack(
+                _MAPPED_MAGIC, _MAPPED_VERSION,
+                _MAPPED_KINDS.index(key_type),
+                _MAPPED_KINDS.index(value_type), capacity, 0, overflow))
+            f.truncate(overflow)
+        return cls(path, writable=True)
+
+    def _map(self):
+        """(Re)open and map our file, and read its header"""
+        self._file = open(self.path, 'r+b' if self.writable else 'rb')
+        self._mm = MemoryMap(self._file.fileno(), 0,
+                             access=ACCESS_WRITE if self.writable
+                             else ACCESS_READ)
+        (magic, version, key_kind, value_kind, self._capacity, self._count,
+         self._overflow) = _MAPPED_HEADER.unpack_from(self._mm)
+        if magic != _MAPPED_MAGIC:
+            self.close()
+            raise ValueError('{} is not a MappedDict file'.format(self.path))
+        if version != _MAPPED_VERSION:
+            self.close()
+            raise ValueError('Unsupported MappedDict file version: '
+                             '{}'.format(version))
+        self.key_type = _MAPPED_KINDS[key_kind]
+        self.value_type = _MAPPED_KINDS[value_kind]
+
+    def _encode(self, obj, kind):
+        """Return *obj*'s encoded bytes if *kind* is variable length, else
+        :const:`None`
+        """
+        if not isinstance(obj, kind):
+            raise TypeError('Expected {}, not {}'.format(kind.__name__,
+                                                         type(obj).__name__))
+        if kind is str:
+            return obj.encode('utf-8')
+        if kind is bytes:
+            return bytes(obj)
+        return None
+
+    def _decode(self, word, length, kind):
+        """Decode a slot word of *kind*"""
+        if kind is int:
+            return struct.unpack('<q', word)[0]
+        if kind is float:
+            return struct.unpack('<d', word)[0]
+        offset, = struct.unpack('<Q', word)
+        data = self._mm[offset:offset + length]
+        return data.decode('utf-8') if kind is str else data
+
+    def _probe(self, key, data, h):
+        """Return the offset of the slot holding *key*, or of the empty slot
+        it would go in, along with whether it was found
+        """
+        mm, mask = self._mm, self._capacity - 1
+        index = h & mask
+        while True:
+            offset = _MAPPED_HEADER_SIZE + index * _MAPPED_SLOT.size
+            slot_hash, key_word, _, key_len, _ = _MAPPED_SLOT.unpack_from(
+                mm, offset)
+            if not slot_hash:
+                return offset, False
+            if slot_hash == h:
+                if data is None:
+                    if struct.unpack('<q', key_word)[0] == key:
+                        return offset, True
+                else:
+                    start, = struct.unpack('<Q', key_word)
+                    if key_len == len(data) and \
+                            mm[start:start + key_len] == data:
+                        return offset, True
+            index = (index + 1) & mask
+
+    def _find(self, key):
+        """Return the slot offset holding *key*, or :const:`None`"""
+        if not isinstance(key, self.key_type):
+            return None
+        data = self._encode(key, self.key_type)
+        offset, found = self._probe(key, data, _stable_hash(key, data))
+        return offset if found else None
+
+    def __getitem__(self, key):
+        offset = self._find(key)
+        if offset is None:
+            raise KeyError(key)
+        _, _, value_word, _, value_len = _MAPPED_SLOT.unpack_from(self._mm,
+                                                                   offset)
+        return self._decode(value_word, value_len, self.value_type)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def _items(self):
+        """Generate the (key, value) pairs of every occupied slot"""
+        mm = self._mm
+        for index in range(self._capacity):
+            offset = _MAPPED_HEADER_SIZE + index * _MAPPED_SLOT.size
+            h, key_word, value_word, key_len, value_len = \
+                _MAPPED_SLOT.unpack_from(mm, offset)
+            if h:
+                yield (self._decode(key_word, key_len, self.key_type),
+                       self._decode(value_word, value_len, self.value_type))
+
+    def __iter__(self):
+        return (key for key, _ in self._items())
+
+    def __len__(self):
+        return self._count
+
+    def _append(self, data):
+        """Append *data* to the overflow area, growing the file as needed
+
+        :return: The slot word holding *data*'s offset
+        """
+        end = self._overflow + len(data)
+        size = len(self._mm)
+        if end > size:
+            self._mm.close()
+            self._file.truncate(max(end, 2 * size))
+            self._mm = MemoryMap(self._file.fileno(), 0, access=ACCESS_WRITE)
+        self._mm[self._overflow:end] = data
+        word = struct.pack('<Q', self._overflow)
+        self._overflow = end
+        return word
+
+    def _word(self, obj, data, kind):
+        if data is not None:
+            return self._append(data)
+        return struct.pack('<d' if kind is float else '<q', obj)
+
+    def __setitem__(self, key, value):
+        """Store *value* at *key*, appending any variable length data
+
+        :raises: TypeError if this :class:`MappedDict` isn't writable, or
+            *key* or *value* are of the wrong type
+        """
+        if not self.writable:
+            raise TypeError('MappedDict is opened read-only')
+        key_data = self._encode(key, self.key_type)
+        value_data = self._encode(value, self.value_type)
+        h = _stable_hash(key, key_data)
+        offset, found = self._probe(key, key_data, h)
+        if not found and self._count + 1 > \
+                self._capacity * _MAPPED_LOAD_FACTOR:
+            self._rewrite(self._capacity * 2)
+            offset, found = self._probe(key, key_data, h)
+
+        value_word = self._word(value, value_data, self.value_type)
+        value_len = 0 if value_data is None else len(value_data)
+        if found:
+            _, key_word, _, key_len, _ = _MAPPED_SLOT.unpack_from(self._mm,
+                                                                  offset)
+        else:
+            key_word = self._word(key, key_data, self.key_type)
+            key_len = 0 if key_data is None else len(key_data)
+            self._count += 1
+        _MAPPED_SLOT.pack_into(self._mm, offset, h, key_word, value_word,
+                               key_len, value_len)
+        struct.pack_into('<QQ', self._mm, 24, self._count, self._overflow)
+
+    def update(self, other=None, **kwargs):
+        """Store every (key, value) pair from *other* and *kwargs*"""
+        if other is not None and hasattr(other, 'keys'):
+            other = other.items()
+        for key, value in chain(other or (), kwargs.items()):
+            self[key] = value
+
+    def _rewrite(self, capacity):
+        """Rewrite the table with *capacity* slots into a new file, compacting
+        the overflow area, and atomically replace our file with it
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            new = type(self).create(tmp_path, self.key_type, self.value_type,
+                                    capacity)
+            with new:
+                for key, value in self._items():
+                    new[key] = value
+            self.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._map()
+
+    def flush(self):
+        """Flush any writes out to the file"""
+        if self.writable:
+            self._mm.flush()
+
+    def close(self):
+        """Unmap and close the file"""
+        if self._mm is not None and not self._mm.closed:
+            if self.writable:
+                self._mm.flush()
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __reduce__(self):
+        """Pickle by path, reopening read-only in the receiving process"""
+        return type(self), (self.path,)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.path)
+
+
+#: Leading bytes of every :meth:`FrozenDict.to_bytes` payload
+_FROZEN_MAGIC = b'STRUCTFD'
+
+#: The version of the :meth:`FrozenDict.to_bytes` format
+_FROZEN_VERSION = 2
+
+#: Payload header: magic, version, hash seed, entry count, bucket count, the
+#: values' typecode (or ``b'o'`` when packed by :func:`_pack_items`) and
+#: whether keys are stored
+_FROZEN_HEADER = struct.Struct('<8sIIQQc?2x')
+
+#: The average number of keys per :class:`FrozenDict` hash bucket. Larger
+#: buckets shrink the displacement array but make filling the last slots of
+#: a minimal table much slower
+_FROZEN_BUCKET_SIZE = 2
+
+
+def _key_bytes(key):
+    """Encode *key* to bytes which hash the same in every process"""
+    if isinstance(key, str):
+        return b's' + key.encode('utf-8')
+    if isinstance(key, bytes):
+        return b'b' + key
+    if isinstance(key, int):
+        return b'i' + str(int(key)).encode('ascii')
+    msg = 'FrozenDict keys must be str, bytes or int, not {}'.format(
+        type(key).__name__)
+    raise TypeError(msg)
+
+
+def _item_bytes(item):
+    """Encode a :class:`FrozenDict` key or value for :func:`_pack_items`
+
+    :raises: TypeError if *item* isn't :const:`None`, a :const:`bool`,
+        :const:`int`, :const:`float`, :const:`str` or :const:`bytes`
+    """
+    if item is None:
+        return b'n'
+    if isinstance(item, bool):
+        return b'T' if item else b'F'
+    if isinstance(item, float):
+        return b'd' + struct.pack('<d', item)
+    try:
+        return _key_bytes(item)
+    except TypeError:
+        msg = 'FrozenDict can not serialize {} values'.format(
+            type(item).__name__)
+        raise TypeError(msg)
+
+
+def _item_from_bytes(data):
+    """Decode an item encoded by :func:`_item_bytes` from the buffer *data*"""
+    tag, payload = data[:1].tobytes(), data[1:]
+    if tag == b'n':
+        return None
+    if tag in (b'T', b'F'):
+        return tag == b'T'
+    if tag == b'd':
+        return struct.unpack('<d', payload)[0]
+    if tag == b's':
+        return str(payload, 'utf-8')
+    if tag == b'b':
+        return payload.tobytes()
+    if tag == b'i':
+        return int(payload.tobytes())
+    raise ValueError('Corrupt FrozenDict item tag: {!r}'.format(tag))
+
+
+def _pack_items(items):
+    """Serialize *items* as an array of offsets into a data region, followed by
+    the data region holding each item's :func:`_item_bytes`. The offsets are
+    one longer than *items*, so each item spans from its own offset to the next
+    """
+    encoded = [_item_bytes(item) for item in items]
+    offsets = array('Q', [0])
+    offsets.extend(accumulate(map(len, encoded)))
+    return offsets.tobytes() + b''.join(encoded)
+
+
+class _PackedItems(Sequence):
+    """A read-only sequence of the items serialized by :func:`_pack_items`,
+    viewing a buffer without copying it. Each item is decoded as it's read
+    """
+    __slots__ = ('_offsets', '_data')
+
+    def __init__(self, buf, count):
+        """Create a new :class:`_PackedItems` view of *buf*
+
+        :param buf: A :const:`memoryview` starting at the packed items
+        :param count: The number of packed items
+        """
+        size = (count + 1) * 8
+        self._offsets = buf[:size].cast('Q')
+        self._data = buf[size:size + self._offsets[-1]]
+
+    def __getitem__(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('_PackedItems index out of range')
+        offsets = self._offsets
+        return _item_from_bytes(self._data[offsets[index]:offsets[index + 1]])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+def _chd_hashes(key, seed):
+    """Return the bucket hash and the two slot hashes of *key* for *seed*"""
+    digest = hashlib.blake2b(_key_bytes(key), digest_size=24,
+                             key=struct.pack('<I', seed)).digest()
+    return struct.unpack('<QQQ', digest)
+
+
+class FrozenDict(Mapping):
+    """An immutable map for key sets which never change once built. Its keys
+    are placed with a minimal perfect hash built with the CHD (compress,
+    hash and displace) algorithm: each key hashes to a bucket, and each
+    bucket stores one displacement which sends every key in it to its own
+    slot, so a lookup is a hash, one displacement read and one slot read,
+    with no probing. Values are stored densely in slot order, in a typed
+    buffer when they're all :const:`int`s or all :const:`float`s.
+
+    Keys must be :const:`str`, :const:`bytes` or :const:`int`. They are only
+    stored when *check_keys* is set (the default), to verify lookups;
+    without them looking up a key that was never added returns an arbitrary
+    value rather than raising KeyError, and the map can't be iterated over.
+
+    :meth:`to_bytes` serializes the map without pickling, so :meth:`from_bytes`
+    is safe to use on untrusted data; this limits the values it can handle to
+    :const:`None`, :const:`bool`, :const:`int`, :const:`float`, :const:`str`
+    and :const:`bytes`
+    """
+    __slots__ = ('_seed', '_displacements', '_values', '_keys', '_count')
+
+    def __init__(self, iterable=None, *, check_keys=True, **kwargs):
+        """Create a new :class:`FrozenDict`. See :meth:`build`
+
+        :param iterable: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param check_keys: Whether to store the keys to verify lookups
+        :param kwargs: Arbitrary key value pairs to add
+        """
+        pairs = dict(() if iterable is None else iterable, **kwargs)
+        built = self.build(pairs, check_keys=check_keys)
+        for name in self.__slots__:
+            setattr(self, name, getattr(built, name))
+
+    @classmethod
+    def build(cls, pairs, check_keys=True):
+        """Build a :class:`FrozenDict` of *pairs*. Later pairs win over
+        earlier ones with the same key
+
+        :param pairs: Another :const:`dict` or an iterable of (key, value)
+            2-tuples
+        :param check_keys: Whether to store the keys to verify lookups
+        :return: The new :class:`FrozenDict`
+        :raises: TypeError if a key isn't a :const:`str`, :const:`bytes` or
+            :const:`int`
+        """
+        items = list(dict(pairs).items())
+        count = len(items)
+        for seed in range(1 << 16):
+            placed = cls._place([key for key, _ in items], seed)
+            if placed is not None:
+                break
+        else:
+            raise RuntimeError('Could not find a perfect hash')
+        displacements, order = placed
+        return cls._make(seed, displacements,
+                         _pack_values([items[i][1] for i in order]),
+                         tuple(items[i][0] for i in order)
+                         if check_keys else None, count)
+
+    @staticmethod
+    def _place(keys, seed):
+        """Search for a displacement for each bucket of *keys* using *seed*,
+        handling the largest buckets first
+
+        :return: The bucket displacements and the index of the key in each
+            slot, or :const:`None` if this *seed* doesn't work
+        """
+        slots = max(len(keys), 1)
+        bucket_count = max(-(-len(keys) // _FROZEN_BUCKET_SIZE), 1)
+        buckets = [[] for _ in range(bucket_count)]
+        hashes = []
+        for index, key in enumerate(keys):
+            h0, h1, h2 = _chd_hashes(key, seed)
+            buckets[h0 % bucket_count].append(index)
+            hashes.append((h1 % slots, h2 % slots))
+
+        displacements = array('q', [0]) * bucket_count
+        taken = bytearray(slots)
+        order = [None] * slots
+        free = None
+        for bucket in sorted(range(bucket_count),
+                             key=lambda b: -len(buckets[b])):
+            members = buckets[bucket]
+            if not members:
+                break
+            if len(members) == 1:
+                # The remaining buckets hold one key each, which can be
+                # displaced straight into any free slot
+                if free is None:
+                    free = [p for p in range(slots) if not taken[p]]
+                position, index = free.pop(), members[0]
+                order[position] = index
+                displacements[bucket] = (position - hashes[index][0]) % slots
+                continue
+            bases = [hashes[index] for index in members]
+            if len(set(bases)) < len(bases):
+                return None
+            for displacement in range(slots * slots):
+                d0, d1 = divmod(displacement, slots)
+                positions = [(f1 + d0 * f2 + d1) % slots for f1, f2 in bases]
+                if not any(taken[p] for p in positions) and \
+                        len(set(positions)) == len(positions):
+                    break
+            else:
+                return None
+            for position, index in zip(positions, members):
+                taken[position] = 1
+                order[position] = index
+            displacements[bucket] = displacement
+        return displacements, order[:len(keys)]
+
+    @classmethod
+    def _make(cls, seed, displacements, values, keys, count):
+        new = object.__new__(cls)
+        new._seed, new._displacements = seed, displacements
+        new._values, new._keys, new._count = values, keys, count
+        return new
+
+    def _slot(self, key):
+        """Return the slot *key* would be stored in"""
+        h0, h1, h2 = _chd_hashes(key, self._seed)
+        slots = self._count
+        d0, d1 = divmod(self._displacements[h0 % len(self._displacements)],
+                        slots)
+        return (h1 % slots + d0 * (h2 % slots) + d1) % slots
+
+    def __getitem__(self, key):
+        if not self._count:
+            raise KeyError(key)
+        try:
+            slot = self._slot(key)
+        except TypeError:
+            raise KeyError(key)
+        if self._keys is not None and self._keys[slot] != key:
+            raise KeyError(key)
+        return self._values[slot]
+
+    def __iter__(self):
+        if self._keys is None:
+            raise TypeError('FrozenDict was built without check_keys')
+        return iter(self._keys)
+
+    def __len__(self):
+        return self._count
+
+    def to_bytes(self):
+        """Serialize this :class:`FrozenDict`, including its hash function,
+        so that :meth:`from_bytes` can load it without rebuilding anything
+
+        :raises: TypeError if a value can't be serialized
+        """
+        if isinstance(self._values, memoryview):
+            typecode, values = self._values.format, self._values.tobytes()
+        else:
+            typecode, values = 'o', _pack_items(self._values)
+        keys = _pack_items(self._keys) if self._keys is not None else b''
+        header = _FROZEN_HEADER.pack(
+            _FROZEN_MAGIC, _FROZEN_VERSION, self._seed, self._count,
+            len(self._displacements), typecode.encode('ascii'),
+            self._keys is not None)
+        return b''.join([header, self._displacements.tobytes(),
+                         struct.pack('<Q', len(values)), values, keys])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Load a :class:`FrozenDict` serialized by :meth:`to_bytes`. Keys and
+        values are read in place from *data*, without being copied, when it
+        is read-only, such as :const:`bytes` or a read-only :mod:`mmap`.
+        Nothing in *data* is ever unpickled
+
+        :param data: A bytes-like object
+        :raises: ValueError if *data* isn't a serialized :class:`FrozenDict`
+        """
+        buf = memoryview(data)
+        if bytes(buf[:len(_FROZEN_MAGIC)]) != _FROZEN_MAGIC:
+            raise ValueError('Not a serialized FrozenDict')
+        if not buf.readonly:
+            buf = memoryview(buf.tobytes())
+        (_, version, seed, count, bucket_count, typecode,
+         has_keys) = _FROZEN_HEADER.unpack_from(buf)
+        if version != _FROZEN_VERSION:
+            raise ValueError('Unsupported FrozenDict version: '
+                             '{}'.format(version))
+        start = _FROZEN_HEADER.size
+        displacements = array('q')
+        displacements.frombytes(buf[start:start + bucket_count * 8])
+        start += bucket_count * 8
+        size, = struct.unpack_from('<Q', buf, start)
+        start += 8
+        typecode = typecode.decode('ascii')
+        if typecode == 'o':
+            values = _PackedItems(buf[start:start + size], count)
+        else:
+            values = buf[start:start + size].cast(typecode)
+        keys = _PackedItems(buf[start + size:], count) if has_keys else None
+        return cls._make(seed, displacements, values, keys, count)
+
+    def __reduce__(self):
+        try:
+            return type(self).from_bytes, (self.to_bytes(),)
+        except TypeError:
+            # Values to_bytes can't serialize are pickled along with the rest
+            # of our state instead
+            return type(self)._make, (self._seed, self._displacements,
+                                      self._values, self._keys, self._count)
+
+    def __repr__(self):
+        if self._keys is None:
+            return '{}(<{} unchecked keys>)'.format(type(self).__name__,
+                                                    self._count)
+        items = ', '.join('{!r}: {!r}'.format(key, self[key]) for key in self)
+        return '{}({{{}}})'.format(type(self).__name__, items)
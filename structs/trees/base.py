@@ -5,7 +5,8 @@ must be implemented by all inheriting base classes
 """
 
 from abc import ABCMeta, abstractmethod
-from collections import Sized, Iterable, Container
+from collections import deque
+from collections.abc import Container, Iterable, Sized
 
 __author__ = 'Jon Nappi'
 __all__ = ['Node', 'Tree']
@@ -16,6 +17,8 @@ class Node:
     :class:`~structs.trees.base.Tree`. This class also handles tracking child
     and parent :class:`Node`'s.
     """
+    __slots__ = ('key', 'data', 'parent')
+
     children = []
 
     def __init__(self, key, value, parent=None):
@@ -39,7 +42,7 @@ class Node:
             containing :class:`~structs.trees.base.Tree`, otherwise
             :const:`False`
         """
-        return not self.parent
+        return self.parent is None
 
     def is_leaf(self):
         """Determine if this :class:`Node` is a leaf node of it's containing
@@ -232,96 +235,145 @@ class Tree(Sized, Iterable, Container, metaclass=ABCMeta):
         """
         return self.in_order
 
+    @staticmethod
+    def _split_children(node):
+        """Partition *node*'s children into those ordered before and after it,
+        in a single pass
+
+        :param node: The node whose children to partition
+        :return: A list of the children less than *node* and a list of the
+            children greater than it
+        """
+        lt, gt = [], []
+        for child in node.children:
+            if child is not None:
+                if child < node:
+                    lt.append(child)
+                elif child > node:
+                    gt.append(child)
+        return lt, gt
+
     @property
     def preorder(self):
         """A generator containing the preorder representation of this
         :class:`Tree`
         """
-        return (node for node in self.get_preorder(self.root))
+        return self.get_preorder(self.root)
 
     def get_preorder(self, node):
-        """Recursively build the preorder representation of this :class:`Tree`
+        """Build the preorder representation of the subtree at *node*, using an
+        explicit stack rather than recursion
 
-        :param node: The current node we're at in our recursive traversal
+        :param node: The root of the subtree to traverse
         """
-        if node is not None:
-            lt = [n for n in node.children if n is not None and n < node]
-            gt = [n for n in node.children if n is not None and n > node]
+        stack = [] if node is None else [node]
+        while stack:
+            node = stack.pop()
             yield node
-            for n in lt:
-                for data in self.get_preorder(n):
-                    yield data
-            for n in gt:
-                for data in self.get_preorder(n):
-                    yield data
+            lt, gt = self._split_children(node)
+            stack.extend(reversed(gt))
+            stack.extend(reversed(lt))
 
     @property
     def in_order(self):
         """A generator containing the in order representation of this
         :class:`Tree`
         """
-        return (node for node in self.get_in_order(self.root))
+        return self.get_in_order(self.root)
 
     def get_in_order(self, node):
-        """Recursively build the in order representation of this :class:`Tree`
+        """Build the in order representation of the subtree at *node*, using an
+        explicit stack rather than recursion
 
-        :param node: The current node we're at in our recursive traversal
+        :param node: The root of the subtree to traverse
         """
-        if node is not None:
-            lt = [n for n in node.children if n is not None and n < node]
-            gt = [n for n in node.children if n is not None and n > node]
-            for n in lt:
-                for data in self.get_in_order(n):
-                    yield data
-            yield node
-            for n in gt:
-                for data in self.get_in_order(n):
-                    yield data
+        stack = [] if node is None else [(node, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                yield node
+                continue
+            lt, gt = self._split_children(node)
+            stack.extend((n, False) for n in reversed(gt))
+            stack.append((node, True))
+            stack.extend((n, False) for n in reversed(lt))
 
     @property
     def postorder(self):
         """A generator containing the postorder representation of this
         :class:`Tree`
         """
-        return (node for node in self.get_postorder(self.root))
+        return self.get_postorder(self.root)
 
     def get_postorder(self, node):
-        """Recursively build the postorder representation of this :class:`Tree`
+        """Build the postorder representation of the subtree at *node*, using
+        an explicit stack rather than recursion
 
-        :param node: The current node we're at in our recursive traversal
+        :param node: The root of the subtree to traverse
         """
-        if node is not None:
-            lt = [n for n in node.children if n is not None and n < node]
-            gt = [n for n in node.children if n is not None and n > node]
-            for n in lt:
-                for data in self.get_postorder(n):
-                    yield data
-            for n in gt:
-                for data in self.get_postorder(n):
-                    yield data
-            yield node
+        stack = [] if node is None else [(node, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                yield node
+                continue
+            lt, gt = self._split_children(node)
+            stack.append((node, True))
+            stack.extend((n, False) for n in reversed(gt))
+            stack.extend((n, False) for n in reversed(lt))
 
     @property
     def levelorder(self):
         """A generator containing the levelorder representation of this
         :class:`Tree`
         """
-        return (node for node in self.get_level_order(self.root))
+        return self.get_level_order(self.root)
 
-    def get_level_order(self, node, more=None):
-        """Recursively build the level order representation of this
-        :class:`Tree`
+    @staticmethod
+    def _child_nodes(node):
+        """Return a list of *node*'s children, without any empty slots
 
-        :param node: The current node we're at in our recursive traversal
+        :param node: The node whose children to return
         """
-        if node is not None:
-            if more is None:
-                more = []
-            more += [n for n in node.children if n is not None]
+        return [child for child in node.children if child is not None]
+
+    def get_level_order(self, node):
+        """Build the level order representation of the subtree at *node*,
+        breadth first using a queue, in O(n) time
+
+        :param node: The root of the subtree to traverse
+        """
+        queue = deque() if node is None else deque([node])
+        while queue:
+            node = queue.popleft()
             yield node
-        if more:
-            for data in self.get_level_order(more[0], more[1:]):
-                yield data
+            queue.extend(self._child_nodes(node))
+
+    def levels(self):
+        """Generate the nodes of this :class:`Tree` one level at a time, as a
+        list of the nodes at each depth in level order, starting with a list
+        of just the root
+        """
+        level = [] if self.root is None else [self.root]
+        while level:
+            yield level
+            level = [child for node in level
+                     for child in self._child_nodes(node)]
+
+    def iter_level(self, depth):
+        """Generate the nodes at *depth* in this :class:`Tree`, in level order,
+        where the root is at depth 0
+
+        :param depth: The depth of the nodes to generate
+        :raises: ValueError if *depth* is negative
+        """
+        if depth < 0:
+            raise ValueError('depth must not be negative')
+        for current, level in enumerate(self.levels()):
+            if current == depth:
+                for node in level:
+                    yield node
+                return
 
     def __add__(self, other):
         """Combine this :class:`Tree` and another :class:`Tree` instance and
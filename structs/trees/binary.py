@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 """This module contains a collection of Binary Tree type data structures"""
 
+from abc import abstractmethod
+from collections import deque, namedtuple
+
 from .base import Node, Tree
 
 __author__ = 'Jon Nappi'
-__all__ = ['BinaryTree', 'BinarySearchTree']
+__all__ = ['BinaryTree', 'BinarySearchTree', 'AVLTree', 'RedBlackTree',
+           'CompleteBinaryTree']
 
 
 class BinaryNode(Node):
@@ -12,6 +16,7 @@ class BinaryNode(Node):
     :class:`~structs.trees.binary.BinaryTree`. This class also handles tracking
     child and parent :class:`BinaryNode`'s.
     """
+    __slots__ = ('left_child', 'right_child')
 
     def __init__(self, key, value, left=None, right=None, parent=None):
         """Create a new :class:`BinaryNode` instance to store *value* at *key*.
@@ -52,7 +57,7 @@ class BinaryNode(Node):
         :return: :const:`True` if this :class:`BinaryNode` is it's parent's
         left child, otherwise :const:`False`
         """
-        return self.parent and self.parent.left_child == self
+        return self.parent is not None and self.parent.left_child is self
 
     def is_right_child(self):
         """Determine if this :class:`BinaryNode` is it's parent's right child
@@ -60,7 +65,24 @@ class BinaryNode(Node):
         :return: :const:`True` if this :class:`BinaryNode` is it's parent's
         right child, otherwise :const:`False`
         """
-        return self.parent and self.parent.right_child == self
+        return self.parent is not None and self.parent.right_child is self
+
+    def is_leaf(self):
+        """Determine if this :class:`BinaryNode` is a leaf node of it's
+        containing :class:`~structs.trees.binary.BinaryTree`
+
+        :return: :const:`True` if this :class:`BinaryNode` has no children,
+            otherwise :const:`False`
+        """
+        return self.left_child is None and self.right_child is None
+
+    def has_children(self):
+        """Determine if this :class:`BinaryNode` has any child nodes
+
+        :return: :const:`True` if this :class:`BinaryNode` has at least one
+            child, otherwise :const:`False`
+        """
+        return self.left_child is not None or self.right_child is not None
 
     def has_both_children(self):
         """Determine if this :class:`BinaryNode` has both of it's child nodes
@@ -90,9 +112,11 @@ class BinaryNode(Node):
 
     @property
     def children(self):
-        """An immutable collection of the children in this :class:`BinaryNode`
+        """An immutable collection of the children in this :class:`BinaryNode`.
+        A new tuple is built on each access, so the tree code itself uses
+        `left_child` and `right_child` directly
         """
-        return tuple([self.left_child, self.right_child])
+        return self.left_child, self.right_child
 
     def splice_out(self):
         """Remove this :class:`BinaryNode` from it's containing
@@ -160,9 +184,42 @@ class BinaryNode(Node):
     __repr__ = __str__
 
 
+def _morris_steps(current):
+    """Generate the in order nodes of the subtree at *current* with a Morris
+    traversal. The next node to visit is always chosen before yielding, so
+    that exhausting a part-consumed generator removes every thread
+    """
+    while current is not None:
+        if current.left_child is None:
+            node, current = current, current.right_child
+            yield node
+            continue
+        predecessor = current.left_child
+        while predecessor.right_child is not None and \
+                predecessor.right_child is not current:
+            predecessor = predecessor.right_child
+        if predecessor.right_child is None:
+            predecessor.right_child = current
+            current = current.left_child
+        else:
+            predecessor.right_child = None
+            node, current = current, current.right_child
+            yield node
+
+
 class BinaryTree(Tree):
     """A :class:`~structs.trees.base.Tree` based data structure in which each
     :class:`~structs.trees.base.Node` has at most two children.
+
+    Traversals follow each node's left and then right child, so the in order
+    traversal visits a node's left subtree, the node, then its right subtree.
+    For a :class:`BinarySearchTree` that's sorted key order. A plain
+    :class:`BinaryTree` is unsorted, so its traversals follow the shape of
+    the tree rather than its keys. Earlier releases placed a child before or
+    after its parent by comparing their keys, whichever slot it was in, and
+    skipped children with keys equal to their parent's; use
+    :meth:`Tree.get_in_order <structs.trees.base.Tree.get_in_order>` for
+    that ordering
     """
 
     #: The maximum number of children each node can have
@@ -187,21 +244,25 @@ class BinaryTree(Tree):
 
     def _put(self, key, value, current_node):
         """Insert a new node with data of *value* at *key*. Insert into the
-        next open child slot that we can find in the tree
+        first open child slot found in level order below *current_node*, so
+        the new node is added exactly once. See :class:`CompleteBinaryTree`
+        for a tree that finds that slot in O(1) time
 
         :param key: The key to store the new node at
         :param value: The data for the new node
         :param current_node: The current node we're trying to insert at
         """
-        if not current_node.has_left_child():
-            current_node.left_child = self.node_type(key, value,
-                                                     parent=current_node)
-        elif not current_node.has_right_child():
-            current_node.right_child = self.node_type(key, value,
-                                                      parent=current_node)
-        else:
-            for node in current_node.children:
-                self._put(key, value, node)  # Order doesn't matter
+        queue = deque([current_node])
+        while queue:
+            node = queue.popleft()
+            if node.left_child is None:
+                node.left_child = self.node_type(key, value, parent=node)
+                return
+            if node.right_child is None:
+                node.right_child = self.node_type(key, value, parent=node)
+                return
+            queue.append(node.left_child)
+            queue.append(node.right_child)
 
     def _delete(self, current_node):
         """Since there's no specific logic required when removing from an
@@ -211,6 +272,92 @@ class BinaryTree(Tree):
         """
         current_node.splice_out()
 
+    @staticmethod
+    def _child_nodes(node):
+        """Return a list of *node*'s children, without any empty slots"""
+        if node.left_child is None:
+            return [] if node.right_child is None else [node.right_child]
+        if node.right_child is None:
+            return [node.left_child]
+        return [node.left_child, node.right_child]
+
+    def get_preorder(self, node):
+        """Build the preorder representation of the subtree at *node* by
+        following left and right children with an explicit stack
+
+        :param node: The root of the subtree to traverse
+        """
+        stack = [] if node is None else [node]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.right_child is not None:
+                stack.append(node.right_child)
+            if node.left_child is not None:
+                stack.append(node.left_child)
+
+    def get_in_order(self, node):
+        """Build the in order representation of the subtree at *node* by
+        following left and right children with an explicit stack. Keys are
+        not compared, so this is only sorted for a :class:`BinarySearchTree`
+
+        :param node: The root of the subtree to traverse
+        """
+        stack = []
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left_child
+            node = stack.pop()
+            yield node
+            node = node.right_child
+
+    def get_postorder(self, node):
+        """Build the postorder representation of the subtree at *node* by
+        following left and right children with an explicit stack
+
+        :param node: The root of the subtree to traverse
+        """
+        stack, last = [], None
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left_child
+                continue
+            top = stack[-1]
+            if top.right_child is not None and top.right_child is not last:
+                node = top.right_child
+            else:
+                last = stack.pop()
+                yield last
+
+    @property
+    def morris_in_order(self):
+        """A generator containing the in order representation of this
+        :class:`BinaryTree`, using O(1) extra memory. See
+        :meth:`get_morris_in_order`
+        """
+        return self.get_morris_in_order(self.root)
+
+    def get_morris_in_order(self, node):
+        """Build the in order representation of the subtree at *node* with a
+        Morris traversal, which needs no stack: it temporarily threads each
+        node's in order predecessor back to it through the predecessor's
+        empty right child. The tree must not be modified, or walked by
+        anything else, until the traversal finishes. If it's abandoned part
+        way through, the rest of the walk is run when the generator is closed
+        to remove the remaining threads
+
+        :param node: The root of the subtree to traverse
+        """
+        steps = _morris_steps(node)
+        try:
+            for node in steps:
+                yield node
+        finally:
+            for _ in steps:
+                pass
+
 
 class BinarySearchTree(BinaryTree):
     """A Binary Search Tree is a sorted Binary Tree in which each node has a
@@ -232,39 +379,40 @@ class BinarySearchTree(BinaryTree):
         :param current_node: The current :class:`BinaryNode` we're attempting
             to retrieve from
         """
-        if not current_node:
-            return None
-        elif current_node.key == key:
-            return current_node
-        elif key < current_node.key:
-            return self._get(key, current_node.left_child)
-        else:
-            return self._get(key, current_node.right_child)
+        while current_node is not None:
+            if current_node.key == key:
+                return current_node
+            elif key < current_node.key:
+                current_node = current_node.left_child
+            else:
+                current_node = current_node.right_child
+        return None
 
     def _put(self, key, value, current_node):
         """Overriden abstract method to handle the logical insertions of new
         nodes into this :class:`~structs.trees.binary.BinarySearchTree`. Until
-        we find the right place to insert our key value pair, recurse down to
+        we find the right place to insert our key value pair, walk down to
         the left if *key* is less than *current_node*'s key attribute,
-        otherwise recurse to the right
+        otherwise walk to the right
 
         :param key: The key to search for
         :param value: The data to be inserted into the :class:`Tree`
         :param current_node: The current :class:`BinaryNode` we're attempting
             to retrieve from
         """
-        if key < current_node.key:
-            if current_node.has_left_child():
-                self._put(key, value, current_node.left_child)
+        while True:
+            if key < current_node.key:
+                if current_node.left_child is None:
+                    current_node.left_child = self.node_type(
+                        key, value, parent=current_node)
+                    return
+                current_node = current_node.left_child
             else:
-                current_node.left_child = self.node_type(key, value,
-                                                         parent=current_node)
-        else:
-            if current_node.has_right_child():
-                self._put(key, value, current_node.right_child)
-            else:
-                current_node.right_child = self.node_type(key, value,
-                                                          parent=current_node)
+                if current_node.right_child is None:
+                    current_node.right_child = self.node_type(
+                        key, value, parent=current_node)
+                    return
+                current_node = current_node.right_child
 
     def _delete(self, node):
         """Overriden abstract method to handle the logical removal of nodes
@@ -292,7 +440,7 @@ class BinarySearchTree(BinaryTree):
         :param node: The node to remove. This method can only successfully be
             called on a leaf node
         """
-        if node == node.parent.left_child:
+        if node is node.parent.left_child:
             node.parent.left_child = None
         else:
             node.parent.right_child = None
@@ -346,3 +494,588 @@ class BinarySearchTree(BinaryTree):
                         node.right_child.data,
                         node.right_child.left_child,
                         node.right_child.right_child)
+
+
+class AVLNode(BinaryNode):
+    """A :class:`BinaryNode` which also tracks the height of the subtree
+    rooted at it, for use in an :class:`~structs.trees.binary.AVLTree`
+    """
+    __slots__ = ('height',)
+
+    def __init__(self, key, value, left=None, right=None, parent=None):
+        super().__init__(key, value, left=left, right=right, parent=parent)
+        self.height = 1
+
+
+class RedBlackNode(BinaryNode):
+    """A :class:`BinaryNode` which is colored either red or black, for use in
+    a :class:`~structs.trees.binary.RedBlackTree`. New nodes are red
+    """
+    __slots__ = ('red',)
+
+    def __init__(self, key, value, left=None, right=None, parent=None):
+        super().__init__(key, value, left=left, right=right, parent=parent)
+        self.red = True
+
+
+class _BalancedSearchTree(BinarySearchTree):
+    """Shared base for self-balancing binary search trees. Unlike a plain
+    :class:`BinarySearchTree`, putting an existing key replaces its value,
+    and insertion is iterative. Subclasses restore their balance in
+    :meth:`_inserted` and :meth:`_delete`
+    """
+
+    def put(self, key, value):
+        """Insert the provided key value pair into this :class:`Tree`,
+        replacing the value of *key* if it is already present
+
+        :param key: The key to insert *value* into the :class:`Tree`
+        :param value: The data to be inserted into the :class:`Tree`
+        """
+        if self.root is None:
+            self.root = self.node_type(key, value)
+            self._inserted(self.root)
+            self.size += 1
+        elif self._put(key, value, self.root):
+            self.size += 1
+
+    def _put(self, key, value, current_node):
+        """Walk down from *current_node* to where *key* belongs and insert a
+        new node there, or update the node already stored at *key*
+
+        :param key: The key to store *value* at
+        :param value: The data to be inserted into the :class:`Tree`
+        :param current_node: The :class:`BinaryNode` to start searching at
+        :return: :const:`True` if a new node was inserted
+        """
+        while True:
+            if key == current_node.key:
+                current_node.data = value
+                return False
+            if key < current_node.key:
+                if current_node.left_child is None:
+                    node = current_node.left_child = self.node_type(
+                        key, value, parent=current_node)
+                    break
+                current_node = current_node.left_child
+            else:
+                if current_node.right_child is None:
+                    node = current_node.right_child = self.node_type(
+                        key, value, parent=current_node)
+                    break
+                current_node = current_node.right_child
+        self._inserted(node)
+        return True
+
+    @abstractmethod
+    def _inserted(self, node):
+        """Restore balance after *node* was inserted as a leaf. Must be
+        implemented by each balanced tree
+        """
+
+    def _unlink(self, node):
+        """Remove *node* from the tree, first swapping in its successor's
+        contents if it has two children
+
+        :param node: The :class:`BinaryNode` to remove
+        :return: The node actually unlinked, its one child or :const:`None`,
+            and its parent
+        """
+        if node.left_child is not None and node.right_child is not None:
+            successor = node.right_child.find_min()
+            node.key, node.data = successor.key, successor.data
+            node = successor
+        child = node.left_child if node.left_child is not None \
+            else node.right_child
+        parent = node.parent
+        if child is not None:
+            child.parent = parent
+        self._replace_child(parent, node, child)
+        node.parent = node.left_child = node.right_child = None
+        return node, child, parent
+
+    def _replace_child(self, parent, old, new):
+        """Replace *parent*'s child *old* with *new*, where a *parent* of
+        :const:`None` means *old* is the root
+        """
+        if parent is None:
+            self.root = new
+        elif parent.left_child is old:
+            parent.left_child = new
+        else:
+            parent.right_child = new
+
+    def _rotate_left(self, node):
+        """Rotate the subtree rooted at *node* to the left, making its right
+        child the new root of the subtree
+
+        :return: The new root of the subtree
+        """
+        pivot = node.right_child
+        node.right_child = pivot.left_child
+        if pivot.left_child is not None:
+            pivot.left_child.parent = node
+        pivot.parent = node.parent
+        self._replace_child(node.parent, node, pivot)
+        pivot.left_child = node
+        node.parent = pivot
+        return pivot
+
+    def _rotate_right(self, node):
+        """Rotate the subtree rooted at *node* to the right, making its left
+        child the new root of the subtree
+
+        :return: The new root of the subtree
+        """
+        pivot = node.left_child
+        node.left_child = pivot.right_child
+        if pivot.right_child is not None:
+            pivot.right_child.parent = node
+        pivot.parent = node.parent
+        self._replace_child(node.parent, node, pivot)
+        pivot.right_child = node
+        node.parent = pivot
+        return pivot
+
+
+def _height(node):
+    return 0 if node is None else node.height
+
+
+class AVLTree(_BalancedSearchTree):
+    """A self-balancing :class:`BinarySearchTree` in which the heights of the
+    two subtrees of any node differ by at most one, which keeps the tree
+    O(log n) deep however keys are inserted, even in sorted order
+    """
+
+    #: The type of node used in this :class:`Tree`
+    node_type = AVLNode
+
+    @staticmethod
+    def _update_height(node):
+        node.height = 1 + max(_height(node.left_child),
+                              _height(node.right_child))
+
+    def _rebalance(self, node):
+        """Walk up from *node* to the root, updating heights and rotating any
+        node whose subtrees' heights differ by more than one
+        """
+        while node is not None:
+            self._update_height(node)
+            balance = _height(node.left_child) - _height(node.right_child)
+            if balance > 1:
+                left = node.left_child
+                if _height(left.left_child) < _height(left.right_child):
+                    self._rotate_left(left)
+                    self._update_height(left)
+                node = self._rotate_right(node)
+                self._update_height(node.right_child)
+                self._update_height(node)
+            elif balance < -1:
+                right = node.right_child
+                if _height(right.right_child) < _height(right.left_child):
+                    self._rotate_right(right)
+                    self._update_height(right)
+                node = self._rotate_left(node)
+                self._update_height(node.left_child)
+                self._update_height(node)
+            node = node.parent
+
+    def _inserted(self, node):
+        self._rebalance(node.parent)
+
+    def _delete(self, node):
+        """Remove *node* and rebalance the path above it
+
+        :param node: The :class:`AVLNode` to remove
+        """
+        _, _, parent = self._unlink(node)
+        self._rebalance(parent)
+
+
+def _is_red(node):
+    return node is not None and node.red
+
+
+class RedBlackTree(_BalancedSearchTree):
+    """A self-balancing :class:`BinarySearchTree` in which every node is red
+    or black, the root is black, red nodes have no red children, and every
+    path from a node down to a leaf passes through the same number of black
+    nodes, which keeps the tree O(log n) deep. It performs fewer rotations
+    than an :class:`AVLTree` on insertion and deletion
+    """
+
+    #: The type of node used in this :class:`Tree`
+    node_type = RedBlackNode
+
+    def _inserted(self, node):
+        """Restore the red-black properties after inserting the red *node*"""
+        while node is not self.root and node.parent.red:
+            parent = node.parent
+            grandparent = parent.parent
+            if parent is grandparent.left_child:
+                uncle = grandparent.right_child
+                if _is_red(uncle):
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    node = grandparent
+                    continue
+                if node is parent.right_child:
+                    node, parent = parent, node
+                    self._rotate_left(node)
+                parent.red, grandparent.red = False, True
+                self._rotate_right(grandparent)
+            else:
+                uncle = grandparent.left_child
+                if _is_red(uncle):
+                    parent.red = uncle.red = False
+                    grandparent.red = True
+                    node = grandparent
+                    continue
+                if node is parent.left_child:
+                    node, parent = parent, node
+                    self._rotate_right(node)
+                parent.red, grandparent.red = False, True
+                self._rotate_left(grandparent)
+        self.root.red = False
+
+    def _delete(self, node):
+        """Remove *node* and restore the red-black properties
+
+        :param node: The :class:`RedBlackNode` to remove
+        """
+        removed, child, parent = self._unlink(node)
+        if removed.red:
+            return
+        if _is_red(child):
+            child.red = False
+        else:
+            self._delete_fixup(child, parent)
+
+    def _delete_fixup(self, node, parent):
+        """Remove the extra black left on *node*, which may be :const:`None`,
+        by the removal of a black node from under *parent*
+        """
+        while node is not self.root and not _is_red(node):
+            if node is parent.left_child:
+                sibling = parent.right_child
+                if sibling.red:
+                    sibling.red, parent.red = False, True
+                    self._rotate_left(parent)
+                    sibling = parent.right_child
+                if not _is_red(sibling.left_child) and \
+                        not _is_red(sibling.right_child):
+                    sibling.red = True
+                    node, parent = parent, parent.parent
+                    continue
+                if not _is_red(sibling.right_child):
+                    sibling.left_child.red, sibling.red = False, True
+                    self._rotate_right(sibling)
+                    sibling = parent.right_child
+                sibling.red, parent.red = parent.red, False
+                sibling.right_child.red = False
+                self._rotate_left(parent)
+            else:
+                sibling = parent.left_child
+                if sibling.red:
+                    sibling.red, parent.red = False, True
+                    self._rotate_right(parent)
+                    sibling = parent.left_child
+                if not _is_red(sibling.left_child) and \
+                        not _is_red(sibling.right_child):
+                    sibling.red = True
+                    node, parent = parent, parent.parent
+                    continue
+                if not _is_red(sibling.left_child):
+                    sibling.right_child.red, sibling.red = False, True
+                    self._rotate_left(sibling)
+                    sibling = parent.left_child
+                sibling.red, parent.red = parent.red, False
+                sibling.left_child.red = False
+                self._rotate_right(parent)
+            node = self.root
+        if node is not None:
+            node.red = False
+
+
+#: The key value pair stored in each slot of a :class:`CompleteBinaryTree`
+TreeEntry = namedtuple('TreeEntry', ['key', 'data'])
+
+
+class CompleteBinaryTree(Tree):
+    """A binary :class:`~structs.trees.base.Tree` kept complete, with every
+    level full except
+    possibly the last, which is filled from the left. Because the shape is
+    fixed, no nodes are stored at all: keys and data live in two parallel
+    lists in level order, and the children of the slot at index *i* are at
+    indices ``2i + 1`` and ``2i + 2``. Appending into the next open slot and
+    moving between a slot, its parent and its children are all O(1), and
+    traversals walk contiguous lists rather than chasing node references.
+
+    Lookups return a :data:`TreeEntry` of *(key, data)* in place of a node.
+    As with :class:`BinaryTree` the keys aren't sorted, so finding a key is
+    a linear scan, and keys aren't deduplicated on insert; the first match
+    in level order is found.
+    """
+
+    #: The maximum number of children each node can have
+    max_size = 2
+
+    #: The type of entry returned from this :class:`Tree`
+    node_type = TreeEntry
+
+    def __init__(self):
+        """Create a new, empty :class:`CompleteBinaryTree`"""
+        self._keys = []
+        self._data = []
+        super().__init__()
+
+    @property
+    def root(self):
+        """The :data:`TreeEntry` at the root of this tree, or :const:`None`
+        if it's empty. The root is always the first slot, so it can't be
+        replaced, only set to :const:`None` to empty the tree
+        """
+        return self.entry(0) if self._keys else None
+
+    @root.setter
+    def root(self, entry):
+        if entry is not None:
+            raise AttributeError('The root of a CompleteBinaryTree is always '
+                                 'its first entry')
+        self._keys = []
+        self._data = []
+        self.size = 0
+
+    def entry(self, index):
+        """Return the :data:`TreeEntry` stored in the slot at *index*
+
+        :param index: The level order index of the slot
+        :raises: IndexError if there is no slot at *index*
+        """
+        if not 0 <= index < len(self._keys):
+            raise IndexError('index out of range')
+        return TreeEntry(self._keys[index], self._data[index])
+
+    def parent_index(self, index):
+        """Return the index of the parent of the slot at *index*, or
+        :const:`None` for the root
+
+        :param index: The level order index of the slot
+        """
+        return (index - 1) // 2 if index > 0 else None
+
+    def left_index(self, index):
+        """Return the index of the left child of the slot at *index*, or
+        :const:`None` if it has no left child
+
+        :param index: The level order index of the slot
+        """
+        child = 2 * index + 1
+        return child if child < len(self._keys) else None
+
+    def right_index(self, index):
+        """Return the index of the right child of the slot at *index*, or
+        :const:`None` if it has no right child
+
+        :param index: The level order index of the slot
+        """
+        child = 2 * index + 2
+        return child if child < len(self._keys) else None
+
+    def index(self, key):
+        """Return the level order index of the first slot storing *key*
+
+        :param key: The key to search for
+        :raises: KeyError if *key* not in :class:`Tree`
+        """
+        try:
+            return self._keys.index(key)
+        except ValueError:
+            raise KeyError('Error, key not in tree')
+
+    def put(self, key, value):
+        """Append the provided key value pair into the next open slot of this
+        :class:`CompleteBinaryTree`, in O(1) time
+
+        :param key: The key to insert *value* into the :class:`Tree`
+        :param value: The data to be inserted into the :class:`Tree`
+        """
+        self._keys.append(key)
+        self._data.append(value)
+        self.size += 1
+
+    def _put(self, key, value, current_node):
+        """The next open slot is always at the end of the backing lists, so
+        *current_node* is ignored. See :meth:`put`
+        """
+        self.put(key, value)
+
+    def _get(self, key, current_node):
+        """Search the backing list for the first slot storing *key*
+
+        :param key: The key our target entry is stored at
+        :param current_node: Unused, the whole tree is always searched
+        :return: The :data:`TreeEntry` stored at *key*, or :const:`None`
+        """
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            return None
+        return TreeEntry(self._keys[index], self._data[index])
+
+    def delete(self, key):
+        """Delete the first entry stored at *key* from this
+        :class:`CompleteBinaryTree`. The last entry is moved into its slot to
+        keep the tree complete
+
+        :param key: The key to delete from this :class:`Tree`
+        :raises: KeyError if *key* not in :class:`Tree`
+        """
+        self._delete(self.index(key))
+
+    def _delete(self, current_node):
+        """Remove the slot at index *current_node*, moving the last entry in
+        level order into it
+
+        :param current_node: The level order index of the slot to remove
+        """
+        key, value = self._keys.pop(), self._data.pop()
+        self.size -= 1
+        if current_node < len(self._keys):
+            self._keys[current_node] = key
+            self._data[current_node] = value
+
+    @property
+    def preorder(self):
+        """A generator containing the preorder representation of this
+        :class:`Tree`
+        """
+        return self.get_preorder(0)
+
+    def get_preorder(self, index):
+        """Build the preorder representation of the subtree rooted at the slot
+        at *index*, using an explicit stack of indices
+
+        :param index: The level order index of the subtree's root
+        """
+        keys, data = self._keys, self._data
+        size = len(keys)
+        stack = [index] if index < size else []
+        while stack:
+            index = stack.pop()
+            yield TreeEntry(keys[index], data[index])
+            right = 2 * index + 2
+            if right < size:
+                stack.append(right)
+            if right - 1 < size:
+                stack.append(right - 1)
+
+    @property
+    def in_order(self):
+        """A generator containing the in order representation of this
+        :class:`Tree`
+        """
+        return self.get_in_order(0)
+
+    def get_in_order(self, index):
+        """Build the in order representation of the subtree rooted at the slot
+        at *index*, using an explicit stack of indices
+
+        :param index: The level order index of the subtree's root
+        """
+        keys, data = self._keys, self._data
+        size = len(keys)
+        stack = []
+        while stack or index < size:
+            while index < size:
+                stack.append(index)
+                index = 2 * index + 1
+            index = stack.pop()
+            yield TreeEntry(keys[index], data[index])
+            index = 2 * index + 2
+
+    @property
+    def postorder(self):
+        """A generator containing the postorder representation of this
+        :class:`Tree`
+        """
+        return self.get_postorder(0)
+
+    def get_postorder(self, index):
+        """Build the postorder representation of the subtree rooted at the
+        slot at *index*, using an explicit stack of indices
+
+        :param index: The level order index of the subtree's root
+        """
+        keys, data = self._keys, self._data
+        size = len(keys)
+        stack, last = [], None
+        while stack or index < size:
+            if index < size:
+                stack.append(index)
+                index = 2 * index + 1
+                continue
+            right = 2 * stack[-1] + 2
+            if right < size and right != last:
+                index = right
+            else:
+                last = stack.pop()
+                yield TreeEntry(keys[last], data[last])
+
+    @property
+    def levelorder(self):
+        """A generator containing the levelorder representation of this
+        :class:`Tree`
+        """
+        return self.get_level_order(0)
+
+    def get_level_order(self, index):
+        """Build the level order representation of the subtree rooted at the
+        slot at *index*. Each level of the subtree is a contiguous run of
+        slots, so no queue is needed
+
+        :param index: The level order index of the subtree's root
+        """
+        keys, data = self._keys, self._data
+        size = len(keys)
+        first, width = index, 1
+        while first < size:
+            for i in range(first, min(first + width, size)):
+                yield TreeEntry(keys[i], data[i])
+            first, width = 2 * first + 1, 2 * width
+
+    def levels(self):
+        """Generate the entries of this :class:`CompleteBinaryTree` one level
+        at a time, as a list of the entries at each depth, starting with a
+        list of just the root
+        """
+        size = len(self._keys)
+        first, width = 0, 1
+        while first < size:
+            yield self._slice(first, first + width)
+            first, width = 2 * first + 1, 2 * width
+
+    def iter_level(self, depth):
+        """Generate the entries at *depth* in this :class:`CompleteBinaryTree`,
+        in level order, where the root is at depth 0. The level is sliced
+        directly from the backing lists
+
+        :param depth: The depth of the entries to generate
+        :raises: ValueError if *depth* is negative
+        """
+        if depth < 0:
+            raise ValueError('depth must not be negative')
+        first = 2 ** depth - 1
+        if first < len(self._keys):
+            for entry in self._slice(first, 2 * first + 1):
+                yield entry
+
+    def _slice(self, start, stop):
+        """Return the entries in slots *start* up to *stop* as a list
+
+        :param start: The first index to include
+        :param stop: The index to stop before
+        """
+        return [TreeEntry(key, value) for key, value in
+                zip(self._keys[start:stop], self._data[start:stop])]
@@ -1,12 +1,31 @@
 # -*- coding: utf-8 -*-
+import os
+import pickle
+import shutil
+import sys
+import tempfile
 import unittest
 
+from array import array
+
 from structs.arrays import (prev, BaseList, BitArray, SortedList,
-                            CircularArray, ParallelArray)
+                            CircularArray, DictEncodedColumn, RunLengthColumn,
+                            ParallelArray, SharedParallelArray,
+                            ChunkedParallelArray)
 
 __author__ = 'Jon Nappi'
 
 
+def score(age, height):
+    """Module level, and so picklable, function for parallel_map tests"""
+    return age * height
+
+
+def total(result, age, name):
+    """Module level, and so picklable, function for parallel_reduce tests"""
+    return result + age + len(name)
+
+
 class TestBaseList(unittest.TestCase):
     """Basic tests for structs.arrays.BaseList"""
 
@@ -349,3 +368,536 @@ class ParallelArrayTest(unittest.TestCase):
     def test_not_implemented(self):
         with self.assertRaises(NotImplementedError):
             ParallelArray.append(self.list)
+
+    def test_extend_records(self):
+        self.list.extend([('Jane Smith', 23), ('Jim Beam', 40)])
+        self.assertEqual(self.list[-1], ('Jim Beam', 40))
+        self.assertEqual(len(self.list.ages), 4)
+
+        with self.assertRaises(TypeError):
+            self.list.extend([('Jane Smith',)])
+        with self.assertRaises(ValueError):
+            self.list.extend(ParallelArray('ages', 'names'))
+
+    def test_extend_columns(self):
+        self.list.extend_columns(names=['Jane Smith', 'Jim Beam'],
+                                 ages=(x for x in (23, 40)))
+        self.assertEqual(self.list.names[2:], ['Jane Smith', 'Jim Beam'])
+        self.assertEqual(self.list[3], ('Jim Beam', 40))
+
+        with self.assertRaises(KeyError):
+            self.list.extend_columns(names=['Jane Smith'])
+        with self.assertRaises(ValueError):
+            self.list.extend_columns(names=['Jane Smith'], ages=[1, 2])
+        self.assertEqual(len(self.list), 4)
+
+    def test_from_columns(self):
+        arr = ParallelArray.from_columns(keys=('names', 'ages'),
+                                         ages=[25, 50],
+                                         names=['John Smith', 'James Bond'])
+        self.assertEqual(arr, self.list)
+        self.assertEqual(arr.as_dict(), self.list.as_dict())
+
+    def test_from_records(self):
+        arr = ParallelArray.from_records(iter(self.list), 'names', 'ages')
+        self.assertEqual(arr, self.list)
+        self.assertEqual(len(arr), 2)
+
+    def test_schema_cache(self):
+        self.assertIs(type(self.list), type(self.second))
+        self.assertIsInstance(self.list, ParallelArray)
+        self.assertIsNot(type(self.list), type(ParallelArray('ages', 'names')))
+        self.assertFalse(hasattr(self.list, '__dict__'))
+
+        with self.assertRaises(ValueError):
+            ParallelArray('names', 'names')
+        with self.assertRaises(ValueError):
+            ParallelArray('not a key')
+
+    def test_underscore_keys(self):
+        arr = ParallelArray('_id', 'name')
+        arr.append(1, 'a')
+        self.assertEqual(arr[0], (1, 'a'))
+        self.assertEqual(arr._id, [1])
+        self.assertEqual(pickle.loads(pickle.dumps(arr)), arr)
+        for key in ('_keys', '_schema_of', '_schemas', '__private', '_self'):
+            with self.assertRaises(ValueError):
+                ParallelArray(key)
+
+    def test_copy_is_independent(self):
+        copied = self.list.copy()
+        copied.append('Jane Smith', 23)
+        self.assertEqual(len(self.list), 2)
+        self.assertEqual(len(copied), 3)
+
+    def test_pickle(self):
+        loaded = pickle.loads(pickle.dumps(self.list))
+        self.assertEqual(loaded, self.list)
+        self.assertIs(type(loaded), type(self.list))
+
+
+class ParallelArrayFileTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'people.pa')
+        self.list = ParallelArray.from_columns(
+            keys=('names', 'ages', 'heights', 'ids'),
+            typecodes={'ids': 'I'},
+            names=['John Smith', 'James Bond', 'Zoë'],
+            ages=[25, 50, 3],
+            heights=[1.8, 1.9, 0.9],
+            ids=[7, 8, 9])
+        self.list.save(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_typecodes(self):
+        self.assertIsInstance(self.list.ids, array)
+        self.assertIsInstance(self.list.names, list)
+        self.assertEqual(self.list.typecodes, {'ids': 'I'})
+
+        with self.assertRaises(KeyError):
+            ParallelArray('names', typecodes={'ages': 'q'})
+        with self.assertRaises(ValueError):
+            ParallelArray('names', typecodes={'names': 'z'})
+
+    def test_open_mmap(self):
+        loaded = ParallelArray.open(self.path)
+        self.assertEqual(loaded.as_list(), self.list.as_list())
+        self.assertEqual(loaded[2], ('Zoë', 3, 0.9, 9))
+        self.assertEqual(loaded.names[-2:], ['James Bond', 'Zoë'])
+        self.assertEqual(list(reversed(loaded))[0], ('Zoë', 3, 0.9, 9))
+        self.assertEqual(loaded.typecodes,
+                         {'ages': 'q', 'heights': 'd', 'ids': 'I'})
+
+        with self.assertRaises(TypeError):
+            loaded.ages[0] = 12
+
+    def test_open_copy(self):
+        loaded = ParallelArray.open(self.path, mmap=False)
+        self.assertEqual(loaded.as_list(), self.list.as_list())
+        loaded.append('Jane Smith', 23, 1.7, 10)
+        self.assertEqual(len(loaded), 4)
+
+    def test_resave(self):
+        path = os.path.join(self.dir, 'copy.pa')
+        ParallelArray.open(self.path).save(path)
+        self.assertEqual(ParallelArray.open(path), self.list)
+
+    def test_invalid(self):
+        with self.assertRaises(TypeError):
+            ParallelArray.from_columns(values=[1, 'a']).save(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a parallel array')
+        with self.assertRaises(ValueError):
+            ParallelArray.open(self.path)
+
+
+class ParallelArrayGroupByTest(unittest.TestCase):
+    def setUp(self):
+        self.list = ParallelArray.from_columns(
+            keys=('host', 'region', 'bytes'),
+            host=['a', 'b', 'a', 'c', 'b', 'a'],
+            region=['us', 'eu', 'us', 'us', 'eu', 'eu'],
+            bytes=[10, 20, 30, 40, 50, 60])
+
+    def tearDown(self):
+        self.list = None
+
+    def test_agg(self):
+        res = self.list.group_by('host').agg(
+            bytes='sum', smallest=('bytes', 'min'), largest=('bytes', 'max'),
+            rows=('bytes', 'count'), mean=('bytes', 'mean'))
+        self.assertEqual(res.as_list(), [('a', 100, 10, 60, 3, 100 / 3),
+                                         ('b', 70, 20, 50, 2, 35.0),
+                                         ('c', 40, 40, 40, 1, 40.0)])
+
+    def test_multiple_keys(self):
+        res = self.list.group_by('host', 'region').agg(bytes='sum')
+        self.assertEqual(sorted(res), [('a', 'eu', 60), ('a', 'us', 40),
+                                       ('b', 'eu', 70), ('c', 'us', 40)])
+
+    def test_presorted(self):
+        self.list = ParallelArray.from_records(sorted(self.list),
+                                               'host', 'region', 'bytes')
+        res = self.list.group_by('host', presorted=True).agg(bytes='sum')
+        self.assertEqual(res.as_list(), [('a', 100), ('b', 70), ('c', 40)])
+
+        with self.assertRaises(ValueError):
+            self.list.group_by('region', presorted=True).agg(bytes='sum')
+
+        unsorted = ParallelArray.from_records([('b', 1), ('a', 2)],
+                                              'host', 'bytes')
+        with self.assertRaises(ValueError):
+            unsorted.group_by('host', presorted=True).agg(bytes='sum')
+
+    def test_empty(self):
+        res = ParallelArray('a', 'b').group_by('a', 'b').agg(c=('a', 'sum'))
+        self.assertEqual(len(res), 0)
+        self.assertEqual(res.as_dict(), {'a': [], 'b': [], 'c': []})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.list.group_by()
+        with self.assertRaises(KeyError):
+            self.list.group_by('name')
+        with self.assertRaises(KeyError):
+            self.list.group_by('host').agg(name='sum')
+        with self.assertRaises(ValueError):
+            self.list.group_by('host').agg(bytes='median')
+
+
+class ParallelArrayJoinTest(unittest.TestCase):
+    def setUp(self):
+        self.hosts = ParallelArray.from_columns(
+            keys=('host', 'bytes'),
+            host=['b', 'a', 'c', 'a', 'd'],
+            bytes=[10, 20, 30, 40, 50])
+        self.regions = ParallelArray.from_columns(
+            keys=('host', 'region'),
+            host=['a', 'b', 'c', 'c'],
+            region=['us', 'eu', 'us', 'ap'])
+
+    def tearDown(self):
+        self.hosts = self.regions = None
+
+    def test_inner(self):
+        res = self.hosts.join(self.regions, on='host')
+        self.assertEqual(res._keys, ('host', 'bytes', 'region'))
+        self.assertEqual(res.as_list(), [('b', 10, 'eu'), ('a', 20, 'us'),
+                                         ('c', 30, 'us'), ('c', 30, 'ap'),
+                                         ('a', 40, 'us')])
+        # Building from the smaller side preserves the same ordering
+        res = self.regions.join(self.hosts, on=('host',))
+        self.assertEqual(res.as_list(), [('a', 'us', 20), ('a', 'us', 40),
+                                         ('b', 'eu', 10), ('c', 'us', 30),
+                                         ('c', 'ap', 30)])
+
+    def test_left(self):
+        res = self.hosts.join(self.regions, on='host', how='left')
+        self.assertEqual(len(res), 6)
+        self.assertEqual(res[-1], ('d', 50, None))
+
+    def test_presorted(self):
+        hosts = ParallelArray.from_records(sorted(self.hosts),
+                                           'host', 'bytes')
+        regions = ParallelArray.from_records(sorted(self.regions),
+                                             'host', 'region')
+        for how in ('inner', 'left'):
+            merged = hosts.join(regions, on='host', how=how, presorted=True)
+            hashed = hosts.join(regions, on='host', how=how)
+            self.assertEqual(merged.as_list(), hashed.as_list())
+
+    def test_presorted_unsorted(self):
+        left = ParallelArray.from_columns(id=[3, 1, 2], x=[30, 10, 20])
+        right = ParallelArray.from_columns(id=[1, 2, 3], y=[1, 2, 3])
+        with self.assertRaises(ValueError):
+            left.join(right, on='id', presorted=True)
+        with self.assertRaises(ValueError):
+            right.join(left, on='id', presorted=True)
+
+    def test_schema(self):
+        hosts = ParallelArray.from_records(self.hosts, 'host', 'bytes',
+                                           typecodes={'bytes': 'l'},
+                                           encodings={'host': 'dict'})
+        regions = ParallelArray.from_records(self.regions, 'host', 'region',
+                                             encodings={'region': 'rle'})
+        res = hosts.join(regions, on='host')
+        self.assertEqual(res.typecodes, {'bytes': 'l'})
+        self.assertEqual(res.encodings, {'host': 'dict', 'region': 'rle'})
+        self.assertIsInstance(res.bytes, array)
+        self.assertIsInstance(res.host, DictEncodedColumn)
+        self.assertIsInstance(res.region, RunLengthColumn)
+        self.assertEqual(res.as_list(),
+                         self.hosts.join(self.regions, on='host').as_list())
+
+        counts = ParallelArray.from_records([('a', 1), ('b', 2)], 'host',
+                                            'count', typecodes={'count': 'l'})
+        res = hosts.join(counts, on='host', how='left')
+        self.assertEqual(res.typecodes, {'bytes': 'l'})
+        self.assertEqual(res.count[-1], None)
+        res = hosts.join(regions, on='host', how='left')
+        self.assertIsInstance(res.region, RunLengthColumn)
+        self.assertEqual(res[-1], ('d', 50, None))
+
+    def test_invalid(self):
+        with self.assertRaises(KeyError):
+            self.hosts.join(self.regions, on='region')
+        with self.assertRaises(ValueError):
+            self.hosts.join(self.regions, on='host', how='outer')
+        with self.assertRaises(ValueError):
+            self.hosts.join(self.hosts, on='host')
+
+
+class ChunkedParallelArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.list = ChunkedParallelArray('ids', 'names', chunk_size=4,
+                                         max_chunks_in_memory=2,
+                                         spill_dir=self.dir)
+        self.list.extend((i, str(i)) for i in range(18))
+
+    def tearDown(self):
+        self.list.close()
+        shutil.rmtree(self.dir)
+
+    def test_extend(self):
+        self.assertEqual(len(self.list), 18)
+        self.assertEqual(list(self.list), [(i, str(i)) for i in range(18)])
+        self.assertEqual([len(c) for c in self.list.iter_chunks()],
+                         [4, 4, 4, 4, 2])
+
+    def test_extend_exact(self):
+        self.list.extend((i, str(i)) for i in range(18, 20))
+        self.assertEqual([len(c) for c in self.list.iter_chunks()],
+                         [4, 4, 4, 4, 4])
+        self.list.extend([])
+        self.assertEqual([len(c) for c in self.list.iter_chunks()],
+                         [4, 4, 4, 4, 4])
+        self.list.extend([(20, '20')])
+        self.assertEqual([len(c) for c in self.list.iter_chunks()],
+                         [4, 4, 4, 4, 4, 1])
+        self.assertEqual(self.list[-1], (20, '20'))
+
+    def test_spill(self):
+        self.assertEqual(self.list.spilled, 3)
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        self.assertEqual(self.list[1], (1, '1'))
+        self.assertEqual(self.list.spilled, 3)
+
+    def test_append(self):
+        self.list.append(18, '18')
+        self.list.append(19, '19')
+        self.list.append(20, '20')
+        self.assertEqual(self.list[-1], (20, '20'))
+        self.assertEqual(len(list(self.list.iter_chunks())), 6)
+
+    def test_setitem(self):
+        self.list[2] = (2, 'two')
+        for chunk in self.list.iter_chunks():
+            pass  # Force the modified chunk to be spilled and paged back in
+        self.assertEqual(self.list[2], (2, 'two'))
+
+        with self.assertRaises(IndexError):
+            self.list[18]
+        with self.assertRaises(TypeError):
+            self.list[1:2]
+
+    def test_close(self):
+        self.list.close()
+        self.assertEqual(os.listdir(self.dir), [])
+        self.assertEqual(len(self.list), 0)
+
+
+class DictEncodedColumnTest(unittest.TestCase):
+    def setUp(self):
+        self.column = DictEncodedColumn(['us', 'eu', 'us', 'ap', 'us'])
+
+    def tearDown(self):
+        self.column = None
+
+    def test_encoding(self):
+        self.assertEqual(list(self.column.codes), [0, 1, 0, 2, 0])
+        self.assertEqual(self.column.values, ['us', 'eu', 'ap'])
+        self.assertEqual(self.column, ['us', 'eu', 'us', 'ap', 'us'])
+
+    def test_mutation(self):
+        self.column.append('eu')
+        self.column.insert(0, 'sa')
+        self.column[1] = 'eu'
+        del self.column[2]
+        self.assertEqual(self.column, ['sa', 'eu', 'us', 'ap', 'us', 'eu'])
+        self.assertEqual(self.column.pop(), 'eu')
+        self.assertEqual(self.column.count('us'), 2)
+        self.assertEqual(self.column.count('af'), 0)
+        self.assertIn('sa', self.column)
+
+    def test_extend(self):
+        self.column.extend(DictEncodedColumn(['ap', 'af']))
+        self.assertEqual(self.column[-2:], ['ap', 'af'])
+        self.assertEqual(len(self.column.values), 4)
+
+    def test_indices(self):
+        self.assertEqual(self.column.indices(lambda v: v != 'us'), [1, 3])
+
+
+class RunLengthColumnTest(unittest.TestCase):
+    def setUp(self):
+        self.column = RunLengthColumn([1, 1, 1, 2, 2, 3])
+
+    def tearDown(self):
+        self.column = None
+
+    def test_encoding(self):
+        self.assertEqual(self.column.values, [1, 2, 3])
+        self.assertEqual(self.column.ends, [3, 5, 6])
+        self.assertEqual(self.column.lengths, [3, 2, 1])
+        self.assertEqual(self.column[4], 2)
+        self.assertEqual(self.column[-1], 3)
+        self.assertEqual(self.column[2:4], [1, 2])
+        with self.assertRaises(IndexError):
+            self.column[6]
+
+    def test_append(self):
+        self.column.append(3)
+        self.column.append(1)
+        self.assertEqual(self.column.values, [1, 2, 3, 1])
+        self.assertEqual(len(self.column), 8)
+
+    def test_setitem(self):
+        self.column[1] = 5
+        self.assertEqual(self.column, [1, 5, 1, 2, 2, 3])
+        self.column[1] = 1
+        self.assertEqual(self.column.values, [1, 2, 3])
+        self.column[5] = 2
+        self.assertEqual(self.column.ends, [3, 6])
+
+    def test_insert_delete(self):
+        self.column.insert(0, 0)
+        self.column.insert(3, 1)
+        self.column.insert(100, 4)
+        self.assertEqual(self.column, [0, 1, 1, 1, 1, 2, 2, 3, 4])
+        del self.column[5]
+        del self.column[5]
+        self.assertEqual(self.column.values, [0, 1, 3, 4])
+        self.assertEqual(self.column.pop(0), 0)
+        self.assertEqual(self.column, [1, 1, 1, 1, 3, 4])
+
+    def test_reverse_count(self):
+        self.column.reverse()
+        self.assertEqual(self.column, [3, 2, 2, 1, 1, 1])
+        self.assertEqual(self.column.count(1), 3)
+        self.assertEqual(self.column.indices(lambda v: v < 3), [1, 2, 3, 4, 5])
+
+
+class EncodedParallelArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.list = ParallelArray.from_columns(
+            keys=('host', 'day', 'bytes'),
+            encodings={'host': 'dict', 'day': 'rle'},
+            host=['a', 'b', 'a', 'c', 'b', 'a'],
+            day=[1, 1, 1, 2, 2, 3],
+            bytes=[10, 20, 30, 40, 50, 60])
+
+    def tearDown(self):
+        self.list = None
+
+    def test_columns(self):
+        self.assertIsInstance(self.list.host, DictEncodedColumn)
+        self.assertIsInstance(self.list.day, RunLengthColumn)
+        self.assertEqual(self.list.encodings, {'host': 'dict', 'day': 'rle'})
+        self.assertEqual(self.list[3], ('c', 2, 40))
+
+        with self.assertRaises(ValueError):
+            ParallelArray('host', encodings={'host': 'zip'})
+        with self.assertRaises(ValueError):
+            ParallelArray('host', typecodes={'host': 'q'},
+                          encodings={'host': 'rle'})
+
+    def test_mutation(self):
+        self.list.append('d', 3, 70)
+        self.list.insert(0, ('d', 0, 0))
+        self.assertEqual(self.list.pop(), ('d', 3, 70))
+        self.assertEqual(self.list.pop(0), ('d', 0, 0))
+        self.assertEqual(self.list.count('a'), 3)
+
+        copied = self.list.copy()
+        copied.reverse()
+        self.assertEqual(copied[0], ('a', 3, 60))
+        self.assertEqual(self.list[0], ('a', 1, 10))
+
+        self.list.clear()
+        self.assertEqual(len(self.list), 0)
+
+    def test_pickle(self):
+        loaded = pickle.loads(pickle.dumps(self.list))
+        self.assertEqual(loaded.as_list(), self.list.as_list())
+        self.assertEqual(loaded.encodings, self.list.encodings)
+
+    def test_filter(self):
+        res = self.list.filter('host', lambda host: host == 'a')
+        self.assertEqual(res.as_list(), [('a', 1, 10), ('a', 1, 30),
+                                         ('a', 3, 60)])
+        self.assertIsInstance(res.host, DictEncodedColumn)
+
+        res = self.list.filter('day', lambda day: day > 1)
+        self.assertEqual(res.bytes, [40, 50, 60])
+        res = self.list.filter('bytes', lambda size: size > 50)
+        self.assertEqual(res.as_list(), [('a', 3, 60)])
+
+        with self.assertRaises(KeyError):
+            self.list.filter('name', bool)
+
+    def test_group_by(self):
+        res = self.list.group_by('host').agg(bytes='sum')
+        self.assertEqual(res.as_list(), [('a', 100), ('b', 70), ('c', 40)])
+        res = self.list.group_by('day').agg(bytes='max')
+        self.assertEqual(res.as_list(), [(1, 30), (2, 50), (3, 60)])
+        res = self.list.group_by('host', 'day').agg(bytes='count')
+        self.assertEqual(res[0], ('a', 1, 2))
+
+
+class SharedParallelArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.list = ParallelArray.from_columns(
+            keys=('names', 'ages', 'heights'),
+            typecodes={'ages': 'i'},
+            names=['n{}'.format(i) for i in range(50)],
+            ages=list(range(50)),
+            heights=[i / 10 for i in range(50)])
+
+    def tearDown(self):
+        self.list = None
+
+    @unittest.skipIf(sys.version_info >= (3, 8),
+                     'multiprocessing.shared_memory is available')
+    def test_share_unavailable(self):
+        with self.assertRaises(RuntimeError):
+            self.list.share()
+        with self.assertRaises(RuntimeError):
+            SharedParallelArray.attach('missing')
+
+    @unittest.skipUnless(sys.version_info >= (3, 8),
+                         'multiprocessing.shared_memory requires Python 3.8')
+    def test_share(self):
+        with self.list.share() as shared:
+            self.assertIsInstance(shared, SharedParallelArray)
+            self.assertEqual(shared.as_list(), self.list.as_list())
+            self.assertEqual(shared.typecodes,
+                             {'ages': 'i', 'heights': 'd'})
+
+            attached = pickle.loads(pickle.dumps(shared))
+            self.assertEqual(attached.name, shared.name)
+            self.assertEqual(attached[3], ('n3', 3, 0.3))
+            attached.close()
+
+    @unittest.skipUnless(sys.version_info >= (3, 8),
+                         'multiprocessing.shared_memory requires Python 3.8')
+    def test_share_keys(self):
+        with self.list.share('ages') as shared:
+            self.assertEqual(shared._keys, ('ages',))
+        with self.assertRaises(KeyError):
+            self.list.share('weights')
+
+    @unittest.skipUnless(sys.version_info >= (3, 8),
+                         'multiprocessing.shared_memory requires Python 3.8')
+    def test_parallel_map(self):
+        res = self.list.parallel_map(score, ('ages', 'heights'), workers=3)
+        self.assertEqual(res, [a * h for a, h in zip(self.list.ages,
+                                                     self.list.heights)])
+
+        with self.list.share() as shared:
+            res = shared.parallel_map(abs, 'ages', workers=2)
+        self.assertEqual(res, list(range(50)))
+
+    @unittest.skipUnless(sys.version_info >= (3, 8),
+                         'multiprocessing.shared_memory requires Python 3.8')
+    def test_parallel_reduce(self):
+        res = self.list.parallel_reduce(total, ('ages', 'names'), 0,
+                                        workers=4)
+        self.assertEqual(res, sum(range(50)) + sum(map(len, self.list.names)))
+
+        empty = ParallelArray('ages', 'names')
+        self.assertEqual(empty.parallel_reduce(total, ('ages', 'names'), 0), 0)
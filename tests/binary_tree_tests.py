@@ -1,10 +1,27 @@
 # -*- coding: utf-8 -*-
+import random
 import unittest
-from structs.trees.binary import BinarySearchTree, BinaryNode
+from structs.trees.base import Tree
+from structs.trees.binary import (BinaryTree, BinarySearchTree, BinaryNode,
+                                  AVLTree, RedBlackTree,
+                                  CompleteBinaryTree, _BalancedSearchTree)
 
 __author__ = 'Jon Nappi'
 
 
+def chain(size):
+    """Build a degenerate tree of *size* nodes, each the right child of the
+    last
+    """
+    tree = BinarySearchTree()
+    tree.root = node = BinaryNode(0, '0')
+    for key in range(1, size):
+        node.right_child = BinaryNode(key, str(key), parent=node)
+        node = node.right_child
+    tree.size = size
+    return tree
+
+
 class BinaryNodeTests(unittest.TestCase):
     def setUp(self):
         self.tree = BinarySearchTree()
@@ -81,6 +98,25 @@ class BinaryNodeTests(unittest.TestCase):
         self.tree.get(1).splice_out()
         self.assertEqual(self.tree.root.left_child, self.tree.get(2))
 
+    def test_slots(self):
+        for node_type in (BinaryNode, AVLTree.node_type,
+                          RedBlackTree.node_type):
+            node = node_type(0, 'Root')
+            self.assertFalse(hasattr(node, '__dict__'))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
+    def test_leaf_and_children(self):
+        self.tree[1] = 'Root'
+        self.assertTrue(self.tree.root.is_leaf())
+        self.assertFalse(self.tree.root.has_children())
+        self.tree[2] = 'Right'
+        self.assertFalse(self.tree.root.is_leaf())
+        self.assertTrue(self.tree.root.has_children())
+        self.assertTrue(self.tree[2].is_leaf())
+        self.assertTrue(self.tree[2].is_right_child())
+        self.assertFalse(self.tree[2].is_left_child())
+
     def test_find_max(self):
         self.tree[5] = 'Root'
         self.tree[3] = 'Left Child'
@@ -107,6 +143,12 @@ class BinarySearchTreeTests(unittest.TestCase):
         self.assertEqual(self.tree.root, self.tree.get(0))
         self.assertEqual(self.tree.root, self.tree[0])
 
+    def test_put_sorted(self):
+        for key in range(2000):
+            self.tree.put(key, str(key))
+        self.assertEqual(len(self.tree), 2000)
+        self.assertEqual(self.tree.get(1999).data, '1999')
+
     def test_put(self):
         self.tree.put(0, 'Root')
         self.tree.put(1, 'Not Root')
@@ -270,3 +312,352 @@ class BinarySearchTreeTests(unittest.TestCase):
 
         with self.assertRaises(TypeError):
             self.tree += 5
+
+
+class BalancedTreeTestsMixin:
+    tree_type = None
+
+    def setUp(self):
+        self.tree = self.tree_type()
+
+    def tearDown(self):
+        self.tree = None
+
+    def check(self, node):
+        """Check the subtree at *node* is ordered, linked and balanced,
+        returning its height
+        """
+        raise NotImplementedError
+
+    def check_links(self, node):
+        for child in (node.left_child, node.right_child):
+            if child is not None:
+                self.assertIs(child.parent, node)
+        if node.left_child is not None:
+            self.assertLess(node.left_child.key, node.key)
+        if node.right_child is not None:
+            self.assertGreater(node.right_child.key, node.key)
+
+    def test_sorted_inserts(self):
+        for key in range(5000):
+            self.tree[key] = str(key)
+        self.assertEqual(len(self.tree), 5000)
+        self.assertIsNone(self.tree.root.parent)
+        self.assertLessEqual(self.check(self.tree.root), 26)
+        self.assertEqual(self.tree.get(4999).data, '4999')
+        self.assertEqual(self.tree.get(1234).data, '1234')
+
+    def test_replace(self):
+        self.tree[1] = 'a'
+        self.tree[1] = 'b'
+        self.assertEqual(len(self.tree), 1)
+        self.assertEqual(self.tree.get(1).data, 'b')
+
+    def test_random_operations(self):
+        rng = random.Random(7)
+        keys = set()
+        for _ in range(3000):
+            key = rng.randrange(400)
+            if key in keys and rng.random() < 0.5:
+                self.tree.delete(key)
+                keys.discard(key)
+            else:
+                self.tree[key] = key
+                keys.add(key)
+        self.assertEqual(len(self.tree), len(keys))
+        self.assertEqual([node.key for node in self.tree], sorted(keys))
+        self.check(self.tree.root)
+        for key in sorted(keys):
+            self.tree.delete(key)
+            if self.tree.root is not None:
+                self.check(self.tree.root)
+        self.assertIsNone(self.tree.root)
+        with self.assertRaises(KeyError):
+            self.tree.delete(1)
+
+
+class AVLTreeTests(BalancedTreeTestsMixin, unittest.TestCase):
+    tree_type = AVLTree
+
+    def check(self, node):
+        if node is None:
+            return 0
+        self.check_links(node)
+        left, right = self.check(node.left_child), self.check(node.right_child)
+        self.assertLessEqual(abs(left - right), 1)
+        self.assertEqual(node.height, 1 + max(left, right))
+        return node.height
+
+
+class RedBlackTreeTests(BalancedTreeTestsMixin, unittest.TestCase):
+    tree_type = RedBlackTree
+
+    def check(self, node):
+        self.assertFalse(self.tree.root.red)
+        return self.check_black(node)[1]
+
+    def check_black(self, node):
+        """Return the black height and the height of the subtree at *node*"""
+        if node is None:
+            return 1, 0
+        self.check_links(node)
+        if node.red:
+            for child in (node.left_child, node.right_child):
+                self.assertFalse(child is not None and child.red)
+        left, left_height = self.check_black(node.left_child)
+        right, right_height = self.check_black(node.right_child)
+        self.assertEqual(left, right)
+        return left + (not node.red), 1 + max(left_height, right_height)
+
+
+class BalancedSearchTreeTests(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            _BalancedSearchTree()
+
+        class Unbalanced(_BalancedSearchTree):
+            def _inserted(self, node):
+                pass
+
+        tree = Unbalanced()
+        tree[1] = 'a'
+        self.assertEqual(tree.get(1).data, 'a')
+
+
+class TraversalTests(unittest.TestCase):
+    def setUp(self):
+        self.tree = BinarySearchTree()
+        for key in [5, 3, 8, 1, 4, 7, 9, 2, 6]:
+            self.tree[key] = str(key)
+
+    def tearDown(self):
+        self.tree = None
+
+    def keys(self, nodes):
+        return [node.key for node in nodes]
+
+    def test_orders(self):
+        self.assertEqual(self.keys(self.tree.in_order), list(range(1, 10)))
+        self.assertEqual(self.keys(self.tree.preorder),
+                         [5, 3, 1, 2, 4, 8, 7, 6, 9])
+        self.assertEqual(self.keys(self.tree.postorder),
+                         [2, 1, 4, 3, 6, 7, 9, 8, 5])
+        self.assertEqual(self.keys(self.tree.morris_in_order),
+                         list(range(1, 10)))
+
+    def test_generic_orders(self):
+        root = self.tree.root
+        self.assertEqual(self.keys(Tree.get_in_order(self.tree, root)),
+                         self.keys(self.tree.in_order))
+        self.assertEqual(self.keys(Tree.get_preorder(self.tree, root)),
+                         self.keys(self.tree.preorder))
+        self.assertEqual(self.keys(Tree.get_postorder(self.tree, root)),
+                         self.keys(self.tree.postorder))
+
+    def test_empty(self):
+        tree = BinarySearchTree()
+        self.assertEqual(list(tree.in_order), [])
+        self.assertEqual(list(tree.preorder), [])
+        self.assertEqual(list(tree.postorder), [])
+        self.assertEqual(list(tree.morris_in_order), [])
+
+    def test_deep(self):
+        tree = chain(20000)
+        expected = list(range(20000))
+        self.assertEqual(self.keys(tree.in_order), expected)
+        self.assertEqual(self.keys(tree.preorder), expected)
+        self.assertEqual(self.keys(tree.postorder), expected[::-1])
+        self.assertEqual(self.keys(tree.morris_in_order), expected)
+        self.assertEqual(self.keys(Tree.get_in_order(tree, tree.root)),
+                         expected)
+
+    def test_morris_restores_tree(self):
+        before = [(n.key, n.left_child, n.right_child)
+                  for n in self.tree.preorder]
+        walk = self.tree.morris_in_order
+        self.assertEqual([next(walk).key for _ in range(3)], [1, 2, 3])
+        walk.close()
+        after = [(n.key, n.left_child, n.right_child)
+                 for n in self.tree.preorder]
+        self.assertEqual(before, after)
+
+
+class LevelOrderTests(unittest.TestCase):
+    def setUp(self):
+        self.tree = BinarySearchTree()
+        for key in [5, 3, 8, 1, 4, 7, 9, 2, 6]:
+            self.tree[key] = str(key)
+
+    def tearDown(self):
+        self.tree = None
+
+    def test_level_order(self):
+        self.assertEqual([n.key for n in self.tree.levelorder],
+                         [5, 3, 8, 1, 4, 7, 9, 2, 6])
+        self.assertEqual([n.key for n in self.tree.get_level_order(
+            self.tree.get(3))], [3, 1, 4, 2])
+
+    def test_levels(self):
+        self.assertEqual([[n.key for n in level]
+                          for level in self.tree.levels()],
+                         [[5], [3, 8], [1, 4, 7, 9], [2, 6]])
+        self.assertEqual(list(BinarySearchTree().levels()), [])
+
+    def test_iter_level(self):
+        self.assertEqual([n.key for n in self.tree.iter_level(2)],
+                         [1, 4, 7, 9])
+        self.assertEqual(list(self.tree.iter_level(10)), [])
+        with self.assertRaises(ValueError):
+            list(self.tree.iter_level(-1))
+
+    def test_deep(self):
+        tree = chain(20000)
+        self.assertEqual([n.key for n in tree.levelorder],
+                         list(range(20000)))
+        self.assertEqual(sum(1 for _ in tree.levels()), 20000)
+        self.assertEqual([n.key for n in tree.iter_level(19999)], [19999])
+
+    def test_generic(self):
+        root = self.tree.root
+        self.assertEqual([n.key for n in Tree.get_level_order(self.tree,
+                                                               root)],
+                         [n.key for n in self.tree.levelorder])
+
+
+class BinaryTreeTests(unittest.TestCase):
+    """Test the unsorted :class:`BinaryTree` insertion"""
+
+    def test_put_fills_next_slot(self):
+        tree = BinaryTree()
+        for key in range(15):
+            tree.put(key, str(key))
+        self.assertEqual(len(tree), 15)
+        self.assertEqual([n.key for n in tree.levelorder], list(range(15)))
+        self.assertEqual(sum(1 for _ in tree.preorder), 15)
+
+    def test_traversals_follow_shape(self):
+        tree = BinaryTree()
+        for key in [5, 9, 1, 5]:
+            tree.put(key, str(key))
+        self.assertEqual([n.key for n in tree.in_order], [5, 9, 5, 1])
+        self.assertEqual([n.key for n in tree.preorder], [5, 9, 5, 1])
+        self.assertEqual([n.key for n in tree.postorder], [5, 9, 1, 5])
+        # The key compared walk of earlier releases is still available
+        self.assertEqual([n.key for n in Tree.get_in_order(tree, tree.root)],
+                         [1, 5, 5, 9])
+        tree = BinaryTree()
+        for key in [5, 5, 1]:
+            tree.put(key, str(key))
+        self.assertEqual([n.key for n in tree.in_order], [5, 5, 1])
+        self.assertEqual([n.key for n in Tree.get_in_order(tree, tree.root)],
+                         [1, 5])
+
+
+class CompleteBinaryTreeTests(unittest.TestCase):
+    """Test the array backed :class:`CompleteBinaryTree`"""
+
+    def setUp(self):
+        self.tree = CompleteBinaryTree()
+        for key in range(10):
+            self.tree.put(key, str(key))
+        # Built from the same keys in the same order, so shapes match
+        self.linked = BinaryTree()
+        for key in range(10):
+            self.linked.put(key, str(key))
+
+    def test_empty(self):
+        tree = CompleteBinaryTree()
+        self.assertEqual(len(tree), 0)
+        self.assertIsNone(tree.root)
+        self.assertNotIn(1, tree)
+        self.assertIsNone(tree.get(1))
+        self.assertEqual(list(tree.in_order), [])
+        self.assertEqual(list(tree.postorder), [])
+        self.assertEqual(list(tree.levels()), [])
+        with self.assertRaises(KeyError):
+            tree.delete(1)
+
+    def test_put_get(self):
+        self.assertEqual(len(self.tree), 10)
+        self.assertEqual(self.tree.root, (0, '0'))
+        self.assertEqual(self.tree[7].data, '7')
+        self.assertIn(9, self.tree)
+        self.assertNotIn(10, self.tree)
+        self.assertEqual(self.tree.get(10, 'missing'), 'missing')
+        self.tree[10] = '10'
+        self.assertEqual(self.tree.entry(10), (10, '10'))
+
+    def test_navigation(self):
+        self.assertIsNone(self.tree.parent_index(0))
+        self.assertEqual(self.tree.parent_index(9), 4)
+        self.assertEqual(self.tree.left_index(4), 9)
+        self.assertIsNone(self.tree.right_index(4))
+        self.assertIsNone(self.tree.left_index(5))
+        self.assertEqual(self.tree.index(6), 6)
+        with self.assertRaises(IndexError):
+            self.tree.entry(10)
+        with self.assertRaises(KeyError):
+            self.tree.index(10)
+
+    def test_traversals_match_linked_tree(self):
+        for name in ('preorder', 'in_order', 'postorder', 'levelorder'):
+            self.assertEqual([e.key for e in getattr(self.tree, name)],
+                             [n.key for n in getattr(self.linked, name)],
+                             name)
+        self.assertEqual([e.key for e in self.tree],
+                         [n.key for n in self.linked])
+
+    def test_subtree_traversals(self):
+        self.assertEqual([e.key for e in self.tree.get_preorder(1)],
+                         [1, 3, 7, 8, 4, 9])
+        self.assertEqual([e.key for e in self.tree.get_in_order(1)],
+                         [7, 3, 8, 1, 9, 4])
+        self.assertEqual([e.key for e in self.tree.get_postorder(1)],
+                         [7, 8, 3, 9, 4, 1])
+        self.assertEqual([e.key for e in self.tree.get_level_order(1)],
+                         [1, 3, 4, 7, 8, 9])
+
+    def test_levels(self):
+        self.assertEqual([[e.key for e in level]
+                          for level in self.tree.levels()],
+                         [[0], [1, 2], [3, 4, 5, 6], [7, 8, 9]])
+        self.assertEqual([e.key for e in self.tree.iter_level(3)],
+                         [7, 8, 9])
+        self.assertEqual(list(self.tree.iter_level(4)), [])
+        with self.assertRaises(ValueError):
+            list(self.tree.iter_level(-1))
+
+    def test_delete(self):
+        del self.tree[2]
+        self.assertEqual(len(self.tree), 9)
+        self.assertNotIn(2, self.tree)
+        self.assertEqual([e.key for e in self.tree.levelorder],
+                         [0, 1, 9, 3, 4, 5, 6, 7, 8])
+        self.tree.delete(8)
+        self.assertEqual(self.tree.entry(7), (7, '7'))
+        for key in (0, 1, 9, 3, 4, 5, 6, 7):
+            self.tree.delete(key)
+        self.assertIsNone(self.tree.root)
+
+    def test_root(self):
+        with self.assertRaises(AttributeError):
+            self.tree.root = self.tree.entry(3)
+        self.tree.root = None
+        self.assertEqual(len(self.tree), 0)
+        self.assertEqual(list(self.tree.preorder), [])
+        self.tree.put('a', 1)
+        self.assertEqual(self.tree.root, ('a', 1))
+        self.assertEqual(self.tree.size, 1)
+
+    def test_add(self):
+        combined = self.tree + self.linked
+        self.assertIsInstance(combined, CompleteBinaryTree)
+        self.assertEqual(len(combined), 20)
+
+    def test_large(self):
+        tree = CompleteBinaryTree()
+        for key in range(100000):
+            tree.put(key, key)
+        self.assertEqual(sum(1 for _ in tree.in_order), 100000)
+        self.assertEqual(sum(1 for _ in tree.levels()), 17)
+        self.assertEqual(tree.parent_index(tree.left_index(4999)), 4999)
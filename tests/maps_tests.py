@@ -1,7 +1,20 @@
 # -*- coding: utf-8 -*-
+import copy
+import os
+import pickle
+import random
+import shutil
+import sys
+import tempfile
+import time
 import unittest
+from collections import Counter, deque
+from threading import Thread
 
-from structs.maps import Dict, BiDirectionalMap, MultiMap
+from structs.arrays import SortedList
+from structs.maps import (Dict, BiDirectionalMap, MultiMap, ConcurrentDict,
+                          CacheDict, CacheStats, PersistentMap, MappedDict,
+                          FrozenDict, DictSnapshot, BiDirectionalSnapshot)
 
 __author__ = 'Jon Nappi'
 
@@ -20,6 +33,40 @@ class DictTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.dict += 12
 
+    def test_merge_last(self):
+        self.dict.merge({'a': 10}, {'a': 20, 'c': 3})
+        self.assertEqual(self.dict, {'a': 20, 'b': 2, 'c': 3})
+
+    def test_merge_first(self):
+        self.dict.merge({'a': 10, 'c': 3}, {'c': 30, 'd': 4},
+                        on_conflict='first')
+        self.assertEqual(self.dict, {'a': 1, 'b': 2, 'c': 3, 'd': 4})
+
+    def test_merge_sum(self):
+        self.dict.merge({'a': 10}, {'a': 100, 'c': 3}, on_conflict='sum')
+        self.assertEqual(self.dict, {'a': 111, 'b': 2, 'c': 3})
+
+    def test_merge_list(self):
+        other = {'b': [5]}
+        self.dict['b'] = [2]
+        self.dict.merge({'a': 10}, {'a': 20}, other, on_conflict='list')
+        self.assertEqual(self.dict, {'a': [1, 10, 20], 'b': [2, [5]]})
+        self.assertEqual(other, {'b': [5]})
+
+    def test_merge_callable(self):
+        self.dict.merge({'a': 5, 'b': 1}, on_conflict=max)
+        self.assertEqual(self.dict, {'a': 5, 'b': 2})
+
+    def test_merge_unknown(self):
+        with self.assertRaises(ValueError):
+            self.dict.merge({'a': 2}, on_conflict='middle')
+
+    def test_iadd_on_conflict(self):
+        self.dict.on_conflict = 'sum'
+        self.dict += {'a': 10}
+        self.assertEqual(self.dict['a'], 11)
+        self.assertEqual(Dict.on_conflict, 'last')
+
 
 class BiDirectionalMapTest(unittest.TestCase):
     def setUp(self):
@@ -111,6 +158,112 @@ class BiDirectionalMapTest(unittest.TestCase):
         for tup in expected:
             self.assertIn(tup, res)
 
+    def test_collision(self):
+        with self.assertRaises(ValueError):
+            self.dict['c'] = 1
+        self.assertEqual(self.dict, {'a': 1, 'b': 2})
+
+        d = BiDirectionalMap(a=1, b=2, overwrite=True)
+        d['c'] = 1
+        self.assertEqual(d, {'b': 2, 'c': 1})
+        self.assertEqual(d[1], 'c')
+        self.assertNotIn('a', d)
+
+    def test_remap_value(self):
+        self.dict['a'] = 3
+        self.assertNotIn(1, self.dict)
+        self.assertEqual(self.dict[3], 'a')
+
+    def test_inverse(self):
+        inverse = self.dict.inverse
+        self.assertEqual(inverse, {1: 'a', 2: 'b'})
+        inverse[3] = 'c'
+        self.assertEqual(self.dict['c'], 3)
+        self.assertIs(inverse.inverse._forward, self.dict._forward)
+
+    def test_delete(self):
+        del self.dict['a']
+        del self.dict[2]
+        self.assertEqual(len(self.dict), 0)
+        self.assertNotIn(1, self.dict)
+        with self.assertRaises(KeyError):
+            del self.dict['a']
+
+    def test_pop(self):
+        self.assertEqual(self.dict.pop(1), 'a')
+        self.assertEqual(self.dict.pop('a', None), None)
+        self.assertEqual(self.dict.popitem(), ('b', 2))
+        with self.assertRaises(KeyError):
+            self.dict.pop('b')
+
+    def test_setdefault(self):
+        self.assertEqual(self.dict.setdefault('a', 5), 1)
+        self.assertEqual(self.dict.setdefault('c', 3), 3)
+        self.assertEqual(self.dict[3], 'c')
+
+    def test_copy(self):
+        copied = self.dict.copy()
+        copied['c'] = 3
+        self.assertNotIn('c', self.dict)
+        self.assertEqual(list(iter(copied)), ['a', 'b', 'c'])
+
+        self.dict.clear()
+        self.assertEqual(len(self.dict), 0)
+        self.assertNotIn(1, self.dict)
+
+    def test_from_pairs(self):
+        d = BiDirectionalMap.from_pairs((k, v) for k, v in [('a', 1), ('b', 2)])
+        self.assertEqual(d, {'a': 1, 'b': 2})
+        self.assertEqual(d[2], 'b')
+
+    def test_update(self):
+        self.dict.update({'a': 2, 'b': 1}, c=3)
+        self.assertEqual(self.dict, {'a': 2, 'b': 1, 'c': 3})
+        self.assertEqual(self.dict.inverse, {2: 'a', 1: 'b', 3: 'c'})
+
+    def test_update_conflicts(self):
+        with self.assertRaises(ValueError) as ctx:
+            self.dict.update([('c', 1), ('d', 3), ('e', 3), ('f', 4),
+                              ('f', 5)])
+        msg = str(ctx.exception)
+        self.assertIn("1 is already mapped to 'a'", msg)
+        self.assertIn("3 is mapped to both", msg)
+        self.assertIn("'f' is mapped to both 4 and 5", msg)
+        self.assertEqual(self.dict, {'a': 1, 'b': 2})
+        self.assertEqual(self.dict.inverse, {1: 'a', 2: 'b'})
+
+    def test_update_value_as_key(self):
+        expected = BiDirectionalMap(a=1, b=2)
+        expected[1] = 'x'
+        self.dict.update({1: 'x'})
+        self.assertEqual(self.dict, expected)
+        self.assertEqual(self.dict, {'x': 1, 'b': 2})
+        self.assertEqual(self.dict.inverse, {1: 'x', 2: 'b'})
+        with self.assertRaises(ValueError):
+            self.dict.update({2: 'x'})
+        self.assertEqual(self.dict, {'x': 1, 'b': 2})
+
+    def test_update_overwrite(self):
+        d = BiDirectionalMap(a=1, b=2, overwrite=True)
+        d.update([('c', 1), ('d', 3), ('e', 3)])
+        self.assertEqual(d, {'b': 2, 'c': 1, 'e': 3})
+
+    def test_iadd(self):
+        self.dict += {'c': 3}
+        self.assertEqual(self.dict[3], 'c')
+        with self.assertRaises(ValueError):
+            self.dict += {'d': 3}
+        with self.assertRaises(TypeError):
+            self.dict += [('d', 4)]
+
+    def test_merge(self):
+        self.dict.merge({'a': 10}, {'c': 3}, on_conflict='sum')
+        self.assertEqual(self.dict, {'a': 11, 'b': 2, 'c': 3})
+        self.assertEqual(self.dict[11], 'a')
+        self.assertNotIn(1, self.dict)
+        with self.assertRaises(ValueError):
+            self.dict.merge({'d': 2})
+        self.assertEqual(self.dict.inverse, {11: 'a', 2: 'b', 3: 'c'})
 
 class MultiMapTest(unittest.TestCase):
     def setUp(self):
@@ -152,3 +305,760 @@ class MultiMapTest(unittest.TestCase):
 
         expected = dict(a=1, b=[2, 12], c=3, d=4)
         self.assertEqual(self.map, expected)
+
+    def test_merge(self):
+        self.map.merge({'a': 3}, {'a': 4, 'c': 5})
+        self.assertEqual(self.map, {'a': [1, 3, 4], 'b': 2, 'c': 5})
+
+
+class MultiMapContainerTest(unittest.TestCase):
+    def test_list(self):
+        m = MultiMap([('a', 1)], container=list, b=2)
+        self.assertEqual(m, {'a': [1], 'b': [2]})
+        m['a'] = 3
+        m.update({'b': 4}, c=5)
+        m += {'c': 6}
+        self.assertEqual(m, {'a': [1, 3], 'b': [2, 4], 'c': [5, 6]})
+
+    def test_set(self):
+        m = MultiMap(container=set)
+        m.update([('a', 1), ('a', 1), ('a', 2)])
+        self.assertEqual(m, {'a': {1, 2}})
+
+    def test_deque(self):
+        m = MultiMap(container=deque)
+        m['a'] = 1
+        m['a'] = 2
+        self.assertEqual(m['a'], deque([1, 2]))
+
+    def test_sorted_list(self):
+        m = MultiMap(container=SortedList)
+        m.update([('a', 3), ('a', 1), ('a', 2)])
+        self.assertIsInstance(m['a'], SortedList)
+        self.assertEqual(list(m['a']), [1, 2, 3])
+
+    def test_counter(self):
+        m = MultiMap(container=Counter)
+        m.update([('a', 'x'), ('a', 'y'), ('a', 'x')])
+        self.assertEqual(m['a'], Counter({'x': 2, 'y': 1}))
+
+    def test_setdefault(self):
+        m = MultiMap(container=list)
+        self.assertEqual(m.setdefault('a', 1), [1])
+        self.assertEqual(m.setdefault('a', 2), [1])
+        self.assertEqual(m.setdefault('b'), [])
+        self.assertEqual(m.setdefault('b'), [])
+        self.assertEqual(MultiMap(container=set).setdefault('c', None),
+                         {None})
+        self.assertIsNone(MultiMap().setdefault('d'))
+
+    def test_bad_container(self):
+        with self.assertRaises(TypeError):
+            MultiMap(container=int)
+
+    def test_group_by(self):
+        m = MultiMap.group_by(['apple', 'avocado', 'banana'],
+                              key=lambda word: word[0])
+        self.assertEqual(m, {'a': ['apple', 'avocado'], 'b': ['banana']})
+        m['b'] = 'blueberry'
+        self.assertEqual(m['b'], ['banana', 'blueberry'])
+
+        m = MultiMap.group_by(range(6), key=lambda n: n % 2, container=set)
+        self.assertEqual(m, {0: {0, 2, 4}, 1: {1, 3, 5}})
+
+
+class FrozenMultiMapTest(unittest.TestCase):
+    def test_legacy(self):
+        m = MultiMap(a=1, b=2)
+        m['a'] = 3
+        frozen = m.freeze()
+        self.assertEqual(frozen.typecode, 'q')
+        self.assertEqual(frozen['a'].tolist(), [1, 3])
+        self.assertEqual(frozen['b'].tolist(), [2])
+        self.assertEqual(len(frozen), 2)
+        self.assertEqual(list(frozen), ['a', 'b'])
+
+    def test_zero_copy(self):
+        frozen = MultiMap.group_by(range(10), key=lambda n: n % 3).freeze()
+        row = frozen[1]
+        self.assertIsInstance(row, memoryview)
+        self.assertEqual(row.tolist(), [1, 4, 7])
+        self.assertIs(row.obj, frozen[0].obj)
+
+    def test_floats(self):
+        m = MultiMap(container=list)
+        m.update([('a', 0.5), ('a', 1.5)])
+        frozen = m.freeze()
+        self.assertEqual(frozen.typecode, 'd')
+        self.assertEqual(frozen['a'].tolist(), [0.5, 1.5])
+
+    def test_objects(self):
+        m = MultiMap.group_by(['apple', 'avocado', 'banana'],
+                              key=lambda word: word[0], container=set)
+        frozen = m.freeze()
+        self.assertIsNone(frozen.typecode)
+        self.assertEqual(set(frozen['a']), {'apple', 'avocado'})
+        self.assertEqual(frozen['b'], ('banana',))
+        self.assertIn('a', frozen)
+        self.assertNotIn('c', frozen)
+        with self.assertRaises(KeyError):
+            frozen['c']
+
+    def test_counter(self):
+        m = MultiMap(container=Counter)
+        m.update([('a', 1), ('a', 1), ('a', 2)])
+        self.assertEqual(sorted(m.freeze()['a'].tolist()), [1, 1, 2])
+
+    def test_immutable(self):
+        frozen = MultiMap(a=1).freeze()
+        with self.assertRaises(TypeError):
+            frozen['a'] = 2
+        with self.assertRaises(TypeError):
+            frozen['a'][0] = 2
+        with self.assertRaises(AttributeError):
+            frozen.extra = 1
+
+    def test_empty(self):
+        frozen = MultiMap().freeze()
+        self.assertEqual(len(frozen), 0)
+        self.assertEqual(repr(frozen), 'FrozenMultiMap({})')
+
+
+class MultiMapIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.map = MultiMap([('a', 1), ('b', 1)], container=list, index=True)
+
+    def tearDown(self):
+        self.map = None
+
+    def test_keys_for(self):
+        self.map['a'] = 2
+        self.map.update({'c': 2}, d=1)
+        self.map += {'e': 3}
+        self.assertEqual(self.map.keys_for(1), {'a', 'b', 'd'})
+        self.assertEqual(self.map.keys_for(2), {'a', 'c'})
+        self.assertEqual(self.map.keys_for(4), set())
+        with self.assertRaises(AttributeError):
+            self.map.keys_for(1).add('f')
+
+    def test_delete(self):
+        self.map['a'] = 2
+        del self.map['a']
+        self.assertEqual(self.map.keys_for(1), {'b'})
+        self.assertEqual(self.map.keys_for(2), set())
+        self.assertEqual(self.map.pop('b'), [1])
+        self.assertEqual(self.map.pop('b', None), None)
+        self.assertEqual(self.map._reverse, {})
+
+        self.map['c'] = 3
+        self.map.clear()
+        self.assertEqual(self.map.keys_for(3), set())
+
+    def test_remove_value(self):
+        self.map['a'] = 2
+        self.map['a'] = 1
+        self.assertEqual(self.map.remove_value(1), 2)
+        self.assertEqual(self.map, {'a': [2]})
+        self.assertEqual(self.map.remove_value(1), 0)
+
+    def test_containers(self):
+        for container in (set, Counter, deque, SortedList):
+            m = MultiMap(container=container, index=True)
+            m.update([('a', 1), ('a', 2), ('b', 1)])
+            m.remove_value(1)
+            self.assertEqual(list(m), ['a'])
+            self.assertEqual(sorted(m['a']), [2])
+
+    def test_legacy(self):
+        m = MultiMap(a=1, b=2, index=True)
+        m['a'] = 3
+        self.assertEqual(m, {'a': [1, 3], 'b': 2})
+        self.assertEqual(m.keys_for(3), {'a'})
+        m.remove_value(2)
+        self.assertNotIn('b', m)
+
+    def test_group_by(self):
+        m = MultiMap.group_by(range(6), key=lambda n: n % 2, index=True)
+        self.assertEqual(m.keys_for(4), {0})
+
+    def test_unhashable(self):
+        with self.assertRaises(TypeError):
+            self.map['a'] = [2]
+        with self.assertRaises(TypeError):
+            self.map.update([('c', 3), ('a', [2])])
+        self.assertEqual(self.map, {'a': [1], 'b': [1], 'c': [3]})
+        legacy = MultiMap(a=1, index=True)
+        with self.assertRaises(TypeError):
+            legacy['a'] = {}
+        with self.assertRaises(TypeError):
+            legacy['b'] = {}
+        self.assertEqual(legacy, {'a': 1})
+        self.assertEqual(legacy.keys_for(1), {'a'})
+
+    def test_unindexed(self):
+        with self.assertRaises(TypeError):
+            MultiMap().keys_for(1)
+        with self.assertRaises(TypeError):
+            MultiMap().remove_value(1)
+
+
+class ConcurrentDictTest(unittest.TestCase):
+    def setUp(self):
+        self.dict = ConcurrentDict(a=1, b=2, shards=4)
+
+    def tearDown(self):
+        self.dict = None
+
+    def test_mapping(self):
+        self.dict['c'] = 3
+        self.assertEqual(self.dict['c'], 3)
+        self.assertIn('a', self.dict)
+        self.assertEqual(len(self.dict), 3)
+        self.assertEqual(sorted(self.dict), ['a', 'b', 'c'])
+        self.assertEqual(self.dict, {'a': 1, 'b': 2, 'c': 3})
+        del self.dict['c']
+        self.assertEqual(self.dict.get('c', 0), 0)
+        self.assertEqual(self.dict.pop('b'), 2)
+        self.assertEqual(self.dict.pop('b', None), None)
+        self.dict.clear()
+        self.assertEqual(len(self.dict), 0)
+        with self.assertRaises(ValueError):
+            ConcurrentDict(shards=0)
+
+    def test_setdefault(self):
+        self.assertEqual(self.dict.setdefault('a', 5), 1)
+        self.assertEqual(self.dict.setdefault('c', 3), 3)
+
+    def test_update_if(self):
+        self.assertTrue(self.dict.update_if('a', 10, lambda v: v < 5))
+        self.assertFalse(self.dict.update_if('a', 20, lambda v: v < 5))
+        self.assertTrue(self.dict.update_if('c', 3, lambda v: v is None))
+        self.assertEqual(self.dict, {'a': 10, 'b': 2, 'c': 3})
+
+    def test_compute(self):
+        self.assertEqual(self.dict.compute('a', lambda v: v * 10), 10)
+        self.assertEqual(self.dict.compute('c', lambda v: v + 1, default=0),
+                         1)
+
+    def test_merge(self):
+        self.dict.merge({'a': 10, 'c': 3}, {'c': 30}, on_conflict='sum')
+        self.assertEqual(self.dict, {'a': 11, 'b': 2, 'c': 33})
+        self.dict += {'a': 0}
+        self.assertEqual(self.dict['a'], 0)
+        with self.assertRaises(TypeError):
+            self.dict += 12
+
+    def test_to_dict(self):
+        copied = self.dict.to_dict()
+        self.dict['c'] = 3
+        self.assertEqual(copied, {'a': 1, 'b': 2})
+        self.assertIsInstance(copied, Dict)
+        self.assertFalse(hasattr(self.dict, 'snapshot'))
+        copied = self.dict.copy()
+        copied['d'] = 4
+        self.assertNotIn('d', self.dict)
+
+    def test_threads(self):
+        def work():
+            for i in range(1000):
+                self.dict.compute(i % 10, lambda v: v + 1, default=0)
+        threads = [Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([self.dict[i] for i in range(10)], [800] * 10)
+
+
+class CacheDictTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = CacheDict(ttl=10, maxsize=3, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.cache = None
+
+    def test_ttl(self):
+        self.cache['a'] = 1
+        self.cache.set('b', 2, ttl=20)
+        self.cache.set('c', 3, ttl=None)
+        self.now = 15
+        self.assertNotIn('a', self.cache)
+        self.assertEqual(sorted(self.cache), ['b', 'c'])
+        with self.assertRaises(KeyError):
+            self.cache['a']
+        self.assertEqual(self.cache['b'], 2)
+        self.now = 1000
+        self.assertEqual(self.cache.expire(), 1)
+        self.assertEqual(list(self.cache), ['c'])
+        self.assertEqual(self.cache.stats, CacheStats(1, 1, 0, 2))
+
+    def test_replaced_entry_expiry(self):
+        self.cache['a'] = 1
+        self.now = 5
+        self.cache['a'] = 2
+        self.now = 12
+        self.assertEqual(self.cache.expire(), 0)
+        self.assertEqual(self.cache['a'], 2)
+
+    def test_rewrites_compact_expiries(self):
+        for i in range(1000):
+            self.now = i
+            self.cache['a'] = i
+        self.cache.set('b', 0)
+        self.cache.set('b', 1)
+        self.assertLessEqual(len(self.cache._expiries), 4)
+        self.assertEqual(self.cache['a'], 999)
+        self.now = 1010
+        self.assertEqual(self.cache.expire(), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru(self):
+        for key in 'abc':
+            self.cache[key] = key
+        self.cache['a']
+        self.cache['d'] = 'd'
+        self.assertEqual(list(self.cache), ['c', 'a', 'd'])
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+    def test_weight(self):
+        cache = CacheDict(maxweight=10, weigher=len)
+        cache['a'] = 'x' * 4
+        cache['b'] = 'x' * 4
+        cache['c'] = 'x' * 4
+        self.assertEqual(list(cache), ['b', 'c'])
+        self.assertEqual(cache.weight, 8)
+        del cache['b']
+        self.assertEqual(cache.weight, 4)
+        with self.assertRaises(ValueError):
+            cache['d'] = 'x' * 11
+
+    def test_mapping(self):
+        cache = CacheDict([('a', 1)], b=2)
+        self.assertEqual(cache, {'a': 1, 'b': 2})
+        self.assertEqual(cache.get('c', 3), 3)
+        self.assertEqual(len(cache), 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.weight, 0)
+
+    def test_reads_dont_count_as_uses(self):
+        for key in 'abc':
+            self.cache[key] = key
+        self.assertEqual(list(self.cache.items()),
+                         [('a', 'a'), ('b', 'b'), ('c', 'c')])
+        self.assertEqual(list(self.cache.values()), ['a', 'b', 'c'])
+        self.assertEqual(self.cache, {'a': 'a', 'b': 'b', 'c': 'c'})
+        self.assertEqual(self.cache.stats, CacheStats(0, 0, 0, 0))
+        self.cache['d'] = 'd'
+        self.assertEqual(list(self.cache), ['b', 'c', 'd'])
+
+    def test_len_skips_expired(self):
+        self.cache['a'] = 1
+        self.cache.set('b', 2, ttl=None)
+        self.now = 15
+        self.assertEqual(len(self.cache), len(list(self.cache)))
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache, {'b': 2})
+        self.assertEqual(self.cache.stats.expirations, 1)
+        del self.cache['b']
+        self.cache['c'] = 3
+        self.assertTrue(self.cache)
+        self.now = 30
+        self.assertFalse(self.cache)
+        self.assertEqual(repr(self.cache), 'CacheDict({})')
+
+    def test_sweep(self):
+        with CacheDict(ttl=0.01, sweep_interval=0.01) as cache:
+            cache['a'] = 1
+            deadline = time.monotonic() + 5
+            while len(cache) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.stats.expirations, 1)
+
+
+class _Colliding(object):
+    """A key type whose instances all share one hash"""
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, _Colliding) and self.name == other.name
+
+
+class PersistentMapTest(unittest.TestCase):
+    def setUp(self):
+        self.map = PersistentMap(a=1, b=2)
+
+    def tearDown(self):
+        self.map = None
+
+    def test_set(self):
+        new = self.map.set('c', 3)
+        self.assertEqual(new, {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(self.map, {'a': 1, 'b': 2})
+        self.assertEqual(new.set('a', 10)['a'], 10)
+        self.assertIs(new.set('c', 3), new)
+
+    def test_delete(self):
+        new = self.map.delete('a')
+        self.assertEqual(new, {'b': 2})
+        self.assertIn('a', self.map)
+        self.assertEqual(len(new.delete('b')), 0)
+        with self.assertRaises(KeyError):
+            new.delete('a')
+
+    def test_immutable(self):
+        with self.assertRaises(TypeError):
+            self.map['c'] = 3
+        with self.assertRaises(AttributeError):
+            self.map.extra = 1
+
+    def test_collisions(self):
+        keys = [_Colliding(name) for name in 'xyz']
+        m = PersistentMap()
+        for i, key in enumerate(keys):
+            m = m.set(key, i)
+        self.assertEqual([m[key] for key in keys], [0, 1, 2])
+        self.assertEqual(m.get(_Colliding('w')), None)
+        m = m.set(1, 'one').delete(keys[0]).delete(keys[1])
+        self.assertEqual(dict(m), {keys[2]: 2, 1: 'one'})
+
+    def test_against_dict(self):
+        rng = random.Random(0)
+        expected, m = {}, PersistentMap()
+        versions = []
+        for _ in range(3000):
+            key = rng.randrange(500)
+            if key in expected and rng.random() < 0.4:
+                del expected[key]
+                m = m.delete(key)
+            else:
+                expected[key] = rng.random()
+                m = m.set(key, expected[key])
+            if rng.random() < 0.01:
+                versions.append((dict(expected), m))
+        self.assertEqual(len(m), len(expected))
+        self.assertEqual(dict(m), expected)
+        for snapshot, version in versions:
+            self.assertEqual(dict(version), snapshot)
+
+    def test_transient(self):
+        transient = self.map.transient()
+        for i in range(1000):
+            transient[i] = i
+        del transient['a']
+        frozen = transient.persistent()
+        transient[0] = 'changed'
+        del transient[1]
+        self.assertEqual(len(frozen), 1001)
+        self.assertEqual(frozen[0], 0)
+        self.assertEqual(frozen[1], 1)
+        self.assertEqual(transient[0], 'changed')
+        self.assertEqual(self.map, {'a': 1, 'b': 2})
+
+    def test_update(self):
+        new = self.map.update([('c', 3)], d=4)
+        self.assertEqual(new, {'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.assertEqual(len(self.map), 2)
+
+
+class MappedDictTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'table.smd')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_str(self):
+        with MappedDict.create(self.path, capacity=4) as m:
+            m['a'] = 'apple'
+            m.update({'b': 'banana'}, c='cherry')
+            m['a'] = 'avocado'
+            self.assertEqual(m['a'], 'avocado')
+            self.assertEqual(len(m), 3)
+        with MappedDict(self.path) as m:
+            self.assertEqual(dict(m), {'a': 'avocado', 'b': 'banana',
+                                       'c': 'cherry'})
+            self.assertNotIn('d', m)
+            self.assertNotIn(1, m)
+            with self.assertRaises(TypeError):
+                m['d'] = 'date'
+
+    def test_int_float(self):
+        with MappedDict.create(self.path, int, float) as m:
+            for i in range(-500, 500):
+                m[i] = i / 2
+            self.assertEqual(len(m), 1000)
+        with MappedDict(self.path) as m:
+            self.assertEqual(m[-500], -250.0)
+            self.assertEqual(m[499], 249.5)
+            self.assertEqual(sorted(m), list(range(-500, 500)))
+            with self.assertRaises(KeyError):
+                m[500]
+
+    def test_bytes_overflow_growth(self):
+        with MappedDict.create(self.path, bytes, bytes) as m:
+            for i in range(300):
+                m[str(i).encode()] = bytes(i)
+        with MappedDict(self.path) as m:
+            self.assertEqual(m[b'299'], bytes(299))
+            self.assertEqual(len(m), 300)
+
+    def test_reader_survives_rewrite(self):
+        with MappedDict.create(self.path, int, int, capacity=2) as writer:
+            writer[1] = 1
+            with MappedDict(self.path) as reader:
+                for i in range(2, 100):
+                    writer[i] = i
+                self.assertEqual(dict(reader), {1: 1})
+        with MappedDict(self.path) as reader:
+            self.assertEqual(len(reader), 99)
+
+    def test_types(self):
+        with self.assertRaises(TypeError):
+            MappedDict.create(self.path, float, int)
+        with MappedDict.create(self.path, str, int) as m:
+            with self.assertRaises(TypeError):
+                m['a'] = 'b'
+            with self.assertRaises(TypeError):
+                m[1] = 1
+
+    def test_not_mapped_dict(self):
+        with open(self.path, 'wb') as f:
+            f.write(bytes(128))
+        with self.assertRaises(ValueError):
+            MappedDict(self.path)
+
+    def test_pickle(self):
+        with MappedDict.create(self.path, str, int) as m:
+            m['a'] = 1
+        with MappedDict(self.path) as m:
+            loaded = pickle.loads(pickle.dumps(m))
+            self.assertEqual(loaded['a'], 1)
+            loaded.close()
+
+
+class FrozenDictTest(unittest.TestCase):
+    def setUp(self):
+        self.pairs = {'key{}'.format(i): i for i in range(500)}
+        self.dict = FrozenDict.build(self.pairs)
+
+    def tearDown(self):
+        self.dict = None
+
+    def test_lookup(self):
+        self.assertEqual(len(self.dict), 500)
+        self.assertEqual(dict(self.dict), self.pairs)
+        self.assertEqual(self.dict['key42'], 42)
+        self.assertNotIn('missing', self.dict)
+        self.assertNotIn(1.5, self.dict)
+        with self.assertRaises(KeyError):
+            self.dict['missing']
+
+    def test_minimal(self):
+        slots = {self.dict._slot(key) for key in self.pairs}
+        self.assertEqual(slots, set(range(500)))
+
+    def test_typed_values(self):
+        self.assertEqual(self.dict._values.format, 'q')
+        mixed = FrozenDict([(1, 'one'), (b'two', 2.0), ('three', None)])
+        self.assertEqual(mixed[1], 'one')
+        self.assertEqual(mixed[b'two'], 2.0)
+        self.assertIsNone(mixed['three'])
+
+    def test_unchecked(self):
+        unchecked = FrozenDict.build(self.pairs, check_keys=False)
+        self.assertEqual(unchecked['key7'], 7)
+        self.assertIsNone(unchecked._keys)
+        with self.assertRaises(TypeError):
+            list(unchecked)
+
+    def test_bytes(self):
+        loaded = FrozenDict.from_bytes(self.dict.to_bytes())
+        self.assertEqual(dict(loaded), self.pairs)
+        mixed = FrozenDict([('a', 'x'), (b'b', b'y'), (3, -2 ** 70),
+                            ('d', 1.5), ('e', None), ('f', True)])
+        self.assertEqual(FrozenDict.from_bytes(bytearray(mixed.to_bytes())),
+                         mixed)
+        self.assertEqual(pickle.loads(pickle.dumps(self.dict))['key1'], 1)
+        self.assertEqual(pickle.loads(pickle.dumps(mixed)), mixed)
+
+    def test_bytes_packed(self):
+        loaded = FrozenDict.from_bytes(FrozenDict(a='x', b=2.5).to_bytes())
+        self.assertIs(type(loaded['b']), float)
+        data = FrozenDict(a='x', b=None).to_bytes()
+        loaded = FrozenDict.from_bytes(data)
+        self.assertEqual(loaded, {'a': 'x', 'b': None})
+        # Keys and values are read in place from the serialized data
+        self.assertIs(loaded._keys._data.obj, data)
+        self.assertIs(loaded._values._data.obj, data)
+        unpicklable = FrozenDict(a='x', b=[1])
+        with self.assertRaises(TypeError):
+            unpicklable.to_bytes()
+        self.assertEqual(pickle.loads(pickle.dumps(unpicklable)),
+                         {'a': 'x', 'b': [1]})
+        with self.assertRaises(ValueError):
+            FrozenDict.from_bytes(b'not a frozen dict')
+
+    def test_edge_sizes(self):
+        self.assertEqual(len(FrozenDict()), 0)
+        self.assertNotIn('a', FrozenDict())
+        self.assertEqual(FrozenDict(a=1)['a'], 1)
+
+    def test_bad_key(self):
+        with self.assertRaises(TypeError):
+            FrozenDict.build([(1.5, 'x')])
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_dict(self):
+        d = Dict(a=1, b=2)
+        snapshot = d.snapshot()
+        d['a'] = 10
+        d['c'] = 3
+        del d['b']
+        d.update(d=4)
+        d.merge({'a': 5}, on_conflict='sum')
+        self.assertIsInstance(snapshot, DictSnapshot)
+        self.assertEqual(snapshot, {'a': 1, 'b': 2})
+        self.assertEqual(sorted(snapshot), ['a', 'b'])
+        self.assertEqual(len(snapshot), 2)
+        self.assertNotIn('c', snapshot)
+        self.assertEqual(d, {'a': 15, 'c': 3, 'd': 4})
+        with self.assertRaises(TypeError):
+            snapshot['a'] = 2
+
+    def test_dict_clear_pop(self):
+        d = Dict(a=1, b=2, c=3)
+        snapshot = d.snapshot()
+        self.assertEqual(d.popitem(), ('c', 3))
+        d.pop('a')
+        d.setdefault('e', 5)
+        later = d.snapshot()
+        d.clear()
+        self.assertEqual(snapshot, {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(later, {'b': 2, 'e': 5})
+
+    def test_multimap(self):
+        m = MultiMap(a=1)
+        m['a'] = 2
+        bucket = m['a']
+        snapshot = m.snapshot()
+        m['a'] = 3
+        m['b'] = 4
+        self.assertEqual(snapshot, {'a': [1, 2]})
+        self.assertIs(snapshot['a'], bucket)
+        self.assertEqual(m, {'a': [1, 2, 3], 'b': 4})
+        m['a'] = 5
+        self.assertEqual(bucket, [1, 2])
+
+    def test_multimap_containers(self):
+        m = MultiMap([('a', 1)], container=set, index=True)
+        snapshot = m.snapshot()
+        m.update([('a', 2), ('b', 3)])
+        m.remove_value(1)
+        self.assertEqual(snapshot, {'a': {1}})
+        self.assertEqual(m, {'a': {2}, 'b': {3}})
+
+    @unittest.skipUnless(sys.version_info >= (3, 9),
+                         'dict only supports |= from Python 3.9')
+    def test_ior(self):
+        d = Dict(a=1)
+        snapshot = d.snapshot()
+        d |= {'a': 2, 'b': 3}
+        self.assertEqual(snapshot, {'a': 1})
+        self.assertEqual(d, {'a': 2, 'b': 3})
+
+    def test_released(self):
+        d = Dict(a=1)
+        snapshot = d.snapshot()
+        self.assertIsNot(type(d), Dict)
+        self.assertIsInstance(d, Dict)
+        del snapshot
+        d['a'] = 2
+        self.assertIsNone(d._snapshots)
+        self.assertIs(type(d), Dict)
+
+    def test_threads(self):
+        d = Dict((i, i) for i in range(50))
+        m = MultiMap([(i, i) for i in range(50)], container=list)
+        errors, done = [], []
+
+        def write():
+            i = 0
+            try:
+                while not done:
+                    d[i % 60] = i
+                    m[i % 50] = i
+                    if i % 7 == 0:
+                        d.pop(i % 60, None)
+                        m.pop(i % 50, None)
+                    i += 1
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(300):
+                    snapshot, multi = d.snapshot(), m.snapshot()
+                    first = dict(snapshot)
+                    self.assertEqual(dict(snapshot), first)
+                    list(multi)
+                    len(multi)
+                    del snapshot, multi
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            writer = Thread(target=write)
+            writer.start()
+            readers = [Thread(target=read) for _ in range(4)]
+            for thread in readers:
+                thread.start()
+            for thread in readers:
+                thread.join()
+            done.append(True)
+            writer.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+        self.assertIs(type(d), Dict)
+        self.assertIs(type(m), MultiMap)
+
+    def test_copy(self):
+        m = MultiMap([('a', 1)], container=list)
+        snapshot = m.snapshot()
+        for copied in (copy.deepcopy(m), pickle.loads(pickle.dumps(m))):
+            self.assertIs(type(copied), MultiMap)
+            self.assertIsNone(copied._snapshots)
+            copied['a'] = 2
+            self.assertEqual(copied, {'a': [1, 2]})
+        self.assertEqual(snapshot, {'a': [1]})
+
+    def test_bidirectional(self):
+        d = BiDirectionalMap(a=1, b=2)
+        snapshot = d.snapshot()
+        d['a'] = 3
+        d[2] = 'c'
+        d.inverse[9] = 'z'
+        d.update({'e': 5})
+        del d['e']
+        self.assertIsInstance(snapshot, BiDirectionalSnapshot)
+        self.assertEqual(snapshot, {'a': 1, 'b': 2})
+        self.assertEqual(snapshot.inverse, {1: 'a', 2: 'b'})
+        self.assertEqual(snapshot[2], 'b')
+        self.assertNotIn(3, snapshot)
+        d.popitem()
+        d.clear()
+        self.assertEqual(snapshot, {'a': 1, 'b': 2})
+        self.assertEqual(pickle.loads(pickle.dumps(d))._snapshots, {})
+        del snapshot
+        self.assertEqual(d._snapshots, {})